@@ -0,0 +1,190 @@
+# bench_archive.py - Archivo en frío de inventory_transactions
+#
+# Sobre 12 meses de InventoryTransaction:
+#   • Antes: todo el historial en la tabla
+#   • Ahora: archive_transactions deja 2 meses cerrados en la tabla y mueve
+#     el resto a Parquet (inventory/archive.py)
+# Mide el tamaño de la tabla + índices, los inserts y la primera página del
+# feed, y verifica que lo archivado se sigue leyendo igual: stock a una
+# fecha (ledger), reconstrucción de rollups, iter_transactions y el feed
+# con include_archived.
+#
+# Uso: python bench_archive.py [transacciones]   (SQLite temporal)
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+from django.conf import settings
+
+workdir = tempfile.mkdtemp()
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(workdir, 'bench_archive.sqlite3'),
+}
+settings.INVENTORY_ARCHIVE_CONFIG = {**settings.INVENTORY_ARCHIVE_CONFIG,
+                                     'directory': os.path.join(workdir, 'archive')}
+
+import django
+django.setup()
+
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from inventory.archive import archived_until, iter_transactions, month_start
+from inventory.feed import transaction_feed
+from inventory.ledger import stock_as_of
+from inventory.models import (Product, Region, Branch, InventoryTransaction, DailyTransactionRollup,
+                              TransactionArchive)
+from inventory.rollups import rebuild_rollups
+
+SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+MONTHS = 12
+KEEP_MONTHS = 2
+PRODUCTS = 100
+BRANCHES = 5
+INSERTS = 300
+REPEAT = 20
+
+
+def seed(products, branches, start, end, rng):
+    """Stock inicial y luego transferencias, ventas y pérdidas hasta `end`."""
+    span = end - start
+    rows = [InventoryTransaction(transaction_type='initial', product_id=p, quantity=1_000_000,
+                                 from_location_type='supplier', to_location_type='general',
+                                 created_at=start) for p in products]
+    for i in range(SIZE):
+        branch = rng.choice(branches)
+        kind = rng.random()
+        if kind < 0.4:
+            tx = ('transfer', 'general', None, 'branch', branch)
+        elif kind < 0.9:
+            tx = ('sale', 'branch', branch, 'customer', None)
+        else:
+            tx = ('waste', 'branch', branch, 'waste', None)
+        rows.append(InventoryTransaction(
+            transaction_type=tx[0], product_id=rng.choice(products), quantity=rng.randint(1, 20),
+            from_location_type=tx[1], from_location_id=tx[2],
+            to_location_type=tx[3], to_location_id=tx[4],
+            created_at=start + span * ((i + 1) / (SIZE + 1))))
+    created_at = InventoryTransaction._meta.get_field('created_at')
+    created_at.auto_now_add = False
+    try:
+        InventoryTransaction.objects.bulk_create(rows, batch_size=5000)
+    finally:
+        created_at.auto_now_add = True
+
+
+def table_bytes():
+    """Páginas en uso de la tabla y sus índices (dbstat de SQLite)."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+                       "(SELECT name FROM sqlite_master WHERE tbl_name = 'inventory_transactions')")
+        return cursor.fetchone()[0]
+
+
+def insert_ms(products, branches, rng):
+    samples = []
+    for _ in range(INSERTS):
+        t = time.perf_counter()
+        InventoryTransaction.objects.create(
+            transaction_type='sale', product_id=rng.choice(products), quantity=1,
+            from_location_type='branch', from_location_id=rng.choice(branches),
+            to_location_type='customer')
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples)
+
+
+def feed_ms(product):
+    samples = []
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        transaction_feed(limit=50)
+        transaction_feed(limit=50, product_id=product)
+        samples.append((time.perf_counter() - t) * 1000 / 2)
+    return statistics.median(samples)
+
+
+def walk(product):
+    ids, cursor = [], None
+    while True:
+        page = transaction_feed(cursor=cursor, limit=500, product_id=product, include_archived=True)
+        ids += [row['id'] for row in page['results']]
+        if not page['has_more']:
+            return ids
+        cursor = page['next_cursor']
+
+
+def rollup_rows(days):
+    return sorted(DailyTransactionRollup.objects.filter(day__range=days).values_list(
+        'day', 'product_id', 'branch_key', 'transaction_type', 'net_quantity', 'gross_quantity',
+        'transaction_count'))
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    region = Region.objects.create(name='Bench', climate_type='templado')
+    products = [p.pk for p in Product.objects.bulk_create([
+        Product(product_code=f'BENCH-{i}', product_name=f'Producto {i}', category='bench')
+        for i in range(PRODUCTS)])]
+    branches = [b.pk for b in Branch.objects.bulk_create([
+        Branch(branch_code=f'B{i}', name=f'Sucursal {i}', region=region, address='-',
+               contact_phone='-') for i in range(BRANCHES)])]
+    rng = random.Random(5)
+    now = timezone.now()
+    seed(products, branches, month_start(now, -MONTHS), now - timedelta(hours=1), rng)
+    product = str(products[0])
+
+    print("🧊 ARCHIVO EN FRÍO DE INVENTORY_TRANSACTIONS")
+    print("=" * 70)
+    print(f"Transacciones: {SIZE:,} en {MONTHS} meses  •  Se quedan en la tabla: "
+          f"{KEEP_MONTHS} meses cerrados + el actual")
+
+    probe = month_start(now, -MONTHS + 3) + timedelta(days=10)
+    before = {'bytes': table_bytes(), 'insert': insert_ms(products, branches, rng),
+              'feed': feed_ms(product)}
+    expected = {'stock': stock_as_of()[0], 'probe': stock_as_of(probe)[0],
+                'ids': [row['id'] for row in iter_transactions()], 'walk': walk(product)}
+    days = (timezone.localdate(probe) - timedelta(days=6), timezone.localdate(probe))
+
+    t = time.perf_counter()
+    call_command('archive_transactions', keep_months=KEEP_MONTHS, stdout=open(os.devnull, 'w'))
+    elapsed = time.perf_counter() - t
+    archives = list(TransactionArchive.objects.all())
+    archived = sum(a.row_count for a in archives)
+    parquet = sum(a.size_bytes for a in archives)
+
+    # Lo archivado se sigue leyendo igual
+    t = time.perf_counter()
+    assert stock_as_of(probe)[0] == expected['probe'], 'stock a una fecha archivada distinto'
+    probe_ms = (time.perf_counter() - t) * 1000
+    assert stock_as_of()[0] == expected['stock'], 'stock actual distinto'
+    assert [row['id'] for row in iter_transactions()] == expected['ids'], 'iter_transactions distinto'
+    assert walk(product) == expected['walk'], 'feed con include_archived distinto'
+    rows = rollup_rows(days)
+    rebuild_rollups(*days)
+    assert rows and rollup_rows(days) == rows, 'rebuild_rollups sobre meses archivados distinto'
+
+    after = {'bytes': table_bytes(), 'insert': insert_ms(products, branches, rng),
+             'feed': feed_ms(product)}
+    print(f"\n📦 archive_transactions: {len(archives)} meses, {archived:,} transacciones en "
+          f"{elapsed:.1f} s (hasta {archived_until():%Y-%m-%d})")
+    print(f"  • Parquet: {parquet / 1024 / 1024:.1f} MB ({parquet / archived:.0f} bytes/transacción)")
+    print(f"\n{'':32}{'Antes':>12}{'Ahora':>12}")
+    print(f"  {'Tabla + índices (MB)':30}{before['bytes'] / 1024 / 1024:12.1f}"
+          f"{after['bytes'] / 1024 / 1024:12.1f}")
+    print(f"  {'Insert, mediana (ms)':30}{before['insert']:12.3f}{after['insert']:12.3f}")
+    print(f"  {'Feed, primera página (ms)':30}{before['feed']:12.2f}{after['feed']:12.2f}")
+    print(f"\n🔎 Stock a {probe:%Y-%m-%d} leyendo el archivo: {probe_ms:.0f} ms")
+    print("✅ Stock a una fecha, iter_transactions, feed con include_archived y rebuild de "
+          "rollups coinciden con la tabla completa")
+
+
+if __name__ == '__main__':
+    main()
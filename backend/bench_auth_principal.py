@@ -0,0 +1,96 @@
+# bench_auth_principal.py - Asignaciones por request al crear el usuario autenticado
+#
+# Compara la versión anterior de create_user_from_token (una clase nueva
+# definida dentro de la función en cada request, copiando todos los
+# claims a atributos) con el SupabaseUser de módulo con __slots__.
+#
+# Uso: python bench_auth_principal.py [iteraciones]
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+import django
+django.setup()
+
+from shared.authentication import SupabaseJWTAuthentication
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+CLAIMS = {
+    'sub': '3f1c7a52-7d43-4f6e-9c61-0d2b1f1b7a10',
+    'email': 'prueba@correo.com',
+    'role': 'authenticated',
+    'aud': 'authenticated',
+    'exp': int(time.time()) + 3600,
+    'user_metadata': {'name': 'Usuario Prueba'},
+    'app_metadata': {'provider': 'email', 'providers': ['email'], 'role': 'admin',
+                     'branch_id': '0faa341d-6729-4ced-92e7-fa76d70e6e3d'},
+}
+
+
+def old_create_user(payload):
+    """Versión anterior: define la clase en cada llamada."""
+    class SupabaseUser:
+        def __init__(self, token_payload):
+            self.id = token_payload.get('sub')
+            self.email = token_payload.get('email')
+            self.role = token_payload.get('role', 'authenticated')
+            self.user_metadata = token_payload.get('user_metadata', {})
+            self.app_metadata = token_payload.get('app_metadata', {})
+            self.is_authenticated = True
+            self.is_anonymous = False
+            self.username = self.email
+
+        def __str__(self):
+            return self.email or self.id
+
+        def get_username(self):
+            return self.email
+
+        def has_perm(self, perm, obj=None):
+            return self.role == 'service_role'
+
+        def has_module_perms(self, app_label):
+            return True
+
+    return SupabaseUser(payload)
+
+
+def measure(create):
+    # Se conservan los objetos para contar lo que realmente queda asignado
+    keep = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(ITERATIONS):
+        keep.append(create(CLAIMS))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(s.count_diff for s in stats)
+    size = sum(s.size_diff for s in stats)
+    del keep
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        create(CLAIMS)
+    elapsed = (time.perf_counter() - start) / ITERATIONS * 1e6
+    return blocks / ITERATIONS, size / ITERATIONS, elapsed
+
+
+def main():
+    new_create_user = SupabaseJWTAuthentication().create_user_from_token
+
+    print("🧮 ASIGNACIONES POR USUARIO AUTENTICADO")
+    print("=" * 50)
+    print(f"Iteraciones: {ITERATIONS}")
+    for label, create in (('Antes (clase por request)', old_create_user),
+                          ('Ahora (SupabaseUser __slots__)', new_create_user)):
+        blocks, size, elapsed = measure(create)
+        print(f"  • {label:32} {blocks:6.1f} bloques  {size:8.0f} bytes  {elapsed:6.2f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# bench_bulk_upsert.py - Escritura fila a fila vs lotes masivos en SupabaseClient
+#
+# Usa el PostgREST stand-in local con una latencia simulada por request
+# (por defecto 5 ms, menos que un viaje real a Supabase) y compara:
+#   • create_inventory_item por fila   vs  bulk_upsert_inventory
+#   • update_inventory_quantity por fila vs bulk_update_quantities
+#
+# Uso: python bench_bulk_upsert.py [filas] [latencia_ms]
+import os
+import sys
+import time
+import uuid
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+import django
+django.setup()
+
+from postgrest_standin import PostgRESTStandIn
+from shared.supabase_client import SupabaseClient
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+LATENCY = (float(sys.argv[2]) if len(sys.argv) > 2 else 5) / 1000
+
+BRANCH_ID = '0faa341d-6729-4ced-92e7-fa76d70e6e3d'
+REGION_ID = str(uuid.uuid4())
+
+
+def inventory_rows():
+    return [{
+        'id': str(uuid.uuid4()),
+        'product_id': str(uuid.uuid4()),
+        'region_id': REGION_ID,
+        'branch_id': BRANCH_ID,
+        'product_sku': f'SKU-{i:06d}',
+        'product_name': f'Producto {i}',
+        'quantity': i % 100,
+    } for i in range(ROWS)]
+
+
+def timed(label, fn, server):
+    requests_before = server.requests
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  • {label:42} {elapsed:8.3f} s  {server.requests - requests_before:6d} requests")
+
+
+def main():
+    rows = inventory_rows()
+    with PostgRESTStandIn({'regional_inventory': [], 'general_inventory': []},
+                          latency=LATENCY) as server:
+        client = SupabaseClient(api_key='bench-key', base_url=server.url)
+
+        print("📦 ESCRITURA MASIVA DE INVENTARIO (stand-in local)")
+        print("=" * 70)
+        print(f"Filas: {ROWS}  •  Latencia simulada: {LATENCY * 1000:.1f} ms/request")
+
+        server.tables['regional_inventory'] = []
+        timed('Antes: create_inventory_item x fila',
+              lambda: [client.create_inventory_item(row) for row in rows], server)
+        server.tables['regional_inventory'] = []
+        result = {}
+        timed('Ahora: bulk_upsert_inventory',
+              lambda: result.update(client.bulk_upsert_inventory(rows)), server)
+        assert result['success'] and len(server.tables['regional_inventory']) == ROWS
+
+        timed('Antes: update_inventory_quantity x fila',
+              lambda: [client.update_inventory_quantity(row['id'], row['quantity'] + 1)
+                       for row in rows[:ROWS // 4]], server)
+        print(f"    (medido sobre {ROWS // 4} filas; el stand-in filtra PATCH en O(n))")
+        mapping = {row['product_id']: row['quantity'] + 1 for row in rows}
+        timed('Ahora: bulk_update_quantities',
+              lambda: result.update(client.bulk_update_quantities(mapping, branch_id=BRANCH_ID)),
+              server)
+        assert result['success'] and len(server.tables['general_inventory']) == ROWS
+        print(f"    Lotes: {len(result['chunks'])}  •  "
+              f"bytes/lote: {max(c['bytes'] for c in result['chunks'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# bench_coalescing.py - GETs idénticos concurrentes con y sin single-flight
+#
+# Lanza N lecturas simultáneas del mismo recurso (hilos con SupabaseClient
+# y tareas con AsyncSupabaseClient) contra el PostgREST stand-in local y
+# cuenta cuántos requests llegan realmente al servidor.
+#
+# Uso: python bench_coalescing.py [concurrencia] [latencia_ms]
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+import django
+django.setup()
+
+from postgrest_standin import PostgRESTStandIn
+from shared.supabase_client import SupabaseClient
+from shared.single_flight import coalescing_stats
+
+CONCURRENCY = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+LATENCY = (float(sys.argv[2]) if len(sys.argv) > 2 else 50) / 1000
+
+ROWS = [{'id': i, 'product_id': f'p-{i}', 'quantity': i % 40} for i in range(500)]
+
+
+def run_threads(server, coalesce):
+    client = SupabaseClient(api_key='bench-key', base_url=server.url)
+    client.coalesce_gets = coalesce
+    before = server.requests
+    start = time.perf_counter()
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        results = list(pool.map(lambda _: client.get_inventory(), range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+    assert all(len(r) == len(ROWS) for r in results)
+    # Cada llamador recibe su propio JSON
+    assert len({id(r) for r in results}) == CONCURRENCY
+    return elapsed, server.requests - before
+
+
+async def run_tasks(server, coalesce):
+    from shared.async_supabase_client import AsyncSupabaseClient, aclose_async_clients
+    client = AsyncSupabaseClient(api_key='bench-key', base_url=server.url)
+    client.coalesce_gets = coalesce
+    before = server.requests
+    start = time.perf_counter()
+    results = await asyncio.gather(*(client.get_inventory() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+    await aclose_async_clients()
+    assert all(len(r) == len(ROWS) for r in results)
+    return elapsed, server.requests - before
+
+
+def report(label, elapsed, upstream):
+    print(f"  • {label:34} {elapsed * 1000:8.1f} ms  {upstream:4d} requests a Supabase")
+
+
+def main():
+    with PostgRESTStandIn({'regional_inventory': ROWS}, latency=LATENCY) as server:
+        print("🔀 COALESCENCIA DE GETs CONCURRENTES (stand-in local)")
+        print("=" * 70)
+        print(f"Llamadas simultáneas: {CONCURRENCY}  •  Latencia: {LATENCY * 1000:.0f} ms")
+
+        report('Hilos sin coalescencia', *run_threads(server, False))
+        report('Hilos con single-flight', *run_threads(server, True))
+        try:
+            report('Async sin coalescencia', *asyncio.run(run_tasks(server, False)))
+            report('Async con single-flight', *asyncio.run(run_tasks(server, True)))
+        except django.core.exceptions.ImproperlyConfigured as e:
+            print(f"  ⚠️  Async omitido: {e}")
+
+        stats = coalescing_stats()
+        print(f"\n📊 Métricas: sync={stats['sync']}  async={stats['async']}")
+
+
+if __name__ == '__main__':
+    main()
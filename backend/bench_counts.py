@@ -0,0 +1,63 @@
+# bench_counts.py - Conteos del dashboard: GET select=count vs HEAD en paralelo
+#
+# Compara, contra el PostgREST stand-in local con latencia simulada:
+#   • Antes: un GET ?select=count por tabla, uno detrás de otro
+#   • Ahora: count_tables() -> un HEAD por tabla en paralelo, el total se
+#     lee del header Content-Range (sin cuerpo)
+#
+# Uso: python bench_counts.py [latencia_ms]
+import os
+import sys
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+import django
+django.setup()
+
+from postgrest_standin import PostgRESTStandIn
+from shared.supabase_client import SupabaseClient
+
+LATENCY = (float(sys.argv[1]) if len(sys.argv) > 1 else 30) / 1000
+
+TABLES = {
+    'regions': 12,
+    'branches': 60,
+    'special_zones': 8,
+    'products': 4000,
+    'general_inventory': 4000,
+    'regional_inventory': 20000,
+    'inventory_transactions': 50000,
+}
+
+
+def legacy_count(client, table):
+    result = client._make_request('GET', table, params={'select': 'count', 'count': 'exact'})
+    return result[0]['count'] if result else 0
+
+
+def main():
+    tables = {name: [{'id': i} for i in range(size)] for name, size in TABLES.items()}
+    with PostgRESTStandIn(tables, latency=LATENCY) as server:
+        client = SupabaseClient(api_key='bench-key', base_url=server.url)
+
+        print("🔢 CONTEOS PARA DASHBOARD (stand-in local)")
+        print("=" * 70)
+        print(f"Tablas: {len(TABLES)}  •  Latencia simulada: {LATENCY * 1000:.0f} ms/request")
+
+        start = time.perf_counter()
+        before = {name: legacy_count(client, name) for name in TABLES}
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        after = client.count_tables(list(TABLES), mode='estimated')
+        fanout = time.perf_counter() - start
+
+        assert before == after == TABLES, (before, after)
+        print(f"  • Antes: GET select=count secuencial   {legacy * 1000:8.1f} ms")
+        print(f"  • Ahora: count_tables (HEAD paralelo)  {fanout * 1000:8.1f} ms")
+        print(f"  ⚡ {legacy / fanout:.1f}x más rápido")
+
+
+if __name__ == '__main__':
+    main()
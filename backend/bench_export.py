@@ -0,0 +1,125 @@
+# bench_export.py - Exportación de inventario en streaming
+#
+#   • Antes: list(queryset.values()) + json.dumps, todo en memoria
+#   • Ahora: export_stream -> iterator(chunk_size) + values_list, y cada
+#     bloque se codifica (CSV, NDJSON, gzip) y se entrega al leerlo
+#     (inventory/exports.py)
+#
+# Mide tiempo total, tiempo hasta el primer bloque y pico de memoria de
+# Python (tracemalloc) sobre el inventario por sucursal, y verifica que el
+# NDJSON, el CSV y el gzip traen las mismas filas que la consulta completa.
+#
+# Uso: python bench_export.py [productos]   (SQLite temporal)
+import csv
+import gzip
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+from django.conf import settings
+
+workdir = tempfile.mkdtemp()
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(workdir, 'bench_export.sqlite3'),
+}
+# Con DEBUG Django guarda cada consulta en connection.queries
+settings.DEBUG = False
+
+import django
+django.setup()
+
+from django.core.management import call_command
+
+from inventory.exports import export_stream
+from inventory.models import Product, Region, Branch, RegionalInventory
+
+PRODUCTS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+BRANCHES = 20
+
+
+def seed(rng):
+    region = Region.objects.create(name='Bench', climate_type='templado')
+    branches = Branch.objects.bulk_create([
+        Branch(branch_code=f'B{b:02d}', name=f'Sucursal {b}', region=region, address='-',
+               contact_phone='-') for b in range(BRANCHES)])
+    products = Product.objects.bulk_create([
+        Product(product_code=f'SKU-{i:06d}', product_name=f'Producto {i}', category=f'cat-{i % 40}')
+        for i in range(PRODUCTS)], batch_size=5000)
+    RegionalInventory.objects.bulk_create([
+        RegionalInventory(product=p, branch=b, region=region, product_sku=p.product_code,
+                          product_name=p.product_name, quantity=rng.randint(0, 500))
+        for p in products for b in branches], batch_size=5000)
+
+
+def measure(produce):
+    """(segundos, ms hasta el primer bloque, pico MB) consumiendo `produce()` como un servidor."""
+    start = time.perf_counter()
+    first = None
+    for _ in produce():
+        if first is None:
+            first = (time.perf_counter() - start) * 1000
+    elapsed = time.perf_counter() - start
+    # La memoria en otra pasada: tracemalloc hace todo varias veces más lento
+    tracemalloc.start()
+    for _ in produce():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, first, peak / 1024 / 1024
+
+
+def naive():
+    rows = list(RegionalInventory.objects.order_by('product_id', 'branch_id').values(
+        'product__product_code', 'product_name', 'branch__branch_code', 'region__name', 'quantity',
+        'min_temperature', 'max_temperature', 'last_updated'))
+    yield json.dumps(rows, default=str).encode()
+
+
+def streamed(fmt, compress=False):
+    return lambda: export_stream('regional', fmt, compress=compress)[0]
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    seed(random.Random(3))
+    rows = RegionalInventory.objects.count()
+
+    print("📤 EXPORTACIÓN EN STREAMING")
+    print("=" * 70)
+    print(f"Inventario por sucursal: {rows:,} filas ({PRODUCTS:,} productos x {BRANCHES} sucursales)")
+
+    print(f"\n{'':28}{'Total (s)':>11}{'1er bloque (ms)':>17}{'Pico (MB)':>11}")
+    for label, produce in (('Antes: lista + json.dumps', naive),
+                           ('Ahora: NDJSON', streamed('ndjson')),
+                           ('Ahora: CSV', streamed('csv')),
+                           ('Ahora: CSV + gzip', streamed('csv', True))):
+        elapsed, first, peak = measure(produce)
+        print(f"  {label:26}{elapsed:11.2f}{first:17.1f}{peak:11.1f}")
+
+    # Mismas filas en cada formato
+    expected = [(code, branch, quantity) for code, branch, quantity in RegionalInventory.objects
+                .order_by('product_id', 'branch_id')
+                .values_list('product__product_code', 'branch__branch_code', 'quantity')]
+    ndjson = b''.join(export_stream('regional', 'ndjson')[0]).decode().splitlines()
+    assert [(r['product_code'], r['branch_code'], r['quantity']) for r in map(json.loads, ndjson)] \
+        == expected, 'NDJSON distinto'
+    plain = b''.join(export_stream('regional', 'csv')[0])
+    parsed = list(csv.DictReader(io.StringIO(plain.decode())))
+    assert [(r['product_code'], r['branch_code'], int(r['quantity'])) for r in parsed] == expected, \
+        'CSV distinto'
+    packed = b''.join(export_stream('regional', 'csv', compress=True)[0])
+    assert gzip.decompress(packed) == plain, 'gzip distinto'
+    print(f"\n📦 CSV: {len(plain) / 1024 / 1024:.1f} MB, con gzip {len(packed) / 1024 / 1024:.1f} MB")
+    print("✅ NDJSON, CSV y gzip traen las mismas filas que la consulta completa")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# bench_http_pool.py - Latencia por llamada: conexión nueva vs pool keep-alive
+#
+# Levanta el PostgREST stand-in local con TLS y compara:
+#   • Antes: requests.request(...) de módulo -> TCP + TLS nuevos por llamada
+#   • Ahora: SupabaseClient con la sesión compartida de shared/http_pool.py
+#
+# Uso: python bench_http_pool.py [llamadas]
+import os
+import sys
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+import django
+django.setup()
+
+import requests
+
+from postgrest_standin import PostgRESTStandIn
+from shared.supabase_client import SupabaseClient
+
+CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+REGIONS = [{'id': str(i), 'name': f'Región {i}', 'climate_type': 'tropical'} for i in range(20)]
+
+
+def main():
+    with PostgRESTStandIn({'regions': REGIONS}, tls=True) as server:
+        # Ambos caminos confían en el certificado autofirmado del stand-in
+        os.environ['REQUESTS_CA_BUNDLE'] = server.cert_path
+        client = SupabaseClient(api_key='bench-key', base_url=server.url)
+        url = f'{server.url}/rest/v1/regions'
+
+        def old_call():
+            response = requests.request('GET', url, headers=client.default_headers,
+                                        timeout=15)
+            return response.json()
+
+        def new_call():
+            return client.get_regions()
+
+        print("🔌 LATENCIA POR LLAMADA A SUPABASE (stand-in local con TLS)")
+        print("=" * 60)
+        print(f"Llamadas: {CALLS}")
+        for label, call in (('Antes (conexión nueva por llamada)', old_call),
+                            ('Ahora (pool keep-alive)', new_call)):
+            connections_before = server.connections
+            call()  # calentamiento
+            start = time.perf_counter()
+            for _ in range(CALLS):
+                assert len(call()) == len(REGIONS)
+            elapsed = (time.perf_counter() - start) / CALLS * 1000
+            connections = server.connections - connections_before
+            print(f"  • {label:36} {elapsed:7.3f} ms/llamada  {connections:5d} conexiones")
+
+
+if __name__ == '__main__':
+    main()
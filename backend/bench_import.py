@@ -0,0 +1,185 @@
+# bench_import.py - Importación masiva de productos y stock en streaming
+#
+#   • Antes: una fila a la vez (update_or_create por producto y por stock,
+#     como hacen el admin y las llamadas RPC sueltas)
+#   • Ahora: import_inventory -> lectura en streaming y lotes con upsert
+#     (inventory/imports.py)
+#
+# Mide filas/s y, en una pasada aparte, el pico de memoria de Python
+# (tracemalloc) con un archivo y con otro 4 veces más grande sobre el mismo
+# catálogo, y verifica que el
+# resumen incremental coincide con la reconstrucción, que reimportar no
+# genera ajustes y que las filas inválidas se reportan con su línea.
+#
+# Uso: python bench_import.py [productos]   (SQLite temporal)
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+from django.conf import settings
+
+workdir = tempfile.mkdtemp()
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(workdir, 'bench_import.sqlite3'),
+}
+# Con DEBUG Django guarda cada consulta en connection.queries y la memoria
+# crecería con el número de lotes aunque la importación no acumule nada
+settings.DEBUG = False
+
+import django
+django.setup()
+
+from django.core.management import call_command
+
+from inventory.imports import import_inventory
+from inventory.models import Product, Region, Branch, GeneralInventory, RegionalInventory
+from inventory.summary import get_summary, rebuild_summary
+
+PRODUCTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+BRANCHES = 20
+NAIVE_ROWS = 2000
+COLUMNS = ['product_code', 'product_name', 'category', 'requires_refrigeration', 'branch_code',
+           'quantity', 'min_stock', 'max_stock']
+
+
+def write_csv(path, passes, rng):
+    """Catálogo con inventario general y stock por sucursal, `passes` veces."""
+    rows = 0
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for _ in range(passes):
+            for i in range(PRODUCTS):
+                writer.writerow([f'SKU-{i:06d}', f'Producto {i}', f'cat-{i % 40}',
+                                 'true' if i % 7 == 0 else 'false', '',
+                                 rng.randint(100, 5000), 50, 4000])
+                rows += 1
+                for b in range(BRANCHES):
+                    writer.writerow([f'SKU-{i:06d}', '', '', '', f'B{b:02d}', rng.randint(0, 300), '', ''])
+                    rows += 1
+    return rows
+
+
+def imported(path):
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        result = import_inventory(f, 'csv')
+    return result, time.perf_counter() - start
+
+
+def peak_memory(path):
+    """Pico de memoria de Python reimportando el archivo (tracemalloc lo hace ~5x más lento)."""
+    tracemalloc.start()
+    result, _ = imported(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+
+def naive(path):
+    """Una fila a la vez, con el ORM, para las primeras NAIVE_ROWS filas."""
+    branches = {b.branch_code: b for b in Branch.objects.all()}
+    start = time.perf_counter()
+    with open(path, newline='') as f:
+        for n, row in enumerate(csv.DictReader(f)):
+            if n == NAIVE_ROWS:
+                break
+            product, _ = Product.objects.get_or_create(
+                product_code='N' + row['product_code'],
+                defaults={'product_name': row['product_name'] or '-', 'category': row['category']})
+            if row['branch_code']:
+                branch = branches[row['branch_code']]
+                RegionalInventory.objects.update_or_create(
+                    product=product, branch=branch,
+                    defaults={'quantity': int(row['quantity']), 'region_id': branch.region_id,
+                              'product_sku': product.product_code,
+                              'product_name': product.product_name})
+            else:
+                GeneralInventory.objects.update_or_create(
+                    product=product, defaults={'quantity': int(row['quantity'])})
+    return time.perf_counter() - start
+
+
+def summary_matches():
+    summary = get_summary()
+    incremental = (summary.total_quantity, summary.general_quantity, summary.low_stock_count,
+                   summary.high_stock_count)
+    rebuild_summary()
+    rebuilt = get_summary()
+    return incremental == (rebuilt.total_quantity, rebuilt.general_quantity,
+                           rebuilt.low_stock_count, rebuilt.high_stock_count)
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    region = Region.objects.create(name='Bench', climate_type='templado')
+    Branch.objects.bulk_create([
+        Branch(branch_code=f'B{b:02d}', name=f'Sucursal {b}', region=region, address='-',
+               contact_phone='-') for b in range(BRANCHES)])
+    rng = random.Random(9)
+    small, large = os.path.join(workdir, 'small.csv'), os.path.join(workdir, 'large.csv')
+    small_rows, large_rows = write_csv(small, 1, rng), write_csv(large, 4, rng)
+
+    print("📥 IMPORTACIÓN MASIVA EN STREAMING")
+    print("=" * 70)
+    print(f"Productos: {PRODUCTS:,}  •  Sucursales: {BRANCHES}  •  "
+          f"Archivos: {small_rows:,} y {large_rows:,} filas")
+
+    naive_s = naive(small)
+    # update_or_create sobre los inventarios no genera transacciones: el
+    # resumen se reconstruye para partir de un estado consistente
+    rebuild_summary()
+    print(f"\n📉 Antes: una fila a la vez ({NAIVE_ROWS:,} filas)")
+    print(f"  • {NAIVE_ROWS / naive_s:,.0f} filas/s -> {small_rows / (NAIVE_ROWS / naive_s):,.0f} s "
+          f"para el archivo de {small_rows:,}")
+
+    print("\n📈 Ahora: import_inventory")
+    for label, path, rows in (('1x', small, small_rows), ('4x', large, large_rows)):
+        result, elapsed = imported(path)
+        data = result['data']
+        assert result['success'] and data['rows'] == rows, result['message']
+        print(f"  • {label}: {rows:,} filas en {elapsed:.1f} s ({rows / elapsed:,.0f} filas/s)")
+    assert Product.objects.filter(product_code__startswith='SKU-').count() == PRODUCTS
+    assert RegionalInventory.objects.filter(product__product_code__startswith='SKU-').count() \
+        == PRODUCTS * BRANCHES
+
+    print("\n🧠 Pico de memoria de Python")
+    for label, path in (('1x', small), ('4x', large)):
+        result, peak = peak_memory(path)
+        assert result['success'], result['message']
+        print(f"  • {label}: {peak / 1024 / 1024:.1f} MB")
+
+    # El archivo 4x trae cantidades distintas en cada pasada: se reimporta el 1x dos veces
+    imported(small)
+    again, _ = imported(small)
+    assert again['data']['adjustments'] == 0, 'reimportar no debería cambiar cantidades'
+    print(f"\n🔁 Reimportar el mismo archivo: {again['data']['adjustments']} ajustes")
+    print(f"🧮 Resumen incremental == reconstruido: {summary_matches()}")
+
+    bad = os.path.join(workdir, 'bad.ndjson')
+    with open(bad, 'w') as f:
+        f.write(json.dumps({'product_code': 'SKU-000001', 'quantity': 10}) + '\n')
+        f.write('{no es json\n')
+        f.write(json.dumps({'product_code': 'NUEVO-1', 'quantity': 5}) + '\n')
+        f.write(json.dumps({'product_code': 'SKU-000002', 'branch_code': 'B99', 'quantity': 1}) + '\n')
+        f.write(json.dumps({'product_code': 'SKU-000003', 'quantity': -4}) + '\n')
+    with open(bad, 'rb') as f:
+        result = import_inventory(f, 'ndjson')
+    print(f"\n⚠️  Filas inválidas ({result['message']}):")
+    for error in result['data']['errors']:
+        print(f"  • Línea {error['line']}: {error['error']}")
+    assert [e['line'] for e in result['data']['errors']] == [2, 3, 4, 5]
+    assert summary_matches()
+    print("\n✅ Carga por lotes correcta, memoria independiente del tamaño del archivo")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# bench_jwt_verify.py - Costo de verificar un token ES256 por request
+#
+# Compara la ruta anterior de validate_token (JWK -> números EC -> PEM ->
+# jwt.decode vuelve a parsear el PEM) con la actual (objeto de clave
+# construido una vez por versión del JWKS en shared/jwks.py).
+#
+# Uso: python bench_jwt_verify.py [iteraciones]
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from shared.jwks import JWKSStore
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+ISSUER = 'https://example.supabase.co/auth/v1'
+
+
+def b64(n: int) -> str:
+    return base64.urlsafe_b64encode(n.to_bytes(32, 'big')).rstrip(b'=').decode()
+
+
+def old_path(token, jwk):
+    """Ruta anterior: reconstruye la clave y el PEM en cada request."""
+    x = base64.urlsafe_b64decode(jwk['x'] + '==')
+    y = base64.urlsafe_b64decode(jwk['y'] + '==')
+    public_numbers = ec.EllipticCurvePublicNumbers(
+        x=int.from_bytes(x, 'big'),
+        y=int.from_bytes(y, 'big'),
+        curve=ec.SECP256R1()
+    )
+    pem = public_numbers.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return jwt.decode(token, pem, algorithms=['ES256'],
+                      audience='authenticated', issuer=ISSUER)
+
+
+def new_path(token, store):
+    """Ruta actual: clave precompilada del JWKSStore."""
+    signing_key = store.get_signing_key('bench-kid')
+    return jwt.decode(token, signing_key.key, algorithms=[signing_key.algorithm_name],
+                      audience='authenticated', issuer=ISSUER)
+
+
+def timed(fn, *args):
+    fn(*args)  # calentamiento
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(*args)
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+def main():
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    numbers = private_key.public_key().public_numbers()
+    jwk = {'kty': 'EC', 'crv': 'P-256', 'alg': 'ES256', 'kid': 'bench-kid',
+           'x': b64(numbers.x), 'y': b64(numbers.y)}
+    token = jwt.encode(
+        {'sub': 'bench', 'email': 'bench@example.com', 'aud': 'authenticated',
+         'iss': ISSUER, 'exp': int(time.time()) + 3600},
+        private_key, algorithm='ES256', headers={'kid': 'bench-kid'}
+    )
+
+    with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as fh:
+        json.dump({'keys': [jwk]}, fh)
+    try:
+        # Sin re-descargas: el benchmark no debe salir a la red
+        store = JWKSStore('http://127.0.0.1:9/jwks.json', local_file=fh.name,
+                          min_refetch_interval=float('inf'))
+    finally:
+        os.unlink(fh.name)
+
+    print("⏱️  VERIFICACIÓN ES256 POR TOKEN")
+    print("=" * 50)
+    print(f"Iteraciones: {ITERATIONS}")
+    before = timed(old_path, token, jwk)
+    after = timed(new_path, token, store)
+    print(f"  • Antes (JWK -> PEM por request): {before:8.1f} µs/token")
+    print(f"  • Ahora (clave precompilada):     {after:8.1f} µs/token")
+    print(f"  • Mejora: {before / after:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# bench_ledger_asof.py - Stock a una fecha: replay completo vs corte + tramo
+#
+# Genera historiales de distinto largo (InventoryTransaction) con un corte
+# (StockCheckpoint) cada CHECKPOINT_EVERY transacciones y mide:
+#   • Antes: sumar todo el ledger hasta T
+#   • Ahora: stock_as_of(T) -> último corte <= T + transacciones del tramo
+# El costo de "ahora" no debe crecer con el largo del historial.
+#
+# Uso: python bench_ledger_asof.py [tamaños separados por coma]
+#      (usa un SQLite temporal)
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+from django.conf import settings
+
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(tempfile.mkdtemp(), 'bench_ledger.sqlite3'),
+}
+
+import django
+django.setup()
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from inventory.models import (Product, Region, Branch, InventoryTransaction, StockCheckpoint)
+from inventory.ledger import create_checkpoint, ledger_deltas, stock_as_of
+
+SIZES = [int(n) for n in sys.argv[1].split(',')] if len(sys.argv) > 1 else [10_000, 50_000, 200_000]
+PRODUCTS = 200
+BRANCHES = 20
+CHECKPOINT_EVERY = 2_000
+REPEAT = 5
+
+
+def seed_history(size, products, branches):
+    """Transacciones con created_at cada minuto (bulk_create no toca auto_now_add)."""
+    InventoryTransaction.objects.all().delete()
+    StockCheckpoint.objects.all().delete()
+    created_at = InventoryTransaction._meta.get_field('created_at')
+    created_at.auto_now_add = False
+    rng = random.Random(size)
+    start = timezone.now() - timedelta(minutes=size)
+    rows = []
+    for i in range(size):
+        product = rng.choice(products)
+        if i < PRODUCTS or rng.random() < 0.1:
+            source, target = ('supplier', None), ('general', None)
+        elif rng.random() < 0.7:
+            source, target = ('general', None), ('branch', rng.choice(branches))
+        else:
+            source, target = ('branch', rng.choice(branches)), ('customer', None)
+        rows.append(InventoryTransaction(
+            transaction_type='transfer', product_id=product, quantity=rng.randint(1, 20),
+            from_location_type=source[0], from_location_id=source[1],
+            to_location_type=target[0], to_location_id=target[1],
+            created_at=start + timedelta(minutes=i)))
+    try:
+        InventoryTransaction.objects.bulk_create(rows, batch_size=5000)
+    finally:
+        created_at.auto_now_add = True
+    for i in range(CHECKPOINT_EVERY, size, CHECKPOINT_EVERY):
+        create_checkpoint(start + timedelta(minutes=i))
+    return start
+
+
+def timed(fn):
+    best = float('inf')
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t)
+    return best, result
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    region = Region.objects.create(name='Bench', climate_type='templado')
+    products = [p.pk for p in Product.objects.bulk_create([
+        Product(product_code=f'BENCH-{i}', product_name=f'Producto {i}', category='bench')
+        for i in range(PRODUCTS)])]
+    branches = [b.pk for b in Branch.objects.bulk_create([
+        Branch(branch_code=f'B{i}', name=f'Sucursal {i}', region=region, address='-',
+               contact_phone='-') for i in range(BRANCHES)])]
+
+    print("📒 STOCK A UNA FECHA DESDE EL LEDGER")
+    print("=" * 70)
+    print(f"Productos: {PRODUCTS}  •  Sucursales: {BRANCHES}  •  "
+          f"Un corte cada {CHECKPOINT_EVERY} transacciones")
+    print(f"\n{'Historial':>10} {'Replay completo':>17} {'Corte + tramo':>15} {'Producto':>10}")
+    for size in SIZES:
+        start = seed_history(size, products, branches)
+        as_of = start + timedelta(minutes=size - CHECKPOINT_EVERY // 2)
+        product = str(products[0])
+
+        full_time, full = timed(lambda: {k: v for k, v in ledger_deltas(end=as_of).items() if v})
+        fast_time, (fast, _) = timed(lambda: stock_as_of(as_of))
+        one_time, (one, _) = timed(lambda: stock_as_of(as_of, product_id=product))
+        assert full == fast, 'el corte + tramo no coincide con el replay completo'
+        assert one == {k: v for k, v in full.items() if k[0] == product}
+        print(f"{size:>10,} {full_time * 1000:>14.1f} ms {fast_time * 1000:>12.1f} ms "
+              f"{one_time * 1000:>7.1f} ms")
+    print("\n✅ Saldos idénticos al replay completo en todos los casos")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# bench_resilience.py - Reintentos, deadline y circuit breaker ante fallos
+#
+# Levanta el PostgREST stand-in local, le inyecta fallos (503, conexiones
+# cortadas, respuestas lentas) y muestra cómo responde SupabaseClient:
+#   • 503 transitorios en GET  -> se reintenta con backoff y funciona
+#   • 503 en POST              -> no se reintenta (no es idempotente)
+#   • Caída prolongada         -> el breaker se abre y se falla al instante
+#   • Recuperación             -> sonda half_open y vuelta a closed
+#   • Respuesta lenta          -> el deadline corta la espera
+#
+# Uso: python bench_resilience.py
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+import django
+django.setup()
+
+from postgrest_standin import PostgRESTStandIn
+from shared.resilience import ResiliencePolicy, deadline
+from shared.supabase_client import SupabaseClient
+
+RESET_TIMEOUT = 0.5
+
+
+def timed(label, fn, server):
+    before = server.requests
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    outcome = 'OK' if result else 'None'
+    print(f"  • {label:40} {elapsed * 1000:8.1f} ms  {server.requests - before:3d} requests  -> {outcome}")
+    return result
+
+
+def main():
+    regions = [{'id': i, 'name': f'Región {i}'} for i in range(5)]
+    with PostgRESTStandIn({'regions': regions, 'regional_inventory': []}) as server:
+        client = SupabaseClient(api_key='bench-key', base_url=server.url,
+                                use_reference_cache=False)
+        client.resilience = ResiliencePolicy({'breaker_reset_timeout': RESET_TIMEOUT})
+        client.resilience.on_transition(
+            lambda name, old, new: print(f"    ⚡ breaker {name.rsplit('/', 1)[-1]}: {old} -> {new}"))
+
+        print("🛡️  RESILIENCIA DEL TRANSPORTE (stand-in con fallos inyectados)")
+        print("=" * 78)
+
+        server.inject_fault(status=503, count=2, table='regions')
+        assert timed('GET con 2 respuestas 503', client.get_regions, server)
+
+        server.inject_fault(drop=True, count=1, table='regions')
+        assert timed('GET con conexión cortada', client.get_regions, server)
+
+        server.inject_fault(status=503, count=1, table='regional_inventory')
+        assert not timed('POST con 503 (sin reintento)',
+                         lambda: client.create_inventory_item({'id': 1}), server)
+        server.clear_faults()
+
+        print("\n  Caída prolongada de /regions:")
+        server.inject_fault(status=503, count=-1, table='regions')
+        for i in range(4):
+            timed(f'GET #{i + 1} durante la caída', client.get_regions, server)
+        server.clear_faults()
+
+        time.sleep(RESET_TIMEOUT)
+        print("\n  Recuperación:")
+        assert timed('GET tras reset_timeout (sonda)', client.get_regions, server)
+
+        print("\n  Respuesta lenta (2 s) con deadline de 300 ms:")
+        server.inject_fault(delay=2.0, count=1, table='regions')
+        with deadline(0.3):
+            assert not timed('GET con deadline', client.get_regions, server)
+        server.clear_faults()
+
+        print(f"\n📊 {client.resilience.stats}")
+
+
+if __name__ == '__main__':
+    main()
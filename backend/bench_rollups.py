@@ -0,0 +1,150 @@
+# bench_rollups.py - Tendencias de 90 días: escanear transacciones vs rollup diario
+#
+# Sobre un historial de InventoryTransaction de 180 días:
+#   • Antes: agrupar inventory_transactions por día y producto
+#   • Ahora: trends() sobre DailyTransactionRollup
+# y verifica el mantenimiento incremental (solo procesa lo nuevo desde la
+# marca) y que rebuild_rollups() de un rango deja las mismas filas.
+#
+# Uso: python bench_rollups.py [transacciones]   (SQLite temporal)
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+from django.conf import settings
+
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(tempfile.mkdtemp(), 'bench_rollups.sqlite3'),
+}
+
+import django
+django.setup()
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from inventory.models import Product, Region, Branch, InventoryTransaction, DailyTransactionRollup
+from inventory.rollups import refresh_rollups, rebuild_rollups, trends
+
+SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+DAYS = 180
+PRODUCTS = 100
+BRANCHES = 5
+REPEAT = 5
+
+
+def transactions(count, start, span, products, branches, rng):
+    """Transferencias, ventas y pérdidas repartidas en `span`."""
+    rows = []
+    for i in range(count):
+        branch = rng.choice(branches)
+        kind = rng.random()
+        if kind < 0.4:
+            tx = ('transfer', 'general', None, 'branch', branch)
+        elif kind < 0.85:
+            tx = ('sale', 'branch', branch, 'customer', None)
+        elif kind < 0.95:
+            tx = ('waste', 'branch', branch, 'waste', None)
+        else:
+            tx = ('return', 'customer', None, 'branch', branch)
+        rows.append(InventoryTransaction(
+            transaction_type=tx[0], product_id=rng.choice(products), quantity=rng.randint(1, 20),
+            from_location_type=tx[1], from_location_id=tx[2],
+            to_location_type=tx[3], to_location_id=tx[4],
+            created_at=start + span * (i / count)))
+    created_at = InventoryTransaction._meta.get_field('created_at')
+    created_at.auto_now_add = False
+    try:
+        InventoryTransaction.objects.bulk_create(rows, batch_size=5000)
+    finally:
+        created_at.auto_now_add = True
+
+
+def timed(fn):
+    best, result = float('inf'), None
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000, result
+
+
+def scan_sales(end):
+    start = timezone.make_aware(timezone.datetime.combine(end - timedelta(days=89), timezone.datetime.min.time()))
+    return {(str(r['product_id']), r['day']): r['total'] for r in
+            InventoryTransaction.objects.filter(created_at__gte=start, transaction_type='sale')
+            .order_by().annotate(day=TruncDate('created_at'))
+            .values('product_id', 'day').annotate(total=Sum('quantity'))}
+
+
+def rollup_sales(end):
+    return {(str(r['product_id']), r['day']): r['gross'] for r in
+            trends(days=90, end=end, transaction_types=['sale'], group='product')}
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    region = Region.objects.create(name='Bench', climate_type='templado')
+    products = [p.pk for p in Product.objects.bulk_create([
+        Product(product_code=f'BENCH-{i}', product_name=f'Producto {i}', category='bench')
+        for i in range(PRODUCTS)])]
+    branches = [b.pk for b in Branch.objects.bulk_create([
+        Branch(branch_code=f'B{i}', name=f'Sucursal {i}', region=region, address='-',
+               contact_phone='-') for i in range(BRANCHES)])]
+    rng = random.Random(3)
+    now = timezone.now()
+    transactions(SIZE, now - timedelta(days=DAYS), timedelta(days=DAYS) - timedelta(hours=1),
+                 products, branches, rng)
+
+    print("📊 ROLLUPS DIARIOS DE TRANSACCIONES")
+    print("=" * 70)
+    print(f"Transacciones: {SIZE:,} en {DAYS} días  •  Productos: {PRODUCTS}  •  "
+          f"Sucursales: {BRANCHES}")
+
+    t = time.perf_counter()
+    first = refresh_rollups(until=now)
+    print(f"\n🔄 Carga inicial: {first['transactions']:,} transacciones en {first['chunks']} lotes, "
+          f"{time.perf_counter() - t:.1f} s -> {DailyTransactionRollup.objects.count():,} filas")
+
+    end = timezone.localdate(now)
+    scan_ms, scanned = timed(lambda: scan_sales(end))
+    rollup_ms, rolled = timed(lambda: rollup_sales(end))
+    assert scanned == rolled, 'el rollup no coincide con el escaneo'
+    print(f"\n📈 Ventas de 90 días por producto y día ({len(rolled):,} puntos)")
+    print(f"  • Antes: escanear inventory_transactions  {scan_ms:8.1f} ms")
+    print(f"  • Ahora: trends() sobre el rollup          {rollup_ms:8.1f} ms")
+    print(f"  ⚡ {scan_ms / rollup_ms:.0f}x más rápido")
+
+    transactions(2000, now - timedelta(minutes=30), timedelta(minutes=20), products, branches, rng)
+    t = time.perf_counter()
+    delta = refresh_rollups(until=now)
+    print(f"\n➕ Incremental: {delta['transactions']:,} transacciones nuevas en "
+          f"{(time.perf_counter() - t) * 1000:.0f} ms")
+    assert delta['transactions'] == 2000
+    assert scan_sales(end) == rollup_sales(end)
+
+    week = (end - timedelta(days=30), end - timedelta(days=24))
+    before = sorted(DailyTransactionRollup.objects.filter(day__range=week).values_list(
+        'day', 'product_id', 'branch_key', 'transaction_type', 'net_quantity', 'gross_quantity',
+        'transaction_count'))
+    t = time.perf_counter()
+    rebuilt = rebuild_rollups(*week)
+    after = sorted(DailyTransactionRollup.objects.filter(day__range=week).values_list(
+        'day', 'product_id', 'branch_key', 'transaction_type', 'net_quantity', 'gross_quantity',
+        'transaction_count'))
+    assert before == after, 'rebuild_rollups no coincide con el incremental'
+    print(f"🔁 Rebuild de 7 días: {rebuilt['transactions']:,} transacciones, "
+          f"{(time.perf_counter() - t) * 1000:.0f} ms, mismas {rebuilt['rows']:,} filas")
+    print("\n✅ Rollup incremental, reconstrucción y escaneo coinciden")
+
+
+if __name__ == '__main__':
+    main()
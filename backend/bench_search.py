@@ -0,0 +1,143 @@
+# bench_search.py - Búsqueda de productos con índice
+#
+#   • Antes: icontains sobre product_code/product_name (search_fields del
+#     admin), que recorre toda la tabla
+#   • Ahora: search_products / autocomplete_products sobre FTS5, mantenido
+#     por triggers (inventory/search.py)
+#
+# Mide la mediana por consulta con un catálogo grande, verifica que los
+# resultados indexados son los mismos productos que encuentra icontains y
+# que el índice sigue a los productos creados, renombrados y borrados,
+# también con bulk_create y update().
+#
+# Uso: python bench_search.py [productos]   (SQLite temporal)
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+from django.conf import settings
+
+workdir = tempfile.mkdtemp()
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(workdir, 'bench_search.sqlite3'),
+}
+# Con DEBUG Django guarda cada consulta en connection.queries
+settings.DEBUG = False
+
+import django
+django.setup()
+
+from django.core.management import call_command
+from django.db.models import Q
+
+from inventory.models import Product
+from inventory.search import autocomplete_products, search_products
+
+SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+REPEAT = 30
+TARGET_MS = 10
+
+NOUNS = ['leche', 'arroz', 'frijol', 'aceite', 'azúcar', 'café', 'harina', 'queso', 'yogur', 'atún',
+         'pasta', 'galletas', 'jabón', 'detergente', 'champú', 'cereal', 'mantequilla', 'huevos',
+         'pollo', 'carne', 'salchicha', 'jamón', 'pan', 'avena', 'lenteja', 'garbanzo', 'sal',
+         'chocolate', 'té', 'jugo', 'gaseosa', 'agua', 'cerveza', 'vino', 'vinagre', 'mayonesa',
+         'salsa', 'mostaza', 'papel', 'servilletas']
+ADJECTIVES = ['entera', 'deslactosada', 'integral', 'blanco', 'rojo', 'light', 'natural', 'orgánico',
+              'premium', 'extra', 'familiar', 'clásico', 'dietético', 'tostado', 'molido', 'fresco',
+              'congelado', 'picante', 'dulce', 'suave']
+BRANDS = [f'marca{i}' for i in range(300)]
+SIZES = ['250g', '500g', '1kg', '2kg', '5kg', '330ml', '1l', '1.5l', '3l', 'x6', 'x12', 'x24']
+CATEGORIES = ['lácteos', 'granos', 'despensa', 'aseo', 'bebidas', 'carnes', 'panadería', 'congelados']
+
+
+def seed(rng):
+    # Por lotes, con los triggers de búsqueda activos como en una carga real
+    batch = []
+    for i in range(SIZE):
+        noun = rng.choice(NOUNS)
+        batch.append(Product(
+            product_code=f'SKU-{i:07d}',
+            product_name=f'{noun} {rng.choice(ADJECTIVES)} {rng.choice(BRANDS)} {rng.choice(SIZES)}',
+            category=CATEGORIES[NOUNS.index(noun) % len(CATEGORIES)],
+            requires_refrigeration=NOUNS.index(noun) % 5 == 0))
+        if len(batch) == 10_000:
+            Product.objects.bulk_create(batch)
+            batch = []
+    Product.objects.bulk_create(batch)
+
+
+def median_ms(fn, repeat=REPEAT):
+    samples = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples)
+
+
+def icontains(query):
+    products = Product.objects.all()
+    for term in query.split():
+        products = products.filter(Q(product_name__icontains=term) | Q(product_code__icontains=term))
+    return list(products.values('id', 'product_code', 'product_name')[:20])
+
+
+def main():
+    call_command('migrate', verbosity=0)
+    rng = random.Random(11)
+    t = time.perf_counter()
+    seed(rng)
+    seed_s = time.perf_counter() - t
+
+    print("🔎 BÚSQUEDA DE PRODUCTOS CON ÍNDICE")
+    print("=" * 70)
+    print(f"Productos: {SIZE:,} (carga con triggers: {seed_s:.0f} s, {SIZE / seed_s:,.0f}/s)")
+
+    queries = [
+        ('Código exacto', lambda: search_products('SKU-0123456'), lambda: icontains('SKU-0123456')),
+        ('Nombre + marca', lambda: search_products('queso marca17'), lambda: icontains('queso marca17')),
+        ('Tres palabras', lambda: search_products('leche deslactosada marca42'),
+         lambda: icontains('leche deslactosada marca42')),
+        ('Palabra común', lambda: search_products('leche'), lambda: icontains('leche')),
+        ('Común + filtros', lambda: search_products('arroz', category='granos',
+                                                     requires_refrigeration=False), None),
+        ('Autocompletar "qu"', lambda: autocomplete_products('qu'), lambda: icontains('qu')),
+        ('Autocompletar "leche des"', lambda: autocomplete_products('leche des'),
+         lambda: icontains('leche des')),
+        ('Autocompletar "choco"', lambda: autocomplete_products('choco'), lambda: icontains('choco')),
+    ]
+    print(f"\n{'':28}{'icontains (ms)':>16}{'índice (ms)':>14}")
+    worst = 0
+    for label, indexed, naive in queries:
+        after = median_ms(indexed)
+        before = median_ms(naive, repeat=3) if naive else None
+        worst = max(worst, after)
+        print(f"  {label:26}{before if before is not None else float('nan'):16.1f}{after:14.2f}")
+    mark = '✅' if worst < TARGET_MS else '⚠️'
+    print(f"\n{mark} Peor mediana con índice: {worst:.2f} ms (objetivo < {TARGET_MS} ms)")
+
+    # Mismos productos que icontains cuando ninguna palabra es parte de otra
+    for query in ('queso marca170 500g', 'SKU-0123456', 'atún picante marca299'):
+        found = {r['product_code'] for r in search_products(query, limit=100)}
+        expected = {r['product_code'] for r in icontains(query)}
+        assert found == expected, f'resultados distintos para {query!r}'
+
+    # El índice sigue a los cambios, también sin señales (bulk_create y update)
+    Product.objects.bulk_create([Product(product_code='NUEVO-1', product_name='Quinua andina',
+                                         category='granos')])
+    assert [r['product_code'] for r in search_products('quinua')] == ['NUEVO-1']
+    Product.objects.filter(product_code='NUEVO-1').update(product_name='Amaranto andino')
+    assert not search_products('quinua') and search_products('amaranto')
+    Product.objects.filter(product_code='NUEVO-1').delete()
+    assert not search_products('amaranto')
+    print("✅ Mismos productos que icontains; el índice sigue a bulk_create, update() y delete()")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+# bench_stock_contention.py - Movimientos de stock con muchos hilos a la vez
+#
+# Varios hilos mueven stock sobre pocos productos (mucha contención):
+#   • Antes: leer quantity, sumar en Python y guardar (read-modify-write)
+#   • Ahora: inventory/stock.py -> UPDATE con F() condicionado, bloqueo en
+#     orden determinista y lotes de movimientos en una transacción
+#
+# Correctitud: el stock final debe ser inicial + compras - ventas aplicadas,
+# ninguna fila negativa y el resumen incremental igual a la reconstrucción.
+#
+# Uso: python bench_stock_contention.py [hilos] [lotes_por_hilo] [--default-db]
+#      (por defecto usa un SQLite temporal; --default-db usa la base de
+#      settings.py, que debe estar migrada y vacía)
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+from django.conf import settings
+
+args = [a for a in sys.argv[1:] if not a.startswith('--')]
+THREADS = int(args[0]) if len(args) > 0 else 8
+BATCHES = int(args[1]) if len(args) > 1 else 40
+USE_DEFAULT_DB = '--default-db' in sys.argv
+
+if not USE_DEFAULT_DB:
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench_stock.sqlite3')
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': db_path,
+        # IMMEDIATE: la transacción toma el lock de escritura al empezar
+        # (con DEFERRED dos escritores que ya leyeron fallan con "database is locked")
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 60},
+    }
+
+import django
+django.setup()
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Sum
+
+from inventory.models import (Product, Region, Branch, GeneralInventory, RegionalInventory,
+                              InventoryTransaction, InventorySummary)
+from inventory.stock import apply_movements, InsufficientStock
+from inventory.summary import rebuild_summary, get_summary
+
+PRODUCTS = 5
+BRANCHES = 4
+INITIAL_STOCK = 2000
+BRANCH_STOCK = 300
+MOVEMENTS_PER_BATCH = 20
+
+
+def seed():
+    if not USE_DEFAULT_DB:
+        call_command('migrate', verbosity=0)
+    for model in (InventoryTransaction, RegionalInventory, GeneralInventory, InventorySummary,
+                  Branch, Region, Product):
+        model.objects.all().delete()
+    region = Region.objects.create(name='Bench', climate_type='templado')
+    products = [Product.objects.create(product_code=f'BENCH-{i}', product_name=f'Producto {i}',
+                                       category='bench') for i in range(PRODUCTS)]
+    branches = [Branch.objects.create(branch_code=f'B{i}', name=f'Sucursal {i}', region=region,
+                                      address='-', contact_phone='-') for i in range(BRANCHES)]
+    apply_movements([{'product_id': p.pk, 'quantity': INITIAL_STOCK, 'transaction_type': 'initial',
+                      'from_location_type': 'supplier', 'to_location_type': 'general'}
+                     for p in products] +
+                    [{'product_id': p.pk, 'quantity': BRANCH_STOCK, 'transaction_type': 'initial',
+                      'from_location_type': 'supplier', 'to_location_type': 'branch',
+                      'to_location_id': b.pk} for p in products for b in branches])
+    return [str(p.pk) for p in products], [str(b.pk) for b in branches]
+
+
+def total_stock():
+    general = GeneralInventory.objects.aggregate(t=Sum('quantity'))['t'] or 0
+    regional = RegionalInventory.objects.aggregate(t=Sum('quantity'))['t'] or 0
+    return general + regional
+
+
+def negatives():
+    return (GeneralInventory.objects.filter(quantity__lt=0).count()
+            + RegionalInventory.objects.filter(quantity__lt=0).count())
+
+
+def random_movement(rng, products, branches):
+    """Transferencia, venta o compra; las ventas llegan a agotar sucursales."""
+    product = rng.choice(products)
+    kind = rng.random()
+    if kind < 0.5:
+        return {'product_id': product, 'quantity': rng.randint(1, 30),
+                'from_location_type': 'general', 'to_location_type': 'branch',
+                'to_location_id': rng.choice(branches)}
+    if kind < 0.65:
+        a, b = rng.sample(branches, 2)
+        return {'product_id': product, 'quantity': rng.randint(1, 20),
+                'from_location_type': 'branch', 'from_location_id': a,
+                'to_location_type': 'branch', 'to_location_id': b}
+    if kind < 0.9:
+        return {'product_id': product, 'quantity': rng.randint(1, 12), 'transaction_type': 'sale',
+                'from_location_type': 'branch', 'from_location_id': rng.choice(branches),
+                'to_location_type': 'customer'}
+    return {'product_id': product, 'quantity': rng.randint(1, 40), 'transaction_type': 'initial',
+            'from_location_type': 'supplier', 'to_location_type': 'general'}
+
+
+def external_delta(movements):
+    """Stock que entra (compras) menos el que sale (ventas) del inventario."""
+    delta = 0
+    for m in movements:
+        if m['from_location_type'] == 'supplier':
+            delta += m['quantity']
+        if m['to_location_type'] == 'customer':
+            delta -= m['quantity']
+    return delta
+
+
+def run_threads(worker):
+    results = [None] * THREADS
+    def target(i):
+        try:
+            results[i] = worker(i)
+        finally:
+            connection.close()
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, time.perf_counter() - start
+
+
+def naive(products, branches):
+    """Read-modify-write sin bloqueo: lo que hacía el código de la app."""
+    def worker(i):
+        rng = random.Random(i)
+        applied = 0
+        for _ in range(BATCHES * MOVEMENTS_PER_BATCH):
+            product, branch = rng.choice(products), rng.choice(branches)
+            quantity = rng.randint(1, 30)
+            general = GeneralInventory.objects.get(pk=product)
+            if general.quantity < quantity:
+                continue
+            row, _ = RegionalInventory.objects.get_or_create(
+                product_id=product, branch_id=branch,
+                defaults={'region_id': Branch.objects.get(pk=branch).region_id,
+                          'product_sku': '-', 'product_name': '-'})
+            general.quantity -= quantity
+            general.save(update_fields=['quantity'])
+            row.quantity += quantity
+            row.save(update_fields=['quantity'])
+            applied += 1
+        return applied, 0
+    return run_threads(worker)
+
+
+def engine(products, branches, batch_size):
+    def worker(i):
+        rng = random.Random(1000 + i)
+        applied = rejected = delta = 0
+        for _ in range(BATCHES * MOVEMENTS_PER_BATCH // batch_size):
+            batch = [random_movement(rng, products, branches) for _ in range(batch_size)]
+            try:
+                apply_movements(batch)
+            except InsufficientStock:
+                rejected += 1
+                continue
+            applied += len(batch)
+            delta += external_delta(batch)
+        return applied, rejected, delta
+    return run_threads(worker)
+
+
+def main():
+    print("🔒 MOVIMIENTOS DE STOCK CON CONTENCIÓN")
+    print("=" * 70)
+    engine_name = connection.vendor
+    print(f"Base: {engine_name}  •  Hilos: {THREADS}  •  Productos: {PRODUCTS}  •  "
+          f"Sucursales: {BRANCHES}")
+
+    products, branches = seed()
+    expected = total_stock()
+    results, elapsed = naive(products, branches)
+    applied = sum(r[0] for r in results)
+    print(f"\n📉 Antes: read-modify-write ({applied} transferencias en {elapsed:.2f}s)")
+    print(f"  • Stock esperado {expected}, final {total_stock()}  "
+          f"(diferencia {total_stock() - expected:+d} por actualizaciones perdidas)")
+    print(f"  • Filas negativas: {negatives()}")
+
+    for batch_size in (1, MOVEMENTS_PER_BATCH):
+        products, branches = seed()
+        initial = total_stock()
+        results, elapsed = engine(products, branches, batch_size)
+        applied = sum(r[0] for r in results)
+        rejected = sum(r[1] for r in results)
+        expected = initial + sum(r[2] for r in results)
+        final = total_stock()
+        summary = get_summary()
+        incremental = (summary.total_quantity, summary.general_quantity)
+        rebuild_summary()
+        rebuilt = get_summary()
+        ok = (final == expected and negatives() == 0
+              and incremental == (rebuilt.total_quantity, rebuilt.general_quantity)
+              and InventoryTransaction.objects.count() == applied + PRODUCTS * (1 + BRANCHES))
+
+        print(f"\n📈 Ahora: apply_movements, lotes de {batch_size}")
+        print(f"  • {applied} movimientos aplicados, {rejected} lotes rechazados "
+              f"por stock insuficiente, {elapsed:.2f}s")
+        print(f"  • Throughput: {applied / elapsed:,.0f} movimientos/s")
+        print(f"  • Stock esperado {expected}, final {final}; filas negativas: {negatives()}")
+        print(f"  • Resumen incremental == reconstruido: "
+              f"{incremental == (rebuilt.total_quantity, rebuilt.general_quantity)}")
+        print(f"  {'✅ Correcto' if ok else '❌ Inconsistente'}")
+        if not ok:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
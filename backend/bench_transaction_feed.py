@@ -0,0 +1,122 @@
+# bench_transaction_feed.py - Feed de transacciones: OFFSET vs cursor (keyset)
+#
+# Sobre un historial grande de InventoryTransaction mide cuánto tarda una
+# página de 50 filas según la profundidad:
+#   • Antes: ORDER BY created_at DESC OFFSET n (recorre y descarta n filas)
+#   • Ahora: transaction_feed(cursor) -> rango sobre (created_at, id)
+# y verifica que recorrer el feed completo con cursores entregue cada
+# transacción exactamente una vez.
+#
+# Uso: python bench_transaction_feed.py [transacciones]   (SQLite temporal)
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings')
+
+from django.conf import settings
+
+settings.DATABASES['default'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(tempfile.mkdtemp(), 'bench_feed.sqlite3'),
+}
+
+import django
+django.setup()
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from inventory.models import Product, InventoryTransaction
+from inventory.feed import transaction_feed, encode_cursor, FEED_FIELDS
+
+SIZE = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+PRODUCTS = 100
+PAGE = 50
+REPEAT = 5
+
+
+def seed():
+    call_command('migrate', verbosity=0)
+    products = [p.pk for p in Product.objects.bulk_create([
+        Product(product_code=f'BENCH-{i}', product_name=f'Producto {i}', category='bench')
+        for i in range(PRODUCTS)])]
+    created_at = InventoryTransaction._meta.get_field('created_at')
+    created_at.auto_now_add = False
+    rng = random.Random(7)
+    start = timezone.now() - timedelta(seconds=SIZE)
+    try:
+        # Segundos enteros y lotes del mismo instante: hay empates en created_at
+        InventoryTransaction.objects.bulk_create([
+            InventoryTransaction(
+                transaction_type=rng.choice(['transfer', 'sale', 'initial']),
+                product_id=rng.choice(products), quantity=rng.randint(1, 20),
+                from_location_type='general', to_location_type='branch',
+                created_at=start + timedelta(seconds=i - i % 3))
+            for i in range(SIZE)], batch_size=5000)
+    finally:
+        created_at.auto_now_add = True
+    return products
+
+
+def timed(fn):
+    best = float('inf')
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def offset_page(offset, **filters):
+    return list(InventoryTransaction.objects.filter(**filters).order_by('-created_at', '-id')
+                .values(*FEED_FIELDS)[offset:offset + PAGE])
+
+
+def cursor_before(depth):
+    """Cursor que entrega la página `depth` (la última fila de la página anterior)."""
+    if depth == 0:
+        return None
+    last = offset_page(depth * PAGE - 1)[0]
+    return encode_cursor(last['created_at'], last['id'])
+
+
+def main():
+    print("📜 FEED DE TRANSACCIONES: OFFSET vs CURSOR")
+    print("=" * 70)
+    print(f"Transacciones: {SIZE:,}  •  Página: {PAGE} filas")
+    products = seed()
+
+    print("\nPágina        OFFSET       Cursor")
+    depths = [0, 100, 1000, SIZE // PAGE - 2]
+    for depth in depths:
+        cursor = cursor_before(depth)
+        offset_ms = timed(lambda: offset_page(depth * PAGE))
+        cursor_ms = timed(lambda: transaction_feed(cursor=cursor, limit=PAGE))
+        assert ([r['id'] for r in transaction_feed(cursor=cursor, limit=PAGE)['results']] ==
+                [str(r['id']) for r in offset_page(depth * PAGE)])
+        print(f"{depth:>6,} {offset_ms:>10.2f} ms {cursor_ms:>9.2f} ms")
+
+    product = products[0]
+    total = InventoryTransaction.objects.filter(product_id=product).count()
+    seen, cursor, pages = set(), None, 0
+    start = time.perf_counter()
+    while True:
+        page = transaction_feed(cursor=cursor, limit=PAGE, product_id=product)
+        seen.update(r['id'] for r in page['results'])
+        pages += 1
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    elapsed = time.perf_counter() - start
+    assert len(seen) == total, (len(seen), total)
+    print(f"\n🔎 Feed completo de un producto: {total:,} transacciones en {pages} páginas, "
+          f"{elapsed * 1000 / pages:.2f} ms/página")
+    print("✅ Cada transacción aparece exactamente una vez y en el mismo orden que OFFSET")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,8 +5,10 @@ from django.contrib import admin
 try:
     from .models import (
         Product, Region, Branch, SpecialZone,
-        GeneralInventory, RegionalInventory, InventoryTransaction
+        GeneralInventory, RegionalInventory, InventoryTransaction, InventorySummary,
+        StockCheckpoint, TransactionArchive
     )
+    from .search import matching_products
     
     # Registrar con decoradores (una sola vez por modelo)
     @admin.register(Product)
@@ -14,6 +16,16 @@ try:
         list_display = ['product_code', 'product_name', 'category', 'requires_refrigeration']
         search_fields = ['product_code', 'product_name']
         list_filter = ['category', 'requires_refrigeration']
+        
+        def get_search_results(self, request, queryset, search_term):
+            # Índice de búsqueda en vez de icontains, con todas las coincidencias
+            # (ver inventory/search.py)
+            if not search_term.strip():
+                return queryset, False
+            matches = matching_products(search_term, queryset)
+            if matches is None:
+                return super().get_search_results(request, queryset, search_term)
+            return matches, False
     
     @admin.register(Region)
     class RegionAdmin(admin.ModelAdmin):
@@ -48,6 +60,45 @@ try:
         list_display = ['transaction_type', 'product', 'quantity', 'created_at']
         list_filter = ['transaction_type', 'created_at']
         search_fields = ['product__product_name']
+    
+    @admin.register(InventorySummary)
+    class InventorySummaryAdmin(admin.ModelAdmin):
+        # Se mantiene solo: editar a mano descuadra los totales
+        list_display = ['scope', 'key', 'total_quantity', 'general_quantity',
+                        'low_stock_count', 'high_stock_count', 'updated_at']
+        list_filter = ['scope']
+        search_fields = ['key']
+        
+        def has_add_permission(self, request):
+            return False
+        
+        def has_change_permission(self, request, obj=None):
+            return False
+    
+    @admin.register(StockCheckpoint)
+    class StockCheckpointAdmin(admin.ModelAdmin):
+        # Los cortes se crean con `manage.py create_stock_checkpoint`
+        list_display = ['as_of', 'transaction_count', 'created_at']
+        
+        def has_add_permission(self, request):
+            return False
+        
+        def has_change_permission(self, request, obj=None):
+            return False
+    
+    @admin.register(TransactionArchive)
+    class TransactionArchiveAdmin(admin.ModelAdmin):
+        # Los meses se archivan con `manage.py archive_transactions`
+        list_display = ['month', 'row_count', 'size_bytes', 'path', 'created_at']
+        
+        def has_add_permission(self, request):
+            return False
+        
+        def has_change_permission(self, request, obj=None):
+            return False
+        
+        def has_delete_permission(self, request, obj=None):
+            return False
         
 except ImportError as e:
     print(f"Error importando modelos: {e}")
@@ -0,0 +1,356 @@
+# backend/inventory/archive.py
+"""
+Particiones mensuales y archivo en frío de inventory_transactions.
+
+En PostgreSQL la tabla está particionada por mes de created_at (migración
+0006) con una partición DEFAULT para lo que caiga fuera de rango.
+`ensure_partitions()` crea por adelantado las particiones de los meses
+siguientes; los inserts y el feed reciente solo tocan las particiones y
+los índices de los meses calientes. En SQLite la tabla es una sola.
+
+`archive_month()` mueve un mes cerrado a un archivo Parquet (columnar,
+comprimido con zstd) en INVENTORY_ARCHIVE_CONFIG['directory'] y lo quita
+de la tabla: en PostgreSQL soltando su partición, en SQLite con DELETE.
+Los meses se archivan en orden, así que lo archivado es siempre todo lo
+anterior a `archived_until()`. Antes de borrar:
+- el rollup diario se pone al día, para que las tendencias no dependan
+  del archivo;
+- se crea un corte de stock en el fin de mes si no hay uno posterior,
+  para que las consultas de stock recientes no lo lean.
+
+`archived_rows()` e `iter_transactions()` leen los meses archivados cuando
+se piden; el ledger, la reconstrucción de rollups y el feed
+(`include_archived`) los usan cuando el rango cae antes de la frontera.
+
+Requiere pyarrow (opcional) para archivar y leer el archivo.
+"""
+
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import InventoryTransaction, TransactionArchive
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependencia opcional
+    pa = pq = None
+
+DEFAULT_CONFIG = {
+    'directory': 'archive/transactions',
+    'keep_months': 6,
+    'partitions_ahead': 3,
+    'compression': 'zstd',
+}
+
+TABLE = InventoryTransaction._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+BATCH_ROWS = 20000
+
+ARCHIVE_FIELDS = ('id', 'created_at', 'transaction_type', 'product_id', 'from_location_type',
+                  'from_location_id', 'to_location_type', 'to_location_id', 'quantity', 'notes',
+                  'reference_id', 'created_by_id')
+UUID_FIELDS = {'id', 'product_id', 'from_location_id', 'to_location_id', 'reference_id'}
+
+
+def archive_config() -> Dict:
+    """INVENTORY_ARCHIVE_CONFIG de settings con valores por defecto."""
+    return {**DEFAULT_CONFIG, **getattr(settings, 'INVENTORY_ARCHIVE_CONFIG', {})}
+
+
+def archive_directory() -> str:
+    directory = str(archive_config()['directory'])
+    return directory if os.path.isabs(directory) else os.path.join(settings.BASE_DIR, directory)
+
+
+def month_start(value, offset: int = 0) -> datetime:
+    """Inicio (hora local) del mes de `value` desplazado `offset` meses."""
+    if isinstance(value, datetime):
+        value = timezone.localtime(value) if timezone.is_aware(value) else value
+    index = value.year * 12 + value.month - 1 + offset
+    return timezone.make_aware(datetime(index // 12, index % 12 + 1, 1))
+
+
+def _require_pyarrow():
+    if pq is None:
+        raise ImproperlyConfigured('El archivo de transacciones requiere pyarrow: pip install pyarrow')
+
+
+def _schema() -> 'pa.Schema':
+    text = pa.string()
+    return pa.schema([
+        ('id', text), ('created_at', pa.timestamp('us', tz='UTC')), ('transaction_type', text),
+        ('product_id', text), ('from_location_type', text), ('from_location_id', text),
+        ('to_location_type', text), ('to_location_id', text), ('quantity', pa.int32()),
+        ('notes', text), ('reference_id', text), ('created_by_id', pa.int64()),
+    ])
+
+
+# ============================================
+# PARTICIONES (PostgreSQL)
+# ============================================
+
+def is_partitioned() -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass', [TABLE])
+        return cursor.fetchone() is not None
+
+
+def partition_name(month) -> str:
+    return f'{TABLE}_{month_start(month):%Y_%m}'
+
+
+def _table_exists(cursor, name: str) -> bool:
+    cursor.execute('SELECT to_regclass(%s)', [name])
+    return cursor.fetchone()[0] is not None
+
+
+@transaction.atomic
+def ensure_partitions(ahead: Optional[int] = None) -> List[str]:
+    """
+    Crear las particiones del mes actual y de los `ahead` siguientes.
+
+    Si ya hay filas de ese mes en la partición DEFAULT (no se creó a
+    tiempo), se pasan a la partición nueva.
+
+    Returns:
+        Nombres de las particiones creadas (vacío fuera de PostgreSQL)
+    """
+    if not is_partitioned():
+        return []
+    ahead = archive_config()['partitions_ahead'] if ahead is None else ahead
+    now, created = timezone.localtime(), []
+    with connection.cursor() as cursor:
+        for offset in range(ahead + 1):
+            start, end = month_start(now, offset), month_start(now, offset + 1)
+            name = partition_name(start)
+            if _table_exists(cursor, name):
+                continue
+            bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            cursor.execute(f'SELECT 1 FROM {DEFAULT_PARTITION} '
+                           f'WHERE created_at >= %s AND created_at < %s LIMIT 1', [start, end])
+            if cursor.fetchone() is None:
+                cursor.execute(f'CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES {bounds}')
+            else:
+                cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {DEFAULT_PARTITION}')
+                cursor.execute(f'CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES {bounds}')
+                cursor.execute(f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} '
+                               f'WHERE created_at >= %s AND created_at < %s RETURNING *) '
+                               f'INSERT INTO {TABLE} SELECT * FROM moved', [start, end])
+                cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT')
+            created.append(name)
+    return created
+
+
+# ============================================
+# ARCHIVO
+# ============================================
+
+def archived_until() -> Optional[datetime]:
+    """Fin del último mes archivado: todo lo anterior está en el archivo."""
+    last = TransactionArchive.objects.order_by('-month').first()
+    return month_start(last.month, 1) if last else None
+
+
+def _record_batch(rows: List[tuple], schema: 'pa.Schema') -> 'pa.RecordBatch':
+    columns = []
+    for name, values in zip(ARCHIVE_FIELDS, zip(*rows)):
+        if name in UUID_FIELDS:
+            values = [str(value) if value else None for value in values]
+        columns.append(pa.array(values, type=schema.field(name).type))
+    return pa.record_batch(columns, schema=schema)
+
+
+def _write_parquet(transactions, path: str) -> Dict:
+    """Escribir `transactions` en orden (created_at, id), por lotes."""
+    schema, batch = _schema(), []
+    count, first, last = 0, None, None
+    rows = transactions.order_by('created_at', 'id').values_list(*ARCHIVE_FIELDS)
+    with pq.ParquetWriter(path, schema, compression=archive_config()['compression']) as writer:
+        for row in rows.iterator(chunk_size=BATCH_ROWS):
+            batch.append(row)
+            if len(batch) == BATCH_ROWS:
+                writer.write_batch(_record_batch(batch, schema))
+                batch = []
+            first = first or row[1]
+            last = row[1]
+            count += 1
+        if batch:
+            writer.write_batch(_record_batch(batch, schema))
+    return {'rows': count, 'first_created_at': first, 'last_created_at': last}
+
+
+def _drop_month(start: datetime, end: datetime) -> int:
+    """Quitar el mes de la tabla; soltar la partición evita DELETE + VACUUM."""
+    name = partition_name(start)
+    if is_partitioned():
+        with connection.cursor() as cursor:
+            if _table_exists(cursor, name):
+                cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {name}')
+                cursor.execute(f'SELECT COUNT(*) FROM {name}')
+                count = cursor.fetchone()[0]
+                cursor.execute(f'DROP TABLE {name}')
+                return count
+    deleted, _ = InventoryTransaction.objects.filter(created_at__gte=start, created_at__lt=end).delete()
+    return deleted
+
+
+def archive_month(month, directory: Optional[str] = None) -> Dict:
+    """
+    Mover un mes cerrado de inventory_transactions a un archivo Parquet.
+
+    Args:
+        month: Cualquier fecha del mes
+        directory: Carpeta destino (por defecto la de la configuración)
+
+    Returns:
+        {'month', 'rows', 'path', 'size_bytes'}
+
+    Raises:
+        ValueError: Si el mes no está cerrado, ya está archivado, quedan
+            meses anteriores sin archivar o el rollup no llega al fin de mes
+    """
+    # Importación local: ledger y rollups leen el archivo a través de este módulo
+    from .ledger import create_checkpoint, latest_checkpoint
+    from .rollups import get_watermark, refresh_rollups
+
+    _require_pyarrow()
+    start, end = month_start(month), month_start(month, 1)
+    if end > month_start(timezone.localtime()):
+        raise ValueError(f'{start:%Y-%m} no ha cerrado')
+    if TransactionArchive.objects.filter(month=start.date()).exists():
+        raise ValueError(f'{start:%Y-%m} ya está archivado')
+    if InventoryTransaction.objects.filter(created_at__lt=start).exists():
+        raise ValueError(f'Hay transacciones anteriores a {start:%Y-%m}: archivar primero esos meses')
+
+    transactions = InventoryTransaction.objects.filter(created_at__gte=start, created_at__lt=end)
+    refresh_rollups()
+    last = transactions.order_by('-created_at', '-id').values_list('created_at', 'id').first()
+    mark = get_watermark()
+    if last and (mark is None or mark.created_at is None
+                 or (mark.created_at, mark.transaction_id) < last):
+        raise ValueError(f'El rollup diario no llega al final de {start:%Y-%m}')
+    checkpoint = latest_checkpoint()
+    if checkpoint is None or checkpoint.as_of < end:
+        create_checkpoint(end)
+
+    directory = directory or archive_directory()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{TABLE}_{start:%Y-%m}.parquet')
+    written = _write_parquet(transactions, path + '.tmp')
+    os.replace(path + '.tmp', path)
+    try:
+        if pq.ParquetFile(path).metadata.num_rows != written['rows']:
+            raise ValueError(f'{path}: el archivo no tiene las {written["rows"]} filas escritas')
+        with transaction.atomic():
+            deleted = _drop_month(start, end)
+            if deleted != written['rows']:
+                raise ValueError(f'{start:%Y-%m}: {deleted} filas en la tabla y '
+                                 f'{written["rows"]} en el archivo')
+            TransactionArchive.objects.create(
+                month=start.date(), path=path, row_count=written['rows'],
+                size_bytes=os.path.getsize(path), first_created_at=written['first_created_at'],
+                last_created_at=written['last_created_at'])
+    except Exception:
+        os.remove(path)
+        raise
+    return {'month': start.date(), 'rows': written['rows'], 'path': path,
+            'size_bytes': os.path.getsize(path)}
+
+
+# ============================================
+# CONSULTAS
+# ============================================
+
+def _from_archive(row: Dict) -> Dict:
+    for name in UUID_FIELDS:
+        if row[name]:
+            row[name] = uuid.UUID(row[name])
+    return row
+
+
+def archived_rows(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                  product_id=None, transaction_types=None, location_type: Optional[str] = None,
+                  location_id=None, descending: bool = False) -> Iterator[Dict]:
+    """
+    Transacciones archivadas con since <= created_at <= until.
+
+    Solo abre los meses que se cruzan con el rango, y los lee a medida que
+    se consumen.
+
+    Args:
+        product_id / transaction_types: Filtros (se aplican al leer el Parquet)
+        location_type / location_id: Origen o destino en esta ubicación (tipo e
+            id del mismo lado)
+        descending: De la más reciente a la más antigua
+
+    Returns:
+        Iterador de dicts con ARCHIVE_FIELDS en orden (created_at, id)
+    """
+    archives = TransactionArchive.objects.order_by('-month' if descending else 'month')
+    if since is not None:
+        archives = archives.filter(last_created_at__gte=since)
+    if until is not None:
+        archives = archives.filter(first_created_at__lte=until)
+    archives = list(archives)
+    if not archives:
+        return
+    _require_pyarrow()
+
+    filters = []
+    if since is not None:
+        filters.append(('created_at', '>=', since))
+    if until is not None:
+        filters.append(('created_at', '<=', until))
+    if product_id:
+        filters.append(('product_id', '=', str(uuid.UUID(str(product_id)))))
+    if transaction_types:
+        filters.append(('transaction_type', 'in', list(transaction_types)))
+    location_id = str(uuid.UUID(str(location_id))) if location_id else None
+    order = 'descending' if descending else 'ascending'
+
+    for archive in archives:
+        table = pq.read_table(archive.path, filters=filters or None)
+        for row in table.sort_by([('created_at', order), ('id', order)]).to_pylist():
+            # Tipo e id deben coincidir en el mismo lado (origen o destino)
+            if (location_type or location_id) and not any(
+                    (not location_type or row[f'{side}_location_type'] == location_type)
+                    and (not location_id or row[f'{side}_location_id'] == location_id)
+                    for side in ('from', 'to')):
+                continue
+            yield _from_archive(row)
+
+
+def iter_transactions(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                      product_id=None, transaction_types=None,
+                      include_archived: bool = True) -> Iterator[Dict]:
+    """
+    Transacciones de la tabla y del archivo en orden (created_at, id).
+
+    Lo archivado es anterior a todo lo que sigue en la tabla, así que basta
+    con leer primero el archivo y después la tabla.
+
+    Returns:
+        Iterador de dicts con ARCHIVE_FIELDS
+    """
+    if include_archived:
+        yield from archived_rows(since, until, product_id, transaction_types)
+    transactions = InventoryTransaction.objects.order_by('created_at', 'id')
+    if since is not None:
+        transactions = transactions.filter(created_at__gte=since)
+    if until is not None:
+        transactions = transactions.filter(created_at__lte=until)
+    if product_id:
+        transactions = transactions.filter(product_id=product_id)
+    if transaction_types:
+        transactions = transactions.filter(transaction_type__in=transaction_types)
+    yield from transactions.values(*ARCHIVE_FIELDS).iterator(chunk_size=BATCH_ROWS)
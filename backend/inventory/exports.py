@@ -0,0 +1,234 @@
+# backend/inventory/exports.py
+"""
+Exportación en streaming de inventario y transacciones (CSV o NDJSON).
+
+Cargar el queryset en una lista y serializarlo con json.dumps deja todo el
+resultado en memoria, primero como objetos y después como texto. Aquí
+cada dataset se lee con `.iterator(chunk_size=...)` (cursor del lado del
+servidor en PostgreSQL, fetchmany en SQLite), solo con las columnas
+exportadas (`values_list`), y cada bloque de ENCODE_ROWS filas se codifica
+y se entrega apenas se lee. Con gzip el bloque se comprime en el mismo
+paso, así que la memoria no depende del tamaño del resultado.
+
+Datasets:
+- general: inventario general por producto
+- regional: inventario por sucursal
+- transactions: InventoryTransaction en orden (created_at, id); con
+  include_archived primero los meses archivados (inventory/archive.py)
+
+Las columnas de general y regional usan los nombres de
+inventory/imports.py, así que un archivo exportado se puede reimportar.
+"""
+
+import csv
+import io
+import json
+import uuid
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain, islice
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import models
+
+from .archive import ARCHIVE_FIELDS, archived_rows
+from .models import GeneralInventory, RegionalInventory, InventoryTransaction
+
+DEFAULT_CHUNK_SIZE = 2000
+ENCODE_ROWS = 500
+FORMATS = ('csv', 'ndjson')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'gzip': 'application/gzip',
+}
+
+# columnas: (nombre en el archivo, campo para values_list)
+DATASETS = {
+    'general': {
+        'model': GeneralInventory,
+        'order_by': ('product_id',),
+        'columns': (
+            ('product_code', 'product__product_code'),
+            ('product_name', 'product__product_name'),
+            ('category', 'product__category'),
+            ('quantity', 'quantity'),
+            ('min_stock', 'min_stock'),
+            ('max_stock', 'max_stock'),
+            ('location', 'location'),
+            ('notes', 'notes'),
+            ('last_updated', 'last_updated'),
+        ),
+        'filters': {'product_id': 'product_id', 'category': 'product__category'},
+    },
+    'regional': {
+        'model': RegionalInventory,
+        # Mismo orden que el índice único (product, branch)
+        'order_by': ('product_id', 'branch_id'),
+        'columns': (
+            ('product_code', 'product__product_code'),
+            ('product_name', 'product_name'),
+            ('branch_code', 'branch__branch_code'),
+            ('region', 'region__name'),
+            ('quantity', 'quantity'),
+            ('min_temperature', 'min_temperature'),
+            ('max_temperature', 'max_temperature'),
+            ('last_updated', 'last_updated'),
+        ),
+        'filters': {'product_id': 'product_id', 'branch_id': 'branch_id', 'region_id': 'region_id'},
+    },
+    'transactions': {
+        'model': InventoryTransaction,
+        'order_by': ('created_at', 'id'),
+        'columns': tuple((field, field) for field in ARCHIVE_FIELDS),
+        'filters': {'product_id': 'product_id', 'types': 'transaction_type__in',
+                    'since': 'created_at__gte', 'until': 'created_at__lte'},
+    },
+}
+
+
+def _field(model, path: str) -> models.Field:
+    *relations, name = path.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} no es serializable')
+
+
+# ============================================
+# CODIFICACIÓN
+# ============================================
+
+def _blocks(rows: Iterable[tuple]) -> Iterator[List[tuple]]:
+    rows = iter(rows)
+    while True:
+        block = list(islice(rows, ENCODE_ROWS))
+        if not block:
+            return
+        yield block
+
+
+def _csv_chunks(spec: Dict, rows: Iterable[tuple]) -> Iterator[bytes]:
+    # csv escribe None como vacío y UUID/Decimal con str(); solo fechas y
+    # booleanos necesitan conversión (ISO 8601 y true/false)
+    dates, flags = [], []
+    for index, (_, path) in enumerate(spec['columns']):
+        field = _field(spec['model'], path)
+        if isinstance(field, models.DateTimeField):
+            dates.append(index)
+        elif isinstance(field, models.BooleanField):
+            flags.append(index)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in spec['columns']])
+    for block in _blocks(rows):
+        if dates or flags:
+            for i, row in enumerate(block):
+                row = list(row)
+                for index in dates:
+                    if row[index] is not None:
+                        row[index] = row[index].isoformat()
+                for index in flags:
+                    row[index] = 'true' if row[index] else 'false'
+                block[i] = row
+        writer.writerows(block)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _ndjson_chunks(spec: Dict, rows: Iterable[tuple]) -> Iterator[bytes]:
+    names = [name for name, _ in spec['columns']]
+    encoder = json.JSONEncoder(default=_json_default, ensure_ascii=False)
+    for block in _blocks(rows):
+        yield ''.join(encoder.encode(dict(zip(names, row))) + '\n' for row in block).encode()
+
+
+def _gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: cabecera gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# ============================================
+# EXPORTACIÓN
+# ============================================
+
+def export_rows(dataset: str, filters: Optional[Dict] = None, include_archived: bool = False,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[tuple]:
+    """
+    Filas del dataset (tuplas en el orden de sus columnas), leídas por bloques.
+
+    Raises:
+        ValueError: Si el dataset o algún filtro no existe
+    """
+    spec = DATASETS.get(dataset)
+    if spec is None:
+        raise ValueError(f'Dataset no soportado: {dataset} (usar {", ".join(DATASETS)})')
+    if include_archived and dataset != 'transactions':
+        raise ValueError('include_archived solo aplica a transactions')
+    filters = {name: value for name, value in (filters or {}).items() if value not in (None, '', [])}
+    unknown = set(filters) - set(spec['filters'])
+    if unknown:
+        raise ValueError(f'Filtros no soportados para {dataset}: {", ".join(sorted(unknown))}')
+
+    queryset = spec['model'].objects.filter(
+        **{spec['filters'][name]: value for name, value in filters.items()})
+    rows = (queryset.order_by(*spec['order_by'])
+            .values_list(*[path for _, path in spec['columns']])
+            .iterator(chunk_size=chunk_size))
+    if not include_archived:
+        return rows
+    archived = archived_rows(filters.get('since'), filters.get('until'), filters.get('product_id'),
+                             filters.get('types'))
+    return chain(map(itemgetter(*ARCHIVE_FIELDS), archived), rows)
+
+
+def export_stream(dataset: str, fmt: str = 'csv', compress: bool = False,
+                  filters: Optional[Dict] = None, include_archived: bool = False,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[Iterator[bytes], str]:
+    """
+    Archivo de exportación como iterador de bytes, para StreamingHttpResponse.
+
+    La validación ocurre al llamar; la consulta corre a medida que se
+    consume el iterador.
+
+    Args:
+        dataset: 'general', 'regional' o 'transactions'
+        fmt: 'csv' o 'ndjson'
+        compress: Comprimir con gzip
+        filters: general: product_id, category; regional: product_id,
+            branch_id, region_id; transactions: product_id, types, since, until
+        include_archived: transactions: incluir los meses archivados
+        chunk_size: Filas por lectura a la base
+
+    Returns:
+        (iterador de bytes, content type)
+
+    Raises:
+        ValueError: Si el formato, el dataset o algún filtro no es válido
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Formato no soportado: {fmt} (usar {", ".join(FORMATS)})')
+    rows = export_rows(dataset, filters, include_archived=include_archived, chunk_size=chunk_size)
+    encode = _csv_chunks if fmt == 'csv' else _ndjson_chunks
+    chunks = encode(DATASETS[dataset], rows)
+    if compress:
+        return _gzip_chunks(chunks), CONTENT_TYPES['gzip']
+    return chunks, CONTENT_TYPES[fmt]
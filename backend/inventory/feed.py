@@ -0,0 +1,165 @@
+# backend/inventory/feed.py
+"""
+Feed de InventoryTransaction paginado por cursor (keyset).
+
+Con OFFSET la base recorre y descarta todas las filas anteriores a la
+página, así que cada página es más lenta que la anterior. Aquí el orden es
+(created_at DESC, id DESC) y el cursor guarda la última fila entregada;
+la página siguiente empieza con un rango sobre created_at:
+
+    created_at <= c AND (created_at < c OR id < i)
+
+El `created_at <= c` redundante deja el límite explícito para que la base
+entre por el índice (created_at) o (product, created_at) cuando se filtra
+por producto, y el costo de una página no depende de qué tan profundo se
+pagine.
+
+Con `include_archived`, cuando la tabla se agota la página sigue con los
+meses archivados (inventory/archive.py), con el mismo cursor.
+"""
+
+import base64
+import binascii
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .archive import archived_rows, archived_until
+from .models import InventoryTransaction, Product
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+FEED_FIELDS = (
+    'id', 'created_at', 'transaction_type', 'product_id', 'product__product_code',
+    'product__product_name', 'from_location_type', 'from_location_id', 'to_location_type',
+    'to_location_id', 'quantity', 'notes', 'reference_id', 'created_by_id',
+)
+
+
+class InvalidCursor(ValueError):
+    """Cursor que no fue generado por encode_cursor."""
+
+
+def encode_cursor(created_at: datetime, pk) -> str:
+    raw = f'{created_at.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created_at, pk = raw.split('|')
+        parsed = parse_datetime(created_at)
+        if parsed is None:
+            raise ValueError(created_at)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed, uuid.UUID(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(f'Cursor inválido: {token}')
+
+
+def _serialize(row: Dict) -> Dict:
+    return {
+        'id': str(row['id']),
+        'created_at': row['created_at'].isoformat(),
+        'transaction_type': row['transaction_type'],
+        'product_id': str(row['product_id']),
+        'product_code': row['product__product_code'],
+        'product_name': row['product__product_name'],
+        'from_location_type': row['from_location_type'],
+        'from_location_id': str(row['from_location_id']) if row['from_location_id'] else None,
+        'to_location_type': row['to_location_type'],
+        'to_location_id': str(row['to_location_id']) if row['to_location_id'] else None,
+        'quantity': row['quantity'],
+        'notes': row['notes'],
+        'reference_id': str(row['reference_id']) if row['reference_id'] else None,
+        'created_by': row['created_by_id'],
+    }
+
+
+def _archived_page(size: int, cursor: Optional[Tuple[datetime, uuid.UUID]] = None,
+                   since: Optional[datetime] = None, until: Optional[datetime] = None,
+                   **filters) -> List[Dict]:
+    """Hasta `size` filas archivadas anteriores al cursor, con las columnas del feed."""
+    if cursor is not None and (until is None or cursor[0] < until):
+        until = cursor[0]
+    rows = []
+    for row in archived_rows(since=since, until=until, descending=True, **filters):
+        if cursor is not None and (row['created_at'], row['id']) >= cursor:
+            continue
+        rows.append(row)
+        if len(rows) == size:
+            break
+    products = {pk: (code, name) for pk, code, name in Product.objects.filter(
+        pk__in={row['product_id'] for row in rows}).values_list('pk', 'product_code', 'product_name')}
+    for row in rows:
+        row['product__product_code'], row['product__product_name'] = \
+            products.get(row['product_id'], (None, None))
+    return rows
+
+
+def transaction_feed(cursor: Optional[str] = None, limit: int = DEFAULT_LIMIT,
+                     product_id=None, transaction_types=None, location_type: Optional[str] = None,
+                     location_id=None, since: Optional[datetime] = None,
+                     until: Optional[datetime] = None, include_archived: bool = False) -> Dict:
+    """
+    Una página del feed de transacciones, de la más reciente a la más antigua.
+
+    Args:
+        cursor: `next_cursor` de la página anterior (None = primera página)
+        limit: Filas por página (máximo MAX_LIMIT)
+        product_id: Solo este producto
+        transaction_types: Lista de tipos ('sale', 'transfer', ...)
+        location_type / location_id: Transacciones con origen o destino en
+            esta ubicación (tipo e id del mismo lado)
+        since / until: Rango de created_at (inclusive)
+        include_archived: Seguir con los meses archivados al agotar la tabla
+
+    Returns:
+        {'results', 'next_cursor', 'has_more'}
+
+    Raises:
+        InvalidCursor: Si el cursor no se puede decodificar
+    """
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    transactions = InventoryTransaction.objects.all()
+    if product_id:
+        transactions = transactions.filter(product_id=product_id)
+    if transaction_types:
+        transactions = transactions.filter(transaction_type__in=transaction_types)
+    if location_type or location_id:
+        # Tipo e id deben coincidir en el mismo lado (origen o destino)
+        sides = Q()
+        for side in ('from', 'to'):
+            match = {f'{side}_location_type': location_type, f'{side}_location_id': location_id}
+            sides |= Q(**{field: value for field, value in match.items() if value})
+        transactions = transactions.filter(sides)
+    if since:
+        transactions = transactions.filter(created_at__gte=since)
+    if until:
+        transactions = transactions.filter(created_at__lte=until)
+    created_at = pk = None
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        transactions = transactions.filter(
+            Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__lt=pk)))
+
+    rows = list(transactions.order_by('-created_at', '-id').values(*FEED_FIELDS)[:limit + 1])
+    if include_archived and len(rows) <= limit and archived_until() is not None:
+        rows += _archived_page(limit + 1 - len(rows), cursor=(created_at, pk) if cursor else None,
+                               product_id=product_id, transaction_types=transaction_types,
+                               location_type=location_type, location_id=location_id,
+                               since=since, until=until)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'results': [_serialize(row) for row in rows],
+        'next_cursor': encode_cursor(rows[-1]['created_at'], rows[-1]['id']) if has_more else None,
+        'has_more': has_more,
+    }
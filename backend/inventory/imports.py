@@ -0,0 +1,426 @@
+# backend/inventory/imports.py
+"""
+Importación masiva de productos y stock desde CSV o NDJSON.
+
+El archivo se lee en streaming (csv.DictReader o una línea JSON a la vez)
+y se escribe cada `batch_size` filas, cada lote en su propia transacción.
+En memoria solo quedan el lote actual, los mapas product_code -> id y
+branch_code -> (id, región) y a lo sumo MAX_ERRORS errores, así que el
+consumo no depende del tamaño del archivo.
+
+Columnas (una fila puede traer producto, stock o ambos):
+- product_code: obligatoria
+- product_name, category, requires_refrigeration, min_temperature,
+  max_temperature, special_conditions: crean o actualizan el producto
+  (product_name es obligatorio para productos nuevos)
+- quantity sin branch_code, min_stock, max_stock, location, notes:
+  inventario general
+- branch_code + quantity: inventario de la sucursal
+
+Las columnas vacías o ausentes conservan el valor actual. Las cantidades
+fijan el stock (no suman); la diferencia con el stock anterior se aplica
+al resumen como un ajuste, que además queda registrado como transacción
+en modo ledger. Una fila inválida se reporta con su número de línea y se
+salta sin detener la carga.
+"""
+
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from django.db import DatabaseError, transaction
+
+from .ledger import adjustment_transactions, ledger_enabled
+from .models import Product, Branch, GeneralInventory, RegionalInventory, InventoryTransaction
+from .summary import apply_transactions, refresh_product_status
+
+DEFAULT_BATCH_SIZE = 2000
+MAX_ERRORS = 1000
+FORMATS = ('csv', 'ndjson')
+
+PRODUCT_FIELDS = ('product_name', 'category', 'requires_refrigeration', 'min_temperature',
+                  'max_temperature', 'special_conditions')
+GENERAL_FIELDS = ('min_stock', 'max_stock', 'location', 'notes')
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y', 'si', 'sí', 's'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n'}
+
+
+def detect_format(name: str) -> Optional[str]:
+    """'csv' o 'ndjson' según la extensión (también .jsonl y .gz)."""
+    name = name.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return None
+
+
+# ============================================
+# LECTURA
+# ============================================
+
+def iter_records(stream, fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Leer registros de un archivo abierto (binario o texto), uno a la vez.
+
+    Returns:
+        Iterador de (línea, registro, error); registro es None si la línea
+        no se pudo leer
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Formato no soportado: {fmt} (usar {", ".join(FORMATS)})')
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        if not reader.fieldnames or 'product_code' not in reader.fieldnames:
+            raise ValueError('El CSV debe tener encabezado con la columna product_code')
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, None, f'JSON inválido: {e.msg}'
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, 'Cada línea debe ser un objeto JSON'
+            continue
+        yield line_number, record, None
+
+
+def _value(record: Dict, field: str):
+    """Valor de la columna, None si está vacía o no existe."""
+    value = record.get(field)
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _int(value, field: str, minimum: Optional[int] = None) -> int:
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{field} inválido: {value!r}')
+    if minimum is not None and number < minimum:
+        raise ValueError(f'{field} no puede ser menor que {minimum}')
+    return number
+
+
+def _bool(value, field: str) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f'{field} inválido: {value!r}')
+
+
+def _decimal(value, field: str) -> Decimal:
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f'{field} inválido: {value!r}')
+
+
+def parse_record(record: Dict) -> Dict:
+    """
+    Validar y tipar un registro.
+
+    Returns:
+        {'product_code', 'product': {...}, 'branch_code', 'stock': {...}};
+        'product' y 'stock' solo traen las columnas con valor
+
+    Raises:
+        ValueError: Si falta product_code o algún valor no es válido
+    """
+    code = _value(record, 'product_code')
+    if code is None:
+        raise ValueError('Falta product_code')
+    product = {}
+    for field in PRODUCT_FIELDS:
+        value = _value(record, field)
+        if value is None:
+            continue
+        if field == 'requires_refrigeration':
+            value = _bool(value, field)
+        elif field in ('min_temperature', 'max_temperature'):
+            value = _decimal(value, field)
+        else:
+            value = str(value)
+        product[field] = value
+
+    branch_code = _value(record, 'branch_code')
+    stock = {}
+    if _value(record, 'quantity') is not None:
+        stock['quantity'] = _int(_value(record, 'quantity'), 'quantity', minimum=0)
+    if branch_code is None:
+        for field in GENERAL_FIELDS:
+            value = _value(record, field)
+            if value is not None:
+                stock[field] = _int(value, field, 0) if field in ('min_stock', 'max_stock') else str(value)
+    elif 'quantity' not in stock:
+        raise ValueError('branch_code sin quantity')
+    return {'product_code': str(code), 'product': product,
+            'branch_code': str(branch_code) if branch_code else None, 'stock': stock}
+
+
+# ============================================
+# ESCRITURA
+# ============================================
+
+class InventoryImporter:
+    """
+    Escribe registros por lotes con upserts.
+
+    Mantiene en memoria los mapas de códigos a ids (se cargan una vez y se
+    amplían con los productos creados) y los contadores de la carga. En
+    simulación los productos creados se deshacen con su lote: sus códigos
+    van a `simulated` y no al mapa, y el stock de lotes posteriores para
+    ellos se valida pero no se escribe.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, user=None, dry_run: bool = False):
+        self.batch_size = batch_size
+        self.user = user
+        self.dry_run = dry_run
+        self.ledger = ledger_enabled()
+        self.products: Dict[str, str] = {
+            code: str(pk) for code, pk in Product.objects.values_list('product_code', 'pk').iterator()}
+        self.branches: Dict[str, Tuple[str, str]] = {
+            code: (str(pk), str(region)) for code, pk, region in
+            Branch.objects.values_list('branch_code', 'pk', 'region_id')}
+        self.simulated: Set[str] = set()
+        self.stats = {'rows': 0, 'batches': 0, 'products_created': 0, 'products_updated': 0,
+                      'general': 0, 'regional': 0, 'adjustments': 0, 'error_count': 0}
+        self.errors: List[Dict] = []
+
+    def error(self, line: int, message: str):
+        self.stats['error_count'] += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def run(self, records: Iterable[Tuple[int, Optional[Dict], Optional[str]]],
+            progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Procesar todos los registros; `progress(stats)` se llama tras cada lote."""
+        batch: List[Tuple[int, Dict]] = []
+        for line, record, error in records:
+            self.stats['rows'] += 1
+            if error:
+                self.error(line, error)
+                continue
+            try:
+                batch.append((line, parse_record(record)))
+            except ValueError as e:
+                self.error(line, str(e))
+                continue
+            if len(batch) == self.batch_size:
+                self.write_batch(batch)
+                batch = []
+                if progress:
+                    progress(self.stats)
+        if batch:
+            self.write_batch(batch)
+            if progress:
+                progress(self.stats)
+        return self.stats
+
+    def write_batch(self, batch: List[Tuple[int, Dict]]):
+        """Escribir un lote en una transacción; si la base lo rechaza se reporta entero."""
+        self.stats['batches'] += 1
+        try:
+            with transaction.atomic():
+                created = self._write_products(batch)
+                self._write_stock(batch, created)
+                if self.dry_run:
+                    transaction.set_rollback(True)
+        except DatabaseError as e:
+            self.error(batch[0][0], f'Lote de las líneas {batch[0][0]}-{batch[-1][0]} '
+                                    f'no aplicado: {e}')
+            return
+        if self.dry_run:
+            self.simulated.update(created)
+        else:
+            self.products.update(created)
+
+    def _write_products(self, batch: List[Tuple[int, Dict]]) -> Dict[str, str]:
+        """Upsert de los productos con columnas; devuelve los creados (código -> id)."""
+        changes: Dict[str, Tuple[int, Dict]] = {}
+        for line, row in batch:
+            if row['product']:
+                current = changes.get(row['product_code'], (line, {}))[1]
+                changes[row['product_code']] = (line, {**current, **row['product']})
+        if not changes:
+            return {}
+
+        existing = {p.product_code: p for p in Product.objects.filter(product_code__in=changes)}
+        products, created = [], {}
+        for code, (line, fields) in changes.items():
+            product = existing.get(code)
+            if product is None:
+                if 'product_name' not in fields:
+                    self.error(line, f'Producto nuevo {code} sin product_name')
+                    continue
+                product = Product(product_code=code, category='')
+                created[code] = str(product.pk)
+            for field, value in fields.items():
+                setattr(product, field, value)
+            products.append(product)
+        Product.objects.bulk_create(
+            products, update_conflicts=True, unique_fields=['product_code'],
+            update_fields=list(PRODUCT_FIELDS), batch_size=1000)
+        self.stats['products_created'] += len(created)
+        self.stats['products_updated'] += len(products) - len(created)
+        if created:
+            # Si otro proceso creó el mismo código, el upsert conserva su id
+            created = {code: str(pk) for code, pk in Product.objects
+                       .filter(product_code__in=created).values_list('product_code', 'pk')}
+        return created
+
+    def _write_stock(self, batch: List[Tuple[int, Dict]], created: Dict[str, str]):
+        general: Dict[str, Dict] = {}
+        regional: Dict[Tuple[str, str], Tuple[int, str, int]] = {}
+        for line, row in batch:
+            if not row['stock']:
+                continue
+            product_id = self.products.get(row['product_code']) or created.get(row['product_code'])
+            if product_id is None and row['product_code'] not in self.simulated:
+                self.error(line, f'Producto inexistente: {row["product_code"]}')
+                continue
+            if row['branch_code'] is not None and row['branch_code'] not in self.branches:
+                self.error(line, f'Sucursal inexistente: {row["branch_code"]}')
+            elif product_id is None:
+                continue  # Producto creado en un lote simulado anterior
+            elif row['branch_code'] is None:
+                general[product_id] = {**general.get(product_id, {}), **row['stock']}
+            else:
+                regional[(product_id, self.branches[row['branch_code']][0])] = \
+                    (line, row['product_code'], row['stock']['quantity'])
+
+        diffs, thresholds = self._write_general(general)
+        diffs.update(self._write_regional(regional))
+        adjustments = adjustment_transactions(diffs, notes='Importación de inventario', user=self.user)
+        if self.ledger:
+            InventoryTransaction.objects.bulk_create(adjustments, batch_size=1000)
+        # Sin modo ledger los ajustes no se guardan, pero el resumen debe
+        # reflejar el cambio de cantidades igual
+        apply_transactions(adjustments)
+        if thresholds:
+            refresh_product_status(thresholds)
+        self.stats['adjustments'] += len(adjustments)
+
+    def _write_general(self, rows: Dict[str, Dict]) -> Tuple[Dict, List[str]]:
+        """
+        Upsert del inventario general.
+
+        Returns:
+            (diferencias de cantidad, productos cuyo min/max cambió sin que
+            cambie la cantidad: apply_transactions no recalcula sus banderas)
+        """
+        if not rows:
+            return {}, []
+        current = {str(g.pk): g for g in GeneralInventory.objects.select_for_update()
+                   .filter(pk__in=rows).order_by('pk')}
+        objects, diffs, thresholds = [], {}, []
+        for product_id, fields in rows.items():
+            existing = current.get(product_id)
+            values = {'quantity': existing.quantity if existing else 0, 'notes': ''}
+            if existing:
+                values.update({field: getattr(existing, field) for field in GENERAL_FIELDS})
+            values.update(fields)
+            objects.append(GeneralInventory(product_id=product_id, **values))
+            diff = values['quantity'] - (existing.quantity if existing else 0)
+            diffs[(product_id, 'general', '')] = diff
+            limits = (existing.min_stock, existing.max_stock) if existing else (None, None)
+            if not diff and limits != (values.get('min_stock'), values.get('max_stock')):
+                thresholds.append(product_id)
+        GeneralInventory.objects.bulk_create(
+            objects, update_conflicts=True, unique_fields=['product'],
+            update_fields=['quantity', *GENERAL_FIELDS, 'last_updated'], batch_size=1000)
+        self.stats['general'] += len(objects)
+        return diffs, thresholds
+
+    def _write_regional(self, rows: Dict[Tuple[str, str], Tuple[int, str, int]]) -> Dict:
+        """Upsert por sucursal; `rows`: (producto, sucursal) -> (línea, código, cantidad)."""
+        if not rows:
+            return {}
+        product_ids = {product_id for product_id, _ in rows}
+        current = {(str(product_id), str(branch_id)): quantity for product_id, branch_id, quantity in
+                   RegionalInventory.objects.select_for_update()
+                   .filter(product_id__in=product_ids, branch_id__in={b for _, b in rows})
+                   .order_by('product_id', 'branch_id')
+                   .values_list('product_id', 'branch_id', 'quantity')}
+        products = {str(p.pk): p for p in Product.objects.filter(pk__in=product_ids).only(
+            'pk', 'product_code', 'product_name', 'min_temperature', 'max_temperature',
+            'special_conditions')}
+        regions = {branch_id: region_id for branch_id, region_id in self.branches.values()}
+
+        # En conflicto solo se actualiza la cantidad; el resto aplica a filas nuevas
+        objects, diffs = [], {}
+        for (product_id, branch_id), (line, code, quantity) in rows.items():
+            product = products.get(product_id)
+            if product is None:
+                # Borrado por otro proceso después de cargar el mapa de códigos
+                self.error(line, f'Producto inexistente: {code}')
+                continue
+            objects.append(RegionalInventory(
+                product_id=product_id, branch_id=branch_id, region_id=regions[branch_id],
+                product_sku=product.product_code, product_name=product.product_name,
+                quantity=quantity, min_temperature=product.min_temperature,
+                max_temperature=product.max_temperature,
+                special_conditions=product.special_conditions,
+            ))
+            diffs[(product_id, 'branch', branch_id)] = quantity - current.get((product_id, branch_id), 0)
+        RegionalInventory.objects.bulk_create(
+            objects, update_conflicts=True, unique_fields=['product', 'branch'],
+            update_fields=['quantity', 'last_updated'], batch_size=1000)
+        self.stats['regional'] += len(objects)
+        return diffs
+
+
+def import_inventory(stream, fmt: str, batch_size: int = DEFAULT_BATCH_SIZE, user=None,
+                     dry_run: bool = False, progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Importar productos y stock desde un archivo CSV o NDJSON abierto.
+
+    Args:
+        stream: Archivo binario o de texto (se lee en streaming)
+        fmt: 'csv' o 'ndjson'
+        batch_size: Filas por lote (cada lote es una transacción)
+        user: Usuario de los ajustes en modo ledger (opcional)
+        dry_run: Validar y escribir cada lote pero deshacerlo
+        progress: Función llamada con los contadores tras cada lote
+
+    Returns:
+        {'success', 'message', 'data': {'rows', 'batches', 'products_created',
+        'products_updated', 'general', 'regional', 'adjustments',
+        'error_count', 'errors': [{'line', 'error'}]}}
+
+    Raises:
+        ValueError: Si el formato o batch_size no son válidos o el CSV no
+            tiene encabezado
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size debe ser mayor que cero')
+    importer = InventoryImporter(batch_size=batch_size, user=user, dry_run=dry_run)
+    stats = importer.run(iter_records(stream, fmt), progress=progress)
+    return {
+        'success': stats['error_count'] == 0,
+        'message': f'{"✅" if stats["error_count"] == 0 else "⚠️"} {stats["rows"]} filas procesadas, '
+                   f'{stats["error_count"]} errores'
+                   + (' (simulación)' if dry_run else ''),
+        # Los errores de lectura se registran antes que los del lote que los contiene
+        'data': {**stats, 'errors': sorted(importer.errors, key=lambda error: error['line'])},
+    }
@@ -0,0 +1,328 @@
+# backend/inventory/ledger.py
+"""
+Stock calculado desde el ledger (InventoryTransaction).
+
+El saldo de una ubicación es lo que entró (`to_location`) menos lo que
+salió (`from_location`). Ubicaciones con stock:
+- ('general', ''): inventario general del producto
+- ('branch', <id sucursal>): 'regional' y 'branch' son la misma ubicación
+Proveedor, cliente, pérdida y externo no tienen saldo.
+
+Para no recorrer todo el historial, `create_checkpoint()` guarda cada
+cierto tiempo el saldo de todas las ubicaciones (StockCheckpoint), y se
+calcula a partir del corte anterior más el tramo nuevo. `stock_as_of(T)`
+toma el último corte <= T y reaplica solo las transacciones de
+(corte, T]: dos consultas agrupadas sobre el índice (product, created_at)
+o created_at, cuyo costo depende del intervalo entre cortes.
+
+Con INVENTORY_LEDGER_CONFIG['enabled'] los cambios absolutos de cantidad
+(create/update_general_inventory_batch) se registran como ajustes, y
+`reconcile()` compara la proyección (GeneralInventory/RegionalInventory)
+contra el ledger.
+
+Los meses archivados (inventory/archive.py) se leen del archivo solo si
+el tramo a reaplicar empieza antes de la frontera del archivo.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .archive import archived_rows, archived_until
+from .models import (GeneralInventory, RegionalInventory, InventoryTransaction,
+                     StockCheckpoint, StockCheckpointBalance)
+from .stock import ensure_branch_rows
+from .summary import rebuild_summary
+
+DEFAULT_CONFIG = {
+    'enabled': False,
+    'settle_seconds': 300,
+}
+
+# Tipo de ubicación del ledger para cada LOCATION_TYPE con stock
+LEDGER_LOCATIONS = {'general': 'general', 'regional': 'branch', 'branch': 'branch'}
+
+# (product_id, location_type, location_key)
+LocationKey = Tuple[str, str, str]
+
+
+def ledger_config() -> Dict:
+    """INVENTORY_LEDGER_CONFIG de settings con valores por defecto."""
+    return {**DEFAULT_CONFIG, **getattr(settings, 'INVENTORY_LEDGER_CONFIG', {})}
+
+
+def ledger_enabled() -> bool:
+    return bool(ledger_config()['enabled'])
+
+
+# ============================================
+# REPLAY
+# ============================================
+
+def ledger_deltas(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  product_id=None, location_type: Optional[str] = None,
+                  location_key: Optional[str] = None) -> Dict[LocationKey, int]:
+    """
+    Movimiento neto por ubicación de las transacciones con start < created_at <= end.
+
+    Args:
+        start / end: Límites del tramo (None = sin límite)
+        product_id: Solo este producto (opcional)
+        location_type / location_key: Solo esta ubicación o tipo (opcional)
+    """
+    transactions = InventoryTransaction.objects.order_by()
+    if start is not None:
+        transactions = transactions.filter(created_at__gt=start)
+    if end is not None:
+        transactions = transactions.filter(created_at__lte=end)
+    if product_id:
+        transactions = transactions.filter(product_id=product_id)
+
+    deltas: Dict[LocationKey, int] = defaultdict(int)
+    for side, sign in (('from', -1), ('to', 1)):
+        types = [t for t, ledger_type in LEDGER_LOCATIONS.items()
+                 if location_type in (None, ledger_type)]
+        side_transactions = transactions.filter(**{f'{side}_location_type__in': types})
+        if location_key:
+            side_transactions = side_transactions.filter(**{f'{side}_location_id': location_key})
+        rows = (side_transactions
+                .values('product_id', f'{side}_location_type', f'{side}_location_id')
+                .annotate(total=Sum('quantity'))
+                .values_list('product_id', f'{side}_location_type', f'{side}_location_id', 'total'))
+        for product, raw_type, raw_id, total in rows:
+            ledger_type = LEDGER_LOCATIONS[raw_type]
+            key = str(raw_id) if ledger_type == 'branch' and raw_id else ''
+            if ledger_type == 'branch' and not key:
+                continue  # Transacción de sucursal sin sucursal: no tiene ubicación
+            deltas[(str(product), ledger_type, key)] += sign * total
+
+    boundary = archived_until()
+    if boundary is not None and (start is None or start < boundary):
+        for row in archived_rows(since=start, until=end, product_id=product_id):
+            if start is not None and row['created_at'] <= start:
+                continue
+            for side, sign in (('from', -1), ('to', 1)):
+                ledger_type = LEDGER_LOCATIONS.get(row[f'{side}_location_type'])
+                raw_id = row[f'{side}_location_id']
+                if ledger_type is None or location_type not in (None, ledger_type):
+                    continue
+                if location_key and str(raw_id) != location_key:
+                    continue
+                key = str(raw_id) if ledger_type == 'branch' and raw_id else ''
+                if ledger_type == 'branch' and not key:
+                    continue
+                deltas[(str(row['product_id']), ledger_type, key)] += sign * row['quantity']
+    return deltas
+
+
+def latest_checkpoint(as_of: Optional[datetime] = None) -> Optional[StockCheckpoint]:
+    """Último corte con as_of <= `as_of` (el más reciente si es None)."""
+    checkpoints = StockCheckpoint.objects.order_by('-as_of')
+    if as_of is not None:
+        checkpoints = checkpoints.filter(as_of__lte=as_of)
+    return checkpoints.first()
+
+
+def stock_as_of(as_of: Optional[datetime] = None, product_id=None,
+                location_type: Optional[str] = None, location_key: Optional[str] = None
+                ) -> Tuple[Dict[LocationKey, int], Optional[StockCheckpoint]]:
+    """
+    Saldos a una fecha: último corte <= as_of + transacciones posteriores.
+
+    Args:
+        as_of: Fecha de la consulta (None = ahora, incluyendo todo el ledger)
+        product_id / location_type / location_key: Filtros opcionales
+
+    Returns:
+        ({(product_id, location_type, location_key): cantidad}, corte usado);
+        solo saldos distintos de cero
+    """
+    checkpoint = latest_checkpoint(as_of)
+    balances: Dict[LocationKey, int] = defaultdict(int)
+    if checkpoint is not None:
+        rows = checkpoint.balances.all()
+        if product_id:
+            rows = rows.filter(product_id=product_id)
+        if location_type:
+            rows = rows.filter(location_type=location_type)
+        if location_key is not None:
+            rows = rows.filter(location_key=location_key)
+        for product, row_type, row_key, quantity in rows.values_list(
+                'product_id', 'location_type', 'location_key', 'quantity').iterator():
+            balances[(str(product), row_type, row_key)] = quantity
+
+    tail = ledger_deltas(start=checkpoint.as_of if checkpoint else None, end=as_of,
+                         product_id=product_id, location_type=location_type,
+                         location_key=location_key)
+    for key, delta in tail.items():
+        balances[key] += delta
+    return {key: quantity for key, quantity in balances.items() if quantity}, checkpoint
+
+
+def balance_as_of(product_id, location_type: str = 'general', location_key: str = '',
+                  as_of: Optional[datetime] = None) -> int:
+    """Saldo de una sola ubicación a una fecha."""
+    balances, _ = stock_as_of(as_of, product_id=product_id, location_type=location_type,
+                              location_key=str(location_key or ''))
+    return balances.get((str(product_id), location_type, str(location_key or '')), 0)
+
+
+# ============================================
+# CORTES
+# ============================================
+
+@transaction.atomic
+def create_checkpoint(as_of: Optional[datetime] = None) -> Optional[StockCheckpoint]:
+    """
+    Guardar los saldos de todas las ubicaciones a `as_of`.
+
+    Se calcula desde el corte anterior más el tramo, no desde el inicio.
+    Por defecto `as_of` es ahora menos `settle_seconds`: una transacción
+    que confirma después de un corte con created_at anterior a él quedaría
+    fuera de todos los cortes.
+
+    Returns:
+        El corte creado, o None si no hay transacciones nuevas o `as_of`
+        no es posterior al último corte
+    """
+    if as_of is None:
+        as_of = timezone.now() - timedelta(seconds=ledger_config()['settle_seconds'])
+    previous = StockCheckpoint.objects.select_for_update().order_by('-as_of').first()
+    if previous is not None and as_of <= previous.as_of:
+        return None
+
+    pending = InventoryTransaction.objects.filter(created_at__lte=as_of)
+    if previous is not None:
+        pending = pending.filter(created_at__gt=previous.as_of)
+    count = pending.count()
+    if count == 0 and previous is not None:
+        return None
+
+    balances, _ = stock_as_of(as_of)
+    checkpoint = StockCheckpoint.objects.create(as_of=as_of, transaction_count=count)
+    StockCheckpointBalance.objects.bulk_create([
+        StockCheckpointBalance(checkpoint=checkpoint, product_id=product, location_type=location_type,
+                               location_key=location_key, quantity=quantity)
+        for (product, location_type, location_key), quantity in balances.items()
+    ], batch_size=1000)
+    return checkpoint
+
+
+def prune_checkpoints(keep: int) -> int:
+    """
+    Borrar todos los cortes menos los `keep` más recientes.
+
+    Las consultas anteriores al corte más antiguo que quede reaplican el
+    ledger desde el inicio.
+
+    Returns:
+        Cortes borrados
+    """
+    stale = list(StockCheckpoint.objects.order_by('-as_of').values_list('pk', flat=True)[keep:])
+    if not stale:
+        return 0
+    StockCheckpoint.objects.filter(pk__in=stale).delete()
+    return len(stale)
+
+
+# ============================================
+# PROYECCIÓN
+# ============================================
+
+def projected_stock() -> Dict[LocationKey, int]:
+    """Saldos actuales según GeneralInventory y RegionalInventory."""
+    stock: Dict[LocationKey, int] = {}
+    for product, quantity in GeneralInventory.objects.exclude(quantity=0).values_list(
+            'pk', 'quantity').iterator():
+        stock[(str(product), 'general', '')] = quantity
+    for product, branch, quantity in RegionalInventory.objects.exclude(quantity=0).values_list(
+            'product_id', 'branch_id', 'quantity').iterator():
+        stock[(str(product), 'branch', str(branch))] = quantity
+    return stock
+
+
+def adjustment_transactions(diffs: Dict[LocationKey, int], notes: str, user=None
+                            ) -> List[InventoryTransaction]:
+    """
+    Transacciones de ajuste que mueven `diff` unidades entre 'external' y
+    cada ubicación (sin guardar).
+    """
+    transactions = []
+    for (product, location_type, location_key), diff in diffs.items():
+        if not diff:
+            continue
+        location = (location_type, location_key or None)
+        external = ('external', None)
+        source, target = (external, location) if diff > 0 else (location, external)
+        transactions.append(InventoryTransaction(
+            transaction_type='adjustment', product_id=product,
+            from_location_type=source[0], from_location_id=source[1],
+            to_location_type=target[0], to_location_id=target[1],
+            quantity=abs(diff), notes=notes, created_by=user,
+        ))
+    return transactions
+
+
+@transaction.atomic
+def reconcile(fix: bool = False, adopt: bool = False) -> Dict:
+    """
+    Comparar la proyección contra el ledger completo.
+
+    Ejecutar sin movimientos en curso: un movimiento que confirma durante
+    la comparación aparece como diferencia.
+
+    Args:
+        fix: Corregir la proyección con los saldos del ledger y reconstruir
+            el resumen (el ledger manda)
+        adopt: Registrar ajustes para que el ledger coincida con la
+            proyección (para adoptar el modo ledger en una base existente)
+
+    Returns:
+        {'drifts': [{'product_id', 'location_type', 'location_key',
+        'ledger', 'stock'}], 'fixed', 'adjustments'}
+    """
+    if fix and adopt:
+        raise ValueError('fix y adopt son excluyentes')
+    ledger, _ = stock_as_of()
+    stock = projected_stock()
+    drifts = [
+        {'product_id': key[0], 'location_type': key[1], 'location_key': key[2],
+         'ledger': ledger.get(key, 0), 'stock': stock.get(key, 0)}
+        for key in sorted(set(ledger) | set(stock)) if ledger.get(key, 0) != stock.get(key, 0)
+    ]
+    result = {'drifts': drifts, 'fixed': 0, 'adjustments': 0}
+    if not drifts:
+        return result
+
+    if adopt:
+        # La proyección no cambia, así que el resumen tampoco: sin apply_transactions
+        adjustments = adjustment_transactions(
+            {(d['product_id'], d['location_type'], d['location_key']): d['stock'] - d['ledger']
+             for d in drifts}, notes='Adopción del ledger')
+        InventoryTransaction.objects.bulk_create(adjustments, batch_size=1000)
+        result['adjustments'] = len(adjustments)
+    elif fix:
+        general = [GeneralInventory(product_id=d['product_id'], quantity=d['ledger'])
+                   for d in drifts if d['location_type'] == 'general']
+        if general:
+            GeneralInventory.objects.bulk_create(
+                general, update_conflicts=True, unique_fields=['product'],
+                update_fields=['quantity', 'last_updated'], batch_size=1000)
+        branches = {(d['product_id'], d['location_key']): d['ledger']
+                    for d in drifts if d['location_type'] == 'branch'}
+        if branches:
+            ensure_branch_rows(list(branches))
+            rows = list(RegionalInventory.objects.filter(
+                product_id__in={p for p, _ in branches}, branch_id__in={b for _, b in branches}))
+            rows = [row for row in rows if (str(row.product_id), str(row.branch_id)) in branches]
+            for row in rows:
+                row.quantity = branches[(str(row.product_id), str(row.branch_id))]
+            RegionalInventory.objects.bulk_update(rows, ['quantity'], batch_size=1000)
+        rebuild_summary()
+        result['fixed'] = len(drifts)
+    return result
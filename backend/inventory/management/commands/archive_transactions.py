@@ -0,0 +1,51 @@
+# backend/inventory/management/commands/archive_transactions.py
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventory.archive import archive_config, archive_month, ensure_partitions, month_start
+from inventory.models import InventoryTransaction
+
+
+class Command(BaseCommand):
+    help = ('Crea las particiones mensuales siguientes y archiva los meses cerrados más antiguos '
+            'de inventory_transactions (programar una vez al mes)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-months', type=int,
+                            help='Meses cerrados que se quedan en la tabla (por defecto la configuración)')
+        parser.add_argument('--directory', help='Carpeta de los archivos Parquet')
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar qué meses se archivarían')
+
+    def handle(self, *args, **options):
+        for name in ensure_partitions():
+            self.stdout.write(f"🧱 Partición creada: {name}")
+
+        keep = archive_config()['keep_months'] if options['keep_months'] is None else options['keep_months']
+        cutoff = month_start(timezone.localtime(), -keep)
+        oldest = InventoryTransaction.objects.order_by('created_at').values_list('created_at', flat=True).first()
+        months = []
+        month = month_start(oldest) if oldest else cutoff
+        while month < cutoff:
+            months.append(month)
+            month = month_start(month, 1)
+        if not months:
+            self.stdout.write(f"ℹ️  Nada que archivar antes de {cutoff:%Y-%m}")
+            return
+
+        for month in months:
+            if options['dry_run']:
+                count = InventoryTransaction.objects.filter(
+                    created_at__gte=month, created_at__lt=month_start(month, 1)).count()
+                self.stdout.write(f"📦 {month:%Y-%m}: {count} transacciones")
+                continue
+            start = time.perf_counter()
+            try:
+                result = archive_month(month, directory=options['directory'])
+            except (ValueError, ImproperlyConfigured) as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {month:%Y-%m}: {result['rows']} transacciones -> {result['path']} "
+                f"({result['size_bytes'] / 1024:,.0f} KB, {time.perf_counter() - start:.2f} s)"))
@@ -0,0 +1,40 @@
+# backend/inventory/management/commands/create_stock_checkpoint.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from inventory.ledger import create_checkpoint, prune_checkpoints
+
+
+class Command(BaseCommand):
+    help = 'Guarda un corte de saldos del ledger de inventario (programar de forma periódica)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help='Fecha del corte en ISO 8601 (por defecto ahora - settle_seconds)')
+        parser.add_argument('--keep', type=int, help='Conservar solo los N cortes más recientes')
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['as_of']:
+            as_of = parse_datetime(options['as_of'])
+            if as_of is None:
+                raise CommandError(f"Fecha inválida: {options['as_of']}")
+            if timezone.is_naive(as_of):
+                as_of = timezone.make_aware(as_of)
+
+        start = time.perf_counter()
+        checkpoint = create_checkpoint(as_of)
+        elapsed = time.perf_counter() - start
+        if checkpoint is None:
+            self.stdout.write("ℹ️  Sin transacciones nuevas desde el último corte")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Corte a {checkpoint.as_of.isoformat()} en {elapsed:.2f} s: "
+                f"{checkpoint.balances.count()} saldos, "
+                f"{checkpoint.transaction_count} transacciones nuevas"))
+
+        if options['keep'] is not None:
+            pruned = prune_checkpoints(options['keep'])
+            self.stdout.write(f"🧹 Cortes borrados: {pruned}")
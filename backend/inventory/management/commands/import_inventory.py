@@ -0,0 +1,65 @@
+# backend/inventory/management/commands/import_inventory.py
+import gzip
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.imports import DEFAULT_BATCH_SIZE, FORMATS, detect_format, import_inventory
+
+SHOWN_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = 'Importa productos e inventario (general y por sucursal) desde un CSV o NDJSON, en streaming'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Archivo .csv, .ndjson o .jsonl (opcionalmente .gz); '-' = stdin")
+        parser.add_argument('--format', choices=FORMATS, help='Formato (por defecto según la extensión)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Filas por lote (cada lote es una transacción)')
+        parser.add_argument('--dry-run', action='store_true', help='Validar sin guardar nada')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor que cero')
+        path = options['path']
+        fmt = options['format'] or detect_format(path)
+        if fmt is None:
+            raise CommandError('No se reconoce el formato: usar --format csv|ndjson')
+
+        if path == '-':
+            stream = sys.stdin.buffer
+        else:
+            try:
+                stream = gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+            except OSError as e:
+                raise CommandError(str(e))
+
+        start = time.perf_counter()
+
+        def progress(stats):
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"⏳ {stats['rows']:,} filas ({stats['rows'] / elapsed:,.0f}/s), "
+                              f"{stats['error_count']} errores")
+
+        try:
+            result = import_inventory(stream, fmt, batch_size=options['batch_size'],
+                                      dry_run=options['dry_run'], progress=progress)
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        data = result['data']
+        for error in data['errors'][:SHOWN_ERRORS]:
+            self.stdout.write(self.style.WARNING(f"  Línea {error['line']}: {error['error']}"))
+        if data['error_count'] > SHOWN_ERRORS:
+            self.stdout.write(self.style.WARNING(f"  ... y {data['error_count'] - SHOWN_ERRORS} más"))
+        style = self.style.SUCCESS if result['success'] else self.style.WARNING
+        self.stdout.write(style(
+            f"{result['message']} en {time.perf_counter() - start:.1f} s: "
+            f"{data['products_created']} productos nuevos, {data['products_updated']} actualizados, "
+            f"{data['general']} inventarios generales, {data['regional']} de sucursal, "
+            f"{data['adjustments']} ajustes"))
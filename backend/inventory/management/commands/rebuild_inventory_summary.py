@@ -0,0 +1,23 @@
+# backend/inventory/management/commands/rebuild_inventory_summary.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventory.summary import rebuild_summary, get_summary
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye InventorySummary desde GeneralInventory y RegionalInventory'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        counts = rebuild_summary()
+        elapsed = time.perf_counter() - start
+        totals = get_summary()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Resumen reconstruido en {elapsed:.2f} s: {counts['products']} productos, "
+            f"{counts['branches']} sucursales, {counts['regions']} regiones"))
+        self.stdout.write(
+            f"📦 Stock total: {totals.total_quantity} "
+            f"(general {totals.general_quantity})  •  "
+            f"bajo mínimo: {totals.low_stock_count}  •  sobre máximo: {totals.high_stock_count}")
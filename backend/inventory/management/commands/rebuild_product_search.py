@@ -0,0 +1,22 @@
+# backend/inventory/management/commands/rebuild_product_search.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from inventory.search import install_search_index, search_index_ready
+
+
+class Command(BaseCommand):
+    help = 'Recrea el índice de búsqueda de productos (FTS5 en SQLite, GIN/pg_trgm en PostgreSQL)'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = install_search_index()
+        if not search_index_ready():
+            self.stdout.write(self.style.WARNING(
+                f"⚠️ {connection.vendor} sin índice disponible (SQLite sin FTS5): se busca con icontains"))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Índice de búsqueda ({connection.vendor}) listo en {time.perf_counter() - start:.2f} s: "
+            f"{count} productos"))
@@ -0,0 +1,37 @@
+# backend/inventory/management/commands/reconcile_stock_ledger.py
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.ledger import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Compara GeneralInventory/RegionalInventory contra el ledger de transacciones'
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument('--fix', action='store_true',
+                           help='Corregir las cantidades con los saldos del ledger')
+        group.add_argument('--adopt', action='store_true',
+                           help='Registrar ajustes para que el ledger coincida con las cantidades actuales')
+        parser.add_argument('--limit', type=int, default=20, help='Diferencias a mostrar')
+
+    def handle(self, *args, **options):
+        try:
+            result = reconcile(fix=options['fix'], adopt=options['adopt'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        drifts = result['drifts']
+        if not drifts:
+            self.stdout.write(self.style.SUCCESS("✅ Inventario y ledger coinciden"))
+            return
+
+        self.stdout.write(self.style.WARNING(f"⚠️  {len(drifts)} ubicaciones con diferencias"))
+        for drift in drifts[:options['limit']]:
+            location = drift['location_key'] or 'general'
+            self.stdout.write(f"  • {drift['product_id']} @ {location}: "
+                              f"ledger {drift['ledger']}, inventario {drift['stock']}")
+        if result['fixed']:
+            self.stdout.write(self.style.SUCCESS(f"✅ {result['fixed']} cantidades corregidas"))
+        if result['adjustments']:
+            self.stdout.write(self.style.SUCCESS(f"✅ {result['adjustments']} ajustes registrados"))
@@ -0,0 +1,34 @@
+# backend/inventory/management/commands/refresh_transaction_rollups.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from inventory.rollups import refresh_rollups, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Actualiza los rollups diarios de transacciones desde la última marca'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild-from', help='Recalcular desde este día (YYYY-MM-DD)')
+        parser.add_argument('--rebuild-to', help='Recalcular hasta este día (por defecto = --rebuild-from)')
+        parser.add_argument('--chunk-size', type=int, help='Transacciones por lote')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        result = refresh_rollups(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result['transactions']} transacciones nuevas en {result['chunks']} lotes "
+            f"({time.perf_counter() - start:.2f} s); al día hasta {result['watermark']}"))
+
+        if options['rebuild_from']:
+            first = parse_date(options['rebuild_from'])
+            last = parse_date(options['rebuild_to'] or options['rebuild_from'])
+            if first is None or last is None or last < first:
+                raise CommandError('Rango de días inválido')
+            start = time.perf_counter()
+            rebuilt = rebuild_rollups(first, last)
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {first} a {last} recalculado: {rebuilt['transactions']} transacciones, "
+                f"{rebuilt['rows']} filas ({time.perf_counter() - start:.2f} s)"))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_branch_inventorytransaction_product_region_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('global', 'Global'), ('product', 'Producto'), ('branch', 'Sucursal'), ('region', 'Región')], max_length=10)),
+                ('key', models.CharField(blank=True, default='', max_length=36)),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('general_quantity', models.BigIntegerField(default=0)),
+                ('low_stock_count', models.IntegerField(default=0)),
+                ('high_stock_count', models.IntegerField(default=0)),
+                ('product_count', models.IntegerField(default=0)),
+                ('branch_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Inventario',
+                'verbose_name_plural': 'Resúmenes de Inventario',
+                'db_table': 'inventory_summary',
+                'constraints': [models.UniqueConstraint(fields=('scope', 'key'), name='unique_summary_scope_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_inventory_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateTimeField(unique=True)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Corte de Stock',
+                'verbose_name_plural': 'Cortes de Stock',
+                'db_table': 'stock_checkpoints',
+                'ordering': ['-as_of'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockCheckpointBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location_type', models.CharField(choices=[('general', 'Inventario General'), ('branch', 'Sucursal')], max_length=10)),
+                ('location_key', models.CharField(blank=True, default='', max_length=36)),
+                ('quantity', models.IntegerField()),
+                ('checkpoint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balances', to='inventory.stockcheckpoint')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_checkpoints', to='inventory.product')),
+            ],
+            options={
+                'verbose_name': 'Saldo de Corte',
+                'verbose_name_plural': 'Saldos de Corte',
+                'db_table': 'stock_checkpoint_balances',
+                'indexes': [models.Index(fields=['checkpoint', 'location_key'], name='stock_check_checkpo_6b439c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('checkpoint', 'product', 'location_type', 'location_key'), name='unique_checkpoint_location')],
+            },
+        ),
+    ]
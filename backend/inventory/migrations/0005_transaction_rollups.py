@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('created_at', models.DateTimeField(blank=True, null=True)),
+                ('transaction_id', models.UUIDField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Marca de Rollup',
+                'verbose_name_plural': 'Marcas de Rollup',
+                'db_table': 'rollup_watermarks',
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyTransactionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('branch_key', models.CharField(blank=True, default='', max_length=36)),
+                ('transaction_type', models.CharField(choices=[('initial', 'Stock Inicial'), ('transfer', 'Transferencia'), ('adjustment', 'Ajuste'), ('sale', 'Venta'), ('return', 'Devolución'), ('waste', 'Pérdida')], max_length=20)),
+                ('net_quantity', models.BigIntegerField(default=0)),
+                ('gross_quantity', models.BigIntegerField(default=0)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='inventory.product')),
+            ],
+            options={
+                'verbose_name': 'Rollup Diario',
+                'verbose_name_plural': 'Rollups Diarios',
+                'db_table': 'daily_transaction_rollups',
+                'indexes': [models.Index(fields=['product', 'day'], name='daily_trans_product_3a12f5_idx'), models.Index(fields=['branch_key', 'transaction_type', 'day'], name='daily_trans_branch__f47b65_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'product', 'branch_key', 'transaction_type'), name='unique_daily_rollup')],
+            },
+        ),
+    ]
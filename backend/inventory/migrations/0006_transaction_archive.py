@@ -0,0 +1,104 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:17
+
+from datetime import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+PARTITIONS_AHEAD = 3
+
+
+def _month_start(value, offset=0):
+    index = value.year * 12 + value.month - 1 + offset
+    return timezone.make_aware(datetime(index // 12, index % 12 + 1, 1))
+
+
+def partition_transactions(apps, schema_editor):
+    """
+    Convertir inventory_transactions en una tabla particionada por mes.
+
+    Solo PostgreSQL. La clave primaria pasa a (id, created_at) porque debe
+    incluir la columna de partición; Django sigue usando `id`. Copia la
+    tabla completa: en una base grande, ejecutar en una ventana de
+    mantenimiento.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return  # SQLite: tabla única; el archivo borra por rango de fechas
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table "
+                       "WHERE partrelid = 'inventory_transactions'::regclass")
+        if cursor.fetchone():
+            return
+        cursor.execute("SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() "
+                       "AND tablename = 'inventory_transactions'")
+        indexes = cursor.fetchall()
+        cursor.execute("SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+                       "WHERE conrelid = 'inventory_transactions'::regclass AND contype IN ('p', 'f')")
+        constraints = cursor.fetchall()
+        cursor.execute("SELECT MIN(created_at) FROM inventory_transactions")
+        first = cursor.fetchone()[0] or timezone.now()
+
+        # Liberar los nombres de índices y restricciones para la tabla nueva
+        cursor.execute("ALTER TABLE inventory_transactions RENAME TO inventory_transactions_old")
+        for name, _, _ in constraints:
+            cursor.execute(f'ALTER TABLE inventory_transactions_old DROP CONSTRAINT "{name}"')
+        constraint_names = {name for name, _, _ in constraints}
+        for name, _ in indexes:
+            if name not in constraint_names:
+                cursor.execute(f'DROP INDEX "{name}"')
+
+        cursor.execute("CREATE TABLE inventory_transactions (LIKE inventory_transactions_old "
+                       "INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (created_at)")
+        cursor.execute("CREATE TABLE inventory_transactions_default "
+                       "PARTITION OF inventory_transactions DEFAULT")
+        first, last = timezone.localtime(first), timezone.localtime()
+        for offset in range((last.year - first.year) * 12 + last.month - first.month
+                            + PARTITIONS_AHEAD + 1):
+            start, end = _month_start(first, offset), _month_start(first, offset + 1)
+            cursor.execute(f"CREATE TABLE inventory_transactions_{start:%Y_%m} "
+                           f"PARTITION OF inventory_transactions "
+                           f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')")
+        cursor.execute("INSERT INTO inventory_transactions SELECT * FROM inventory_transactions_old")
+        cursor.execute("DROP TABLE inventory_transactions_old")
+
+        for name, kind, definition in constraints:
+            if kind == 'p':
+                cursor.execute(f'ALTER TABLE inventory_transactions ADD CONSTRAINT "{name}" '
+                               f'PRIMARY KEY (id, created_at)')
+            else:
+                cursor.execute(f'ALTER TABLE inventory_transactions ADD CONSTRAINT "{name}" {definition}')
+        for name, definition in indexes:
+            if name not in constraint_names:
+                cursor.execute(definition)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_transaction_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('path', models.CharField(max_length=500)),
+                ('row_count', models.IntegerField()),
+                ('size_bytes', models.BigIntegerField()),
+                ('first_created_at', models.DateTimeField(blank=True, null=True)),
+                ('last_created_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo de Transacciones',
+                'verbose_name_plural': 'Archivos de Transacciones',
+                'db_table': 'transaction_archives',
+                'ordering': ['month'],
+            },
+        ),
+        # Sin vuelta atrás: la tabla particionada sigue siendo compatible
+        migrations.RunPython(partition_transactions, migrations.RunPython.noop),
+    ]
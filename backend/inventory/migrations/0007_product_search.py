@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:10
+
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    """SQLite: tabla FTS5 y triggers; PostgreSQL: pg_trgm e índices GIN (ver inventory/search.py)."""
+    from inventory.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def drop(apps, schema_editor):
+    from inventory.search import drop_search_index
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_transaction_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, drop),
+    ]
@@ -194,4 +194,174 @@ class InventoryTransaction(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.get_transaction_type_display()} - {self.product}: {self.quantity}"
\ No newline at end of file
+        return f"{self.get_transaction_type_display()} - {self.product}: {self.quantity}"
+
+# =================== RESUMEN DE INVENTARIO ===================
+
+class InventorySummary(models.Model):
+    """
+    Totales de inventario precalculados para el dashboard.
+    
+    Una fila por alcance: la global (key vacía) y una por producto,
+    sucursal y región. Se actualiza de forma incremental con cada
+    InventoryTransaction (inventory/summary.py) y se reconstruye con
+    `python manage.py rebuild_inventory_summary`.
+    """
+    SCOPES = [
+        ('global', 'Global'),
+        ('product', 'Producto'),
+        ('branch', 'Sucursal'),
+        ('region', 'Región'),
+    ]
+    
+    scope = models.CharField(max_length=10, choices=SCOPES)
+    key = models.CharField(max_length=36, blank=True, default='')  # id del producto/sucursal/región
+    total_quantity = models.BigIntegerField(default=0)    # inventario general + sucursales
+    general_quantity = models.BigIntegerField(default=0)  # solo inventario general
+    low_stock_count = models.IntegerField(default=0)      # productos en o bajo min_stock
+    high_stock_count = models.IntegerField(default=0)     # productos en o sobre max_stock
+    product_count = models.IntegerField(default=0)        # solo global: productos con inventario
+    branch_count = models.IntegerField(default=0)         # solo global: sucursales con inventario
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Resumen de Inventario"
+        verbose_name_plural = "Resúmenes de Inventario"
+        db_table = 'inventory_summary'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_summary_scope_key')
+        ]
+    
+    def __str__(self):
+        return f"{self.scope} {self.key}: {self.total_quantity} unidades"
+
+# =================== LEDGER DE STOCK ===================
+
+class StockCheckpoint(models.Model):
+    """
+    Corte de saldos del ledger (InventoryTransaction) a una fecha.
+    
+    Incluye todas las transacciones con created_at <= as_of. El stock a una
+    fecha T sale del último corte <= T más las transacciones del tramo, así
+    que el costo de la consulta depende del intervalo entre cortes y no del
+    largo del historial (inventory/ledger.py).
+    """
+    as_of = models.DateTimeField(unique=True)
+    transaction_count = models.IntegerField(default=0)  # transacciones desde el corte anterior
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Corte de Stock"
+        verbose_name_plural = "Cortes de Stock"
+        db_table = 'stock_checkpoints'
+        ordering = ['-as_of']
+    
+    def __str__(self):
+        return f"Corte {self.as_of:%Y-%m-%d %H:%M}"
+
+class StockCheckpointBalance(models.Model):
+    """Saldo de una ubicación en un corte (solo saldos distintos de cero)"""
+    LOCATION_TYPES = [
+        ('general', 'Inventario General'),
+        ('branch', 'Sucursal'),
+    ]
+    
+    checkpoint = models.ForeignKey(StockCheckpoint, on_delete=models.CASCADE, related_name='balances')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_checkpoints')
+    location_type = models.CharField(max_length=10, choices=LOCATION_TYPES)
+    location_key = models.CharField(max_length=36, blank=True, default='')  # id de la sucursal; vacío en general
+    quantity = models.IntegerField()
+    
+    class Meta:
+        verbose_name = "Saldo de Corte"
+        verbose_name_plural = "Saldos de Corte"
+        db_table = 'stock_checkpoint_balances'
+        constraints = [
+            models.UniqueConstraint(fields=['checkpoint', 'product', 'location_type', 'location_key'],
+                                    name='unique_checkpoint_location')
+        ]
+        indexes = [
+            models.Index(fields=['checkpoint', 'location_key']),
+        ]
+    
+    def __str__(self):
+        return f"{self.checkpoint} {self.product_id} {self.location_type} {self.location_key}: {self.quantity}"
+
+# =================== ROLLUPS DIARIOS ===================
+
+class DailyTransactionRollup(models.Model):
+    """
+    Transacciones agregadas por día, producto, sucursal y tipo.
+    
+    `branch_key` es la sucursal de origen o destino; vacío agrupa el
+    inventario general y las ubicaciones externas, y '*' todas las
+    ubicaciones del producto. `net_quantity` es el
+    cambio de stock en esa ubicación (entradas menos salidas) y
+    `gross_quantity` las unidades movidas. Se mantiene de forma incremental
+    con `python manage.py refresh_transaction_rollups` (inventory/rollups.py).
+    """
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_rollups')
+    branch_key = models.CharField(max_length=36, blank=True, default='')
+    transaction_type = models.CharField(max_length=20, choices=InventoryTransaction.TRANSACTION_TYPES)
+    net_quantity = models.BigIntegerField(default=0)
+    gross_quantity = models.BigIntegerField(default=0)
+    transaction_count = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Rollup Diario"
+        verbose_name_plural = "Rollups Diarios"
+        db_table = 'daily_transaction_rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product', 'branch_key', 'transaction_type'],
+                                    name='unique_daily_rollup')
+        ]
+        indexes = [
+            models.Index(fields=['product', 'day']),
+            # Tendencias: branch_key='*' o una sucursal, por tipo y rango de días
+            models.Index(fields=['branch_key', 'transaction_type', 'day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.product_id} {self.transaction_type}: {self.net_quantity}"
+
+class RollupWatermark(models.Model):
+    """Última transacción (created_at, id) incluida en un rollup"""
+    name = models.CharField(max_length=50, unique=True)
+    created_at = models.DateTimeField(null=True, blank=True)
+    transaction_id = models.UUIDField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Marca de Rollup"
+        verbose_name_plural = "Marcas de Rollup"
+        db_table = 'rollup_watermarks'
+    
+    def __str__(self):
+        return f"{self.name}: {self.created_at}"
+
+# =================== ARCHIVO DE TRANSACCIONES ===================
+
+class TransactionArchive(models.Model):
+    """
+    Mes de inventory_transactions movido a un archivo Parquet.
+    
+    Las filas ya no están en la tabla; se leen con
+    inventory/archive.py (`archived_rows`, `iter_transactions`).
+    """
+    month = models.DateField(unique=True)  # Primer día del mes
+    path = models.CharField(max_length=500)
+    row_count = models.IntegerField()
+    size_bytes = models.BigIntegerField()
+    first_created_at = models.DateTimeField(null=True, blank=True)
+    last_created_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Archivo de Transacciones"
+        verbose_name_plural = "Archivos de Transacciones"
+        db_table = 'transaction_archives'
+        ordering = ['month']
+    
+    def __str__(self):
+        return f"{self.month:%Y-%m}: {self.row_count} transacciones"
@@ -0,0 +1,249 @@
+# backend/inventory/rollups.py
+"""
+Rollups diarios de InventoryTransaction (DailyTransactionRollup).
+
+Una fila por (día, producto, sucursal, tipo de transacción) con el cambio
+neto de stock, las unidades movidas y el número de transacciones. Una
+transferencia general -> sucursal suma en la fila de la sucursal y resta
+en la de branch_key vacío; una venta solo resta en la sucursal. Además
+cada transacción suma una vez en la fila branch_key='*' del producto (todas
+las ubicaciones), que es la que leen las tendencias sin filtro de sucursal.
+
+`refresh_rollups()` avanza desde una marca (created_at, id) guardada en
+RollupWatermark: lee las transacciones siguientes en orden de esa clave,
+en lotes de `chunk_size`, y suma cada lote a las filas existentes en una
+transacción junto con la nueva marca. Solo entran transacciones con al
+menos `settle_seconds` de antigüedad, para no saltarse las que todavía
+no confirmaban cuando se movió la marca. Si una transacción llega tarde o
+se corrige el historial, `rebuild_rollups(desde, hasta)` recalcula ese
+rango de días, leyendo del archivo los meses que ya no estén en la tabla.
+
+`trends()` lee solo el rollup: una tendencia de 90 días para todos los
+productos son unos miles de filas, sin recorrer inventory_transactions.
+"""
+
+from collections import defaultdict
+from itertools import chain
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .archive import archived_rows, archived_until
+from .models import DailyTransactionRollup, InventoryTransaction, RollupWatermark
+from .summary import BRANCH_LOCATIONS
+
+DEFAULT_CONFIG = {
+    'settle_seconds': 60,
+    'chunk_size': 5000,
+}
+
+ROLLUP_NAME = 'daily_transactions'
+ALL_LOCATIONS = '*'
+STOCK_LOCATIONS = ('general', *BRANCH_LOCATIONS)
+ROW_FIELDS = ('created_at', 'id', 'product_id', 'transaction_type', 'from_location_type',
+              'from_location_id', 'to_location_type', 'to_location_id', 'quantity')
+
+# (día, product_id, branch_key, transaction_type) -> [neto, bruto, transacciones]
+RollupKey = Tuple[date, str, str, str]
+
+
+def rollup_config() -> Dict:
+    """INVENTORY_ROLLUP_CONFIG de settings con valores por defecto."""
+    return {**DEFAULT_CONFIG, **getattr(settings, 'INVENTORY_ROLLUP_CONFIG', {})}
+
+
+def _branch_key(location_type: Optional[str], location_id) -> str:
+    return str(location_id) if location_type in BRANCH_LOCATIONS and location_id else ''
+
+
+def _aggregate(rows: Iterable[tuple], totals: Optional[Dict] = None) -> Dict[RollupKey, List[int]]:
+    """Sumar filas (ROW_FIELDS) por día, producto, sucursal y tipo."""
+    totals = totals if totals is not None else defaultdict(lambda: [0, 0, 0])
+    for created_at, _, product, tx_type, from_type, from_id, to_type, to_id, quantity in rows:
+        day = timezone.localdate(created_at)
+        # Una fila por ubicación con stock que toca la transacción; las
+        # externas (proveedor, cliente, pérdida) no tienen fila propia
+        sides: Dict[str, int] = {}
+        if from_type in STOCK_LOCATIONS:
+            sides[_branch_key(from_type, from_id)] = -quantity
+        if to_type in STOCK_LOCATIONS:
+            target = _branch_key(to_type, to_id)
+            sides[target] = sides.get(target, 0) + quantity
+        if not sides:
+            sides[''] = 0
+        sides[ALL_LOCATIONS] = sum(sides.values())
+        for branch_key, net in sides.items():
+            row = totals[(day, str(product), branch_key, tx_type)]
+            row[0] += net
+            row[1] += quantity
+            row[2] += 1
+    return totals
+
+
+def _merge(totals: Dict[RollupKey, List[int]]):
+    """Sumar `totals` a las filas existentes (un SELECT y un upsert)."""
+    if not totals:
+        return
+    existing = {
+        (row.day, str(row.product_id), row.branch_key, row.transaction_type): row
+        for row in DailyTransactionRollup.objects.filter(
+            day__in={k[0] for k in totals}, product_id__in={k[1] for k in totals})
+    }
+    rows = []
+    for key, (net, gross, count) in totals.items():
+        current = existing.get(key)
+        day, product, branch_key, tx_type = key
+        rows.append(DailyTransactionRollup(
+            day=day, product_id=product, branch_key=branch_key, transaction_type=tx_type,
+            net_quantity=net + (current.net_quantity if current else 0),
+            gross_quantity=gross + (current.gross_quantity if current else 0),
+            transaction_count=count + (current.transaction_count if current else 0),
+        ))
+    DailyTransactionRollup.objects.bulk_create(
+        rows, update_conflicts=True,
+        unique_fields=['day', 'product', 'branch_key', 'transaction_type'],
+        update_fields=['net_quantity', 'gross_quantity', 'transaction_count'], batch_size=1000)
+
+
+def _lock_watermark() -> RollupWatermark:
+    mark = RollupWatermark.objects.select_for_update().filter(name=ROLLUP_NAME).first()
+    if mark is None:
+        RollupWatermark.objects.bulk_create([RollupWatermark(name=ROLLUP_NAME)], ignore_conflicts=True)
+        mark = RollupWatermark.objects.select_for_update().get(name=ROLLUP_NAME)
+    return mark
+
+
+def _after(created_at: datetime, pk) -> Q:
+    """(created_at, id) > (created_at, pk), con el rango explícito para el índice."""
+    return Q(created_at__gte=created_at) & (Q(created_at__gt=created_at) | Q(id__gt=pk))
+
+
+def _not_after(created_at: datetime, pk) -> Q:
+    return Q(created_at__lte=created_at) & (Q(created_at__lt=created_at) | Q(id__lte=pk))
+
+
+def get_watermark() -> Optional[RollupWatermark]:
+    return RollupWatermark.objects.filter(name=ROLLUP_NAME).first()
+
+
+# ============================================
+# MANTENIMIENTO
+# ============================================
+
+def refresh_rollups(until: Optional[datetime] = None, chunk_size: Optional[int] = None) -> Dict:
+    """
+    Sumar al rollup las transacciones posteriores a la marca.
+
+    Args:
+        until: Límite superior de created_at (por defecto ahora - settle_seconds)
+        chunk_size: Transacciones por lote
+
+    Returns:
+        {'transactions', 'chunks', 'watermark'}
+    """
+    config = rollup_config()
+    chunk_size = chunk_size or config['chunk_size']
+    if until is None:
+        until = timezone.now() - timedelta(seconds=config['settle_seconds'])
+
+    processed = chunks = 0
+    while True:
+        with transaction.atomic():
+            mark = _lock_watermark()
+            pending = InventoryTransaction.objects.filter(created_at__lte=until)
+            if mark.created_at is not None:
+                pending = pending.filter(_after(mark.created_at, mark.transaction_id))
+            rows = list(pending.order_by('created_at', 'id').values_list(*ROW_FIELDS)[:chunk_size])
+            if rows:
+                _merge(_aggregate(rows))
+                mark.created_at, mark.transaction_id = rows[-1][0], rows[-1][1]
+                mark.save(update_fields=['created_at', 'transaction_id', 'updated_at'])
+        processed += len(rows)
+        chunks += 1 if rows else 0
+        if len(rows) < chunk_size:
+            break
+    return {'transactions': processed, 'chunks': chunks, 'watermark': mark.created_at}
+
+
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+@transaction.atomic
+def rebuild_rollups(start: date, end: date) -> Dict:
+    """
+    Recalcular los días [start, end] desde inventory_transactions.
+
+    Solo toma transacciones hasta la marca: las posteriores las suma el
+    siguiente refresh_rollups().
+
+    Returns:
+        {'transactions', 'rows'}
+    """
+    mark = _lock_watermark()
+    DailyTransactionRollup.objects.filter(day__range=(start, end)).delete()
+    if mark.created_at is None:
+        return {'transactions': 0, 'rows': 0}
+
+    transactions = (InventoryTransaction.objects
+                    .filter(created_at__gte=_day_start(start),
+                            created_at__lt=_day_start(end + timedelta(days=1)))
+                    .filter(_not_after(mark.created_at, mark.transaction_id))
+                    .order_by())
+    rows = transactions.values_list(*ROW_FIELDS).iterator(chunk_size=5000)
+    boundary = archived_until()
+    if boundary is not None and _day_start(start) < boundary:
+        # Lo archivado ya está por debajo de la marca
+        day_end = _day_start(end + timedelta(days=1))
+        archived = (tuple(row[field] for field in ROW_FIELDS)
+                    for row in archived_rows(since=_day_start(start), until=day_end)
+                    if row['created_at'] < day_end)
+        rows = chain(archived, rows)
+    totals, count = defaultdict(lambda: [0, 0, 0]), 0
+    for row in rows:
+        _aggregate([row], totals)
+        count += 1
+    DailyTransactionRollup.objects.bulk_create([
+        DailyTransactionRollup(day=day, product_id=product, branch_key=branch_key,
+                               transaction_type=tx_type, net_quantity=net,
+                               gross_quantity=gross, transaction_count=n)
+        for (day, product, branch_key, tx_type), (net, gross, n) in totals.items()
+    ], batch_size=1000)
+    return {'transactions': count, 'rows': len(totals)}
+
+
+# ============================================
+# CONSULTAS
+# ============================================
+
+def trends(days: int = 90, end: Optional[date] = None, product_id=None,
+           branch_id=None, transaction_types=None, group: str = 'day') -> List[Dict]:
+    """
+    Serie diaria desde el rollup.
+
+    Args:
+        days: Días hacia atrás desde `end` (incluido; por defecto hoy)
+        product_id / branch_id / transaction_types: Filtros opcionales
+        group: 'day' (un total por día) o 'product' (por producto y día)
+
+    Returns:
+        [{'day', 'net', 'gross', 'transactions'}]
+        (+ 'product_id' con group='product'), ordenado por producto y día
+    """
+    end = end or timezone.localdate()
+    rows = DailyTransactionRollup.objects.filter(day__range=(end - timedelta(days=days - 1), end))
+    if product_id:
+        rows = rows.filter(product_id=product_id)
+    rows = rows.filter(branch_key=str(branch_id) if branch_id else ALL_LOCATIONS)
+    if transaction_types:
+        rows = rows.filter(transaction_type__in=transaction_types)
+    keys = ['product_id', 'day'] if group == 'product' else ['day']
+    return list(rows.values(*keys).annotate(
+        net=Sum('net_quantity'),
+        gross=Sum('gross_quantity'),
+        transactions=Sum('transaction_count'),
+    ).order_by(*keys))
@@ -0,0 +1,397 @@
+# backend/inventory/search.py
+"""
+Búsqueda de productos por código, nombre y categoría con índice.
+
+`icontains` sobre product_code/product_name recorre toda la tabla. Aquí:
+
+- SQLite: tabla FTS5 `product_search` (tokenizer unicode61 sin tildes,
+  índices de prefijo de 2 y 3 caracteres, bm25 con pesos código 10,
+  nombre 5, categoría 1). Como la clave de los productos es un UUID, el
+  rowid implícito de inventory_product puede cambiar con un VACUUM; por eso
+  el rowid de FTS5 sale de `product_search_keys` (INTEGER PRIMARY KEY,
+  product_id único). Triggers sobre inventory_product mantienen ambas
+  tablas, así que también cubren bulk_create, upserts y update(), que no
+  disparan señales.
+- PostgreSQL: índice GIN sobre el tsvector ponderado (código A, nombre B,
+  categoría C) y un índice pg_trgm sobre product_name; la base los
+  mantiene sola. Si la búsqueda no encuentra nada se prueba por
+  similitud de trigramas (errores de tipeo).
+
+Cada palabra de la consulta debe aparecer (AND). Los códigos se indexan
+también sin separadores ('SKU-0012' -> sku0012): buscar uno no cruza con
+'sku', que está en todos los productos. La relevancia (bm25 / ts_rank) se
+calcula solo sobre las primeras SEARCH_CANDIDATES coincidencias
+(AUTOCOMPLETE_CANDIDATES al autocompletar) y las coincidencias en el
+código se buscan aparte y van primero, así que el costo no crece con lo
+común que sea una palabra; a cambio, con palabras muy comunes el orden
+entre coincidencias del nombre es aproximado.
+
+Django reconstruye la tabla de SQLite en algunos cambios de esquema y con
+ella se pierden los triggers: después de cada migrate `ensure_search_index`
+(señal post_migrate) los reinstala y vuelve a indexar si faltan.
+"""
+
+import re
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from .models import Product
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+AUTOCOMPLETE_LIMIT = 10
+SEARCH_CANDIDATES = 1000
+AUTOCOMPLETE_CANDIDATES = 200
+MIN_PREFIX = 2
+MAX_TERMS = 8
+
+PRODUCTS = Product._meta.db_table
+FTS_TABLE = 'product_search'
+KEYS_TABLE = 'product_search_keys'
+TRIGGERS = ('product_search_insert', 'product_search_update', 'product_search_delete')
+TOKEN_RE = re.compile(r'[^\W_]+')
+BM25_WEIGHTS = '10.0, 5.0, 1.0'  # código, nombre, categoría
+
+PG_VECTOR_INDEX = 'product_search_vector'
+PG_TRGM_INDEX = 'product_search_name_trgm'
+
+RESULT_FIELDS = ('id', 'product_code', 'product_name', 'category', 'requires_refrigeration', 'score')
+
+
+# ============================================
+# ÍNDICE
+# ============================================
+
+def _pg_vector(alias: str = '') -> str:
+    # Misma expresión en el índice y en las consultas, o PostgreSQL no usa el índice
+    code = f"{alias}product_code || ' ' || regexp_replace({alias}product_code, '[^[:alnum:]]+', '', 'g')"
+    return (f"(setweight(to_tsvector('simple', {code}), 'A') || "
+            f"setweight(to_tsvector('simple', {alias}product_name), 'B') || "
+            f"setweight(to_tsvector('simple', {alias}category), 'C'))")
+
+
+def _code_document(column: str) -> str:
+    # El código tal cual y sin separadores: 'SKU-0012' se indexa como sku, 0012 y sku0012
+    compact = column
+    for separator in ('-', '_', '.', '/', ' '):
+        compact = f"replace({compact}, '{separator}', '')"
+    return f"{column} || ' ' || {compact}"
+
+
+def _sqlite_setup() -> List[str]:
+    return [
+        f"CREATE TABLE {KEYS_TABLE} (id INTEGER PRIMARY KEY, product_id char(32) NOT NULL UNIQUE)",
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(product_code, product_name, category, "
+        f"tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+        f"INSERT INTO {KEYS_TABLE} (product_id) SELECT id FROM {PRODUCTS}",
+        f"INSERT INTO {FTS_TABLE} (rowid, product_code, product_name, category) "
+        f"SELECT k.id, {_code_document('p.product_code')}, p.product_name, p.category "
+        f"FROM {KEYS_TABLE} k JOIN {PRODUCTS} p ON p.id = k.product_id",
+        f"""CREATE TRIGGER product_search_insert AFTER INSERT ON {PRODUCTS} BEGIN
+            INSERT INTO {KEYS_TABLE} (product_id) VALUES (new.id);
+            INSERT INTO {FTS_TABLE} (rowid, product_code, product_name, category)
+            VALUES ((SELECT id FROM {KEYS_TABLE} WHERE product_id = new.id),
+                    {_code_document('new.product_code')}, new.product_name, new.category);
+        END""",
+        f"""CREATE TRIGGER product_search_update AFTER UPDATE OF product_code, product_name, category
+        ON {PRODUCTS} BEGIN
+            UPDATE {FTS_TABLE} SET product_code = {_code_document('new.product_code')},
+                product_name = new.product_name, category = new.category
+            WHERE rowid = (SELECT id FROM {KEYS_TABLE} WHERE product_id = old.id);
+        END""",
+        f"""CREATE TRIGGER product_search_delete AFTER DELETE ON {PRODUCTS} BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = (SELECT id FROM {KEYS_TABLE} WHERE product_id = old.id);
+            DELETE FROM {KEYS_TABLE} WHERE product_id = old.id;
+        END""",
+    ]
+
+
+def _sqlite_teardown() -> List[str]:
+    return [*(f"DROP TRIGGER IF EXISTS {name}" for name in TRIGGERS),
+            f"DROP TABLE IF EXISTS {FTS_TABLE}", f"DROP TABLE IF EXISTS {KEYS_TABLE}"]
+
+
+def _postgresql_setup() -> List[str]:
+    return [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX IF NOT EXISTS {PG_VECTOR_INDEX} ON {PRODUCTS} USING gin ({_pg_vector()})",
+        f"CREATE INDEX IF NOT EXISTS {PG_TRGM_INDEX} ON {PRODUCTS} USING gin (product_name gin_trgm_ops)",
+    ]
+
+
+def _fts5_available(using) -> bool:
+    with using.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(option == 'ENABLE_FTS5' for option, in cursor.fetchall())
+
+
+def install_search_index(using=None) -> int:
+    """
+    Crear (o recrear) el índice de búsqueda y cargar los productos existentes.
+
+    Args:
+        using: Conexión (por defecto la principal; las migraciones pasan la suya)
+
+    Returns:
+        Productos indexados (en PostgreSQL, todos los de la tabla)
+    """
+    using = using or connection
+    if using.vendor == 'sqlite':
+        if not _fts5_available(using):
+            return 0  # Búsqueda sin índice (_fallback_search)
+        statements = [*_sqlite_teardown(), *_sqlite_setup()]
+    elif using.vendor == 'postgresql':
+        statements = _postgresql_setup()
+    else:
+        return 0
+    with transaction.atomic(using=using.alias), using.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute(f"SELECT COUNT(*) FROM {PRODUCTS}")
+        return cursor.fetchone()[0]
+
+
+def drop_search_index(using=None):
+    using = using or connection
+    if using.vendor == 'sqlite':
+        statements = _sqlite_teardown()
+    elif using.vendor == 'postgresql':
+        statements = [f"DROP INDEX IF EXISTS {PG_VECTOR_INDEX}", f"DROP INDEX IF EXISTS {PG_TRGM_INDEX}"]
+    else:
+        return
+    with using.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def search_index_ready(using=None) -> bool:
+    """True si el índice existe (en SQLite, la tabla FTS5 y los tres triggers)."""
+    using = using or connection
+    if using.vendor == 'postgresql':
+        return True
+    if using.vendor != 'sqlite':
+        return False
+    with using.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE (type = 'table' AND name = %s) "
+                       "OR (type = 'trigger' AND name IN (%s, %s, %s))", [FTS_TABLE, *TRIGGERS])
+        return cursor.fetchone()[0] == 1 + len(TRIGGERS)
+
+
+def ensure_search_index(using=None) -> Optional[int]:
+    """Reinstalar el índice si falta; devuelve los productos indexados o None si ya estaba."""
+    using = using or connection
+    if using.vendor != 'sqlite' or search_index_ready(using) or not _fts5_available(using):
+        return None
+    with using.cursor() as cursor:
+        if PRODUCTS not in using.introspection.table_names(cursor):
+            return None
+    return install_search_index(using)
+
+
+# ============================================
+# CONSULTAS
+# ============================================
+
+def search_terms(query: str) -> Tuple[List[str], List[str]]:
+    """
+    Palabras de la consulta en minúsculas.
+
+    Returns:
+        (una por palabra sin separadores: 'SKU-0012' -> 'sku0012',
+        letras y dígitos por separado como el tokenizer: 'sku', '0012')
+    """
+    compact, tokens = [], []
+    for word in (query or '').lower().split():
+        parts = TOKEN_RE.findall(word)
+        if parts:
+            compact.append(''.join(parts))
+            tokens.extend(parts)
+    return compact[:MAX_TERMS], tokens[:MAX_TERMS]
+
+
+def _phases(query: str, autocomplete: bool) -> List[Tuple[List[str], bool]]:
+    # Palabras completas, luego la última como prefijo, luego separando los códigos
+    # Sin palabras (solo signos de puntuación) no hay fases: FTS5 no acepta '()'
+    compact, tokens = search_terms(query)
+    if not compact:
+        return []
+    phases = [] if autocomplete else [(compact, False)]
+    for terms in (compact, tokens):
+        if terms and len(terms[-1]) >= MIN_PREFIX and (terms, True) not in phases:
+            phases.append((terms, True))
+    if autocomplete and not phases:
+        phases.append((compact, False))
+    return phases
+
+
+def _fts5_query(terms: List[str], prefix: bool, code_only: bool) -> str:
+    # Cada término entre comillas: la consulta no se interpreta como sintaxis FTS5
+    parts = [f'"{term}"' for term in terms]
+    if prefix:
+        parts[-1] += '*'
+    expression = ' '.join(parts)
+    return f'{{product_code}} : ({expression})' if code_only else expression
+
+
+def _tsquery(terms: List[str], prefix: bool, code_only: bool) -> str:
+    weight = 'A' if code_only else ''
+    parts = [f'{term}:{weight}' if weight else term for term in terms]
+    if prefix:
+        parts[-1] = f'{terms[-1]}:*{weight}'
+    return ' & '.join(parts)
+
+
+def _filters(category: Optional[str], requires_refrigeration: Optional[bool]) -> Tuple[str, List]:
+    sql, params = '', []
+    if category:
+        sql += ' AND p.category = %s'
+        params.append(category)
+    if requires_refrigeration is not None:
+        sql += ' AND p.requires_refrigeration = %s'
+        params.append(bool(requires_refrigeration))
+    return sql, params
+
+
+def _rows(sql: str, params: List) -> List[Dict]:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = [dict(zip(RESULT_FIELDS, row)) for row in cursor.fetchall()]
+    for row in rows:
+        row['id'] = str(uuid.UUID(str(row['id'])))
+        row['requires_refrigeration'] = bool(row['requires_refrigeration'])
+        row['score'] = float(row['score'])
+    return rows
+
+
+def _ranked(terms: List[str], prefix: bool, code_only: bool, filters: Tuple[str, List],
+            limit: int, candidates: int) -> List[Dict]:
+    """Las `candidates` primeras coincidencias, ordenadas por relevancia."""
+    where, params = filters
+    columns = 'p.id, p.product_code, p.product_name, p.category, p.requires_refrigeration'
+    if connection.vendor == 'postgresql':
+        vector = _pg_vector('p.')
+        inner = (f"SELECT {columns}, ts_rank({vector}, q.query) AS score "
+                 f"FROM {PRODUCTS} p, to_tsquery('simple', %s) q(query) "
+                 f"WHERE {vector} @@ q.query{where}")
+        match = _tsquery(terms, prefix, code_only)
+    else:
+        # bm25 es negativo (mejor cuanto menor); score se devuelve positivo
+        inner = (f"SELECT {columns}, -bm25({FTS_TABLE}, {BM25_WEIGHTS}) AS score FROM {FTS_TABLE} "
+                 f"JOIN {KEYS_TABLE} k ON k.id = {FTS_TABLE}.rowid "
+                 f"JOIN {PRODUCTS} p ON p.id = k.product_id "
+                 f"WHERE {FTS_TABLE} MATCH %s{where}")
+        match = _fts5_query(terms, prefix, code_only)
+    sql = f"SELECT * FROM ({inner} LIMIT %s) c ORDER BY score DESC, product_code LIMIT %s"
+    return _rows(sql, [match, *params, candidates, limit])
+
+
+def _fuzzy(query: str, filters: Tuple[str, List], limit: int) -> List[Dict]:
+    # Solo PostgreSQL: errores de tipeo por similitud de trigramas (índice pg_trgm)
+    where, params = filters
+    return _rows(f"SELECT p.id, p.product_code, p.product_name, p.category, p.requires_refrigeration, "
+                 f"similarity(p.product_name, %s) AS score FROM {PRODUCTS} p "
+                 f"WHERE p.product_name %% %s{where} ORDER BY score DESC LIMIT %s",
+                 [query, query, *params, limit])
+
+
+def _fallback_search(query: str, category, requires_refrigeration, limit) -> List[Dict]:
+    # Sin índice (otra base o SQLite sin FTS5): icontains por palabra, sin ranking
+    products = Product.objects.all()
+    for word in query.split():
+        products = products.filter(Q(product_name__icontains=word) | Q(product_code__icontains=word))
+    if category:
+        products = products.filter(category=category)
+    if requires_refrigeration is not None:
+        products = products.filter(requires_refrigeration=requires_refrigeration)
+    return [{**row, 'id': str(row['id']), 'score': 0.0} for row in products.order_by('product_code')
+            .values(*RESULT_FIELDS[:-1])[:limit]]
+
+
+def search_products(query: str, category: Optional[str] = None,
+                    requires_refrigeration: Optional[bool] = None, limit: int = DEFAULT_LIMIT,
+                    autocomplete: bool = False) -> List[Dict]:
+    """
+    Buscar productos por código, nombre y categoría, de más a menos relevante.
+
+    Cada palabra debe aparecer. Se prueba primero con palabras completas,
+    después con la última como prefijo y por último separando los códigos
+    ('SKU-0012' -> 'sku', '0012'), hasta que alguna devuelva resultados.
+    Las coincidencias en el código van primero; dentro de cada grupo se
+    ordenan por relevancia las SEARCH_CANDIDATES primeras coincidencias.
+
+    Args:
+        query: Texto libre
+        category: Solo esta categoría
+        requires_refrigeration: Solo refrigerados (True) o no refrigerados (False)
+        limit: Máximo de resultados (hasta MAX_LIMIT)
+        autocomplete: Sin la fase de palabras completas y con menos candidatos
+
+    Returns:
+        Lista de {'id', 'product_code', 'product_name', 'category',
+        'requires_refrigeration', 'score'} (score mayor = más relevante)
+    """
+    query = (query or '').strip()
+    limit = max(1, min(limit, MAX_LIMIT))
+    if connection.vendor not in ('sqlite', 'postgresql') or not search_index_ready():
+        return _fallback_search(query, category, requires_refrigeration, limit) if query else []
+
+    phases = _phases(query, autocomplete)
+    if not phases:
+        return []
+    filters = _filters(category, requires_refrigeration)
+    candidates = AUTOCOMPLETE_CANDIDATES if autocomplete else SEARCH_CANDIDATES
+    for terms, prefix in phases:
+        rows = _ranked(terms, prefix, True, filters, limit, candidates)
+        if len(rows) < limit:
+            seen = {row['id'] for row in rows}
+            rest = _ranked(terms, prefix, False, filters, limit + len(rows), candidates)
+            rows += [row for row in rest if row['id'] not in seen][:limit - len(rows)]
+        if rows:
+            return rows
+    if connection.vendor == 'postgresql' and not autocomplete and len(query) >= 3:
+        return _fuzzy(query, filters, limit)
+    return []
+
+
+def _match_ids(terms: List[str], prefix: bool) -> RawSQL:
+    # Ids de todas las coincidencias, sin ranking ni tope
+    if connection.vendor == 'postgresql':
+        return RawSQL(f"SELECT p.id FROM {PRODUCTS} p WHERE {_pg_vector('p.')} @@ "
+                      f"to_tsquery('simple', %s)", [_tsquery(terms, prefix, False)])
+    return RawSQL(f"SELECT k.product_id FROM {FTS_TABLE} JOIN {KEYS_TABLE} k "
+                  f"ON k.id = {FTS_TABLE}.rowid WHERE {FTS_TABLE} MATCH %s",
+                  [_fts5_query(terms, prefix, False)])
+
+
+def matching_products(query: str, queryset: Optional[QuerySet] = None) -> Optional[QuerySet]:
+    """
+    Todos los productos que coinciden con `query`, sin ordenar ni limitar.
+
+    Filtra `queryset` con una subconsulta sobre el índice, con la primera
+    fase que encuentre algo (ver search_products). Para listados
+    paginados, como el admin, donde search_products cortaría en MAX_LIMIT.
+
+    Returns:
+        El queryset filtrado, o None si no hay índice (usar icontains)
+    """
+    if connection.vendor not in ('sqlite', 'postgresql') or not search_index_ready():
+        return None
+    queryset = Product.objects.all() if queryset is None else queryset
+    for terms, prefix in _phases((query or '').strip(), autocomplete=False):
+        matches = queryset.filter(pk__in=_match_ids(terms, prefix))
+        if matches.exists():
+            return matches
+    return queryset.none()
+
+
+def autocomplete_products(query: str, limit: int = AUTOCOMPLETE_LIMIT, category: Optional[str] = None,
+                          requires_refrigeration: Optional[bool] = None) -> List[Dict]:
+    """Sugerencias mientras se escribe: la última palabra como prefijo (ver search_products)."""
+    if len((query or '').strip()) < MIN_PREFIX:
+        return []
+    return search_products(query, category=category, requires_refrigeration=requires_refrigeration,
+                           limit=limit, autocomplete=True)
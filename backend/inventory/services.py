@@ -0,0 +1,265 @@
+# backend/inventory/services.py
+"""
+Operaciones de inventario sobre el ORM de Django.
+
+Las cargas masivas se escriben en una sola transacción y con un solo
+INSERT ... ON CONFLICT DO UPDATE por lote, equivalente a las funciones
+`create_general_inventory_batch` / `update_general_inventory_batch` de
+Supabase (docs/BASE_DATOS_FUNCIONES.md).
+
+`assign_to_branches` mueve stock del inventario general a sucursales con
+un número fijo de consultas, sin importar cuántas líneas traiga.
+
+Las cargas que fijan cantidades calculan la diferencia como transacciones
+de ajuste: siempre se aplican al resumen (inventory/summary.py) y en modo
+ledger (inventory/ledger.py) además se guardan.
+"""
+
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+
+from .ledger import adjustment_transactions, ledger_enabled
+from .models import Product, Branch, GeneralInventory, RegionalInventory, InventoryTransaction
+from .summary import apply_transactions, refresh_product_status
+
+# Columnas opcionales de create_general_inventory
+GENERAL_INVENTORY_FIELDS = ('min_stock', 'max_stock', 'location', 'notes')
+
+
+def _uuid(label: str, value, name: str) -> str:
+    # Misma forma que devuelve la base (str(pk)), para comparar claves
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        raise ValueError(f'{label}: {name} inválido: {value}')
+
+
+def _normalize_items(items: Iterable[Dict], full: bool) -> Dict[str, Dict]:
+    """
+    Validar los items y quedarse con el último por producto.
+
+    Un mismo producto repetido en la carga haría fallar el upsert
+    ("cannot affect row a second time"), así que gana la última fila.
+
+    Raises:
+        ValueError: Si falta product_id o no es un UUID, o la cantidad no
+            es un entero >= 0
+    """
+    rows: Dict[str, Dict] = {}
+    for index, item in enumerate(items):
+        product_id = item.get('product_id')
+        if not product_id:
+            raise ValueError(f'Item {index}: falta product_id')
+        try:
+            quantity = int(item.get('quantity', item.get('new_quantity')))
+        except (TypeError, ValueError):
+            raise ValueError(f'Item {index}: cantidad inválida')
+        if quantity < 0:
+            raise ValueError(f'Item {index}: la cantidad no puede ser negativa')
+        row = {'quantity': quantity}
+        if full:
+            row.update({field: item.get(field) for field in GENERAL_INVENTORY_FIELDS})
+            row['notes'] = row['notes'] or ''
+        rows[_uuid(f'Item {index}', product_id, 'product_id')] = row
+    return rows
+
+
+def _upsert_general_inventory(rows: Dict[str, Dict], update_fields: List[str], user=None) -> Dict:
+    if not rows:
+        return {'success': True, 'message': 'Sin items', 'data': {'rows': 0}}
+
+    with transaction.atomic():
+        existing = {str(pk) for pk in Product.objects.filter(pk__in=rows).values_list('pk', flat=True)}
+        missing = sorted(set(rows) - existing)
+        if missing:
+            return {
+                'success': False,
+                'error': f'Productos inexistentes: {", ".join(missing[:10])}',
+                'data': {'missing_products': missing},
+            }
+        current = {str(pk): (quantity, min_stock, max_stock) for pk, quantity, min_stock, max_stock
+                   in GeneralInventory.objects.select_for_update().filter(pk__in=rows)
+                   .order_by('pk').values_list('pk', 'quantity', 'min_stock', 'max_stock')}
+        GeneralInventory.objects.bulk_create(
+            [GeneralInventory(product_id=product_id, **row) for product_id, row in rows.items()],
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=update_fields + ['last_updated'],
+        )
+        diffs, thresholds = {}, []
+        for product_id, row in rows.items():
+            quantity, *limits = current.get(product_id, (0, None, None))
+            diff = row['quantity'] - quantity
+            diffs[(product_id, 'general', '')] = diff
+            # apply_transactions no recalcula las banderas si solo cambió min/max
+            if not diff and 'min_stock' in row and limits != [row['min_stock'], row['max_stock']]:
+                thresholds.append(product_id)
+        adjustments = adjustment_transactions(diffs, notes='Carga de inventario general', user=user)
+        if ledger_enabled():
+            InventoryTransaction.objects.bulk_create(adjustments)
+        # Sin modo ledger los ajustes no se guardan, pero el resumen debe
+        # reflejar el cambio de cantidades igual
+        apply_transactions(adjustments)
+        if thresholds:
+            refresh_product_status(thresholds)
+
+    return {
+        'success': True,
+        'message': '✅ Inventario actualizado',
+        'data': {'rows': len(rows)},
+    }
+
+
+def create_general_inventory_batch(items: Iterable[Dict], user=None) -> Dict:
+    """
+    Crear o reemplazar el inventario general de muchos productos.
+
+    Args:
+        items: [{'product_id', 'quantity', 'min_stock', 'max_stock',
+            'location', 'notes'}]; `branch_id` se ignora porque el modelo
+            local guarda un inventario general por producto
+        user: Usuario de los ajustes en modo ledger (opcional)
+
+    Returns:
+        {'success', 'message', 'data': {'rows'}} o {'success': False, 'error'}
+    """
+    rows = _normalize_items(items, full=True)
+    return _upsert_general_inventory(rows, ['quantity', *GENERAL_INVENTORY_FIELDS], user=user)
+
+
+def update_general_inventory_batch(items: Iterable[Dict], user=None) -> Dict:
+    """
+    Fijar la cantidad de muchos productos (update_general_inventory en lote).
+
+    Args:
+        items: [{'product_id', 'quantity'}] (también acepta 'new_quantity')
+        user: Usuario de los ajustes en modo ledger (opcional)
+    """
+    rows = _normalize_items(items, full=False)
+    return _upsert_general_inventory(rows, ['quantity'], user=user)
+
+
+def _parse_assignment_lines(lines: Iterable[Dict]) -> List[Dict]:
+    parsed = []
+    for index, line in enumerate(lines):
+        product_id, branch_id = line.get('product_id'), line.get('branch_id')
+        if not product_id or not branch_id:
+            raise ValueError(f'Línea {index}: faltan product_id o branch_id')
+        try:
+            quantity = int(line.get('quantity'))
+        except (TypeError, ValueError):
+            raise ValueError(f'Línea {index}: cantidad inválida')
+        if quantity <= 0:
+            raise ValueError(f'Línea {index}: la cantidad debe ser mayor que cero')
+        parsed.append({'product_id': _uuid(f'Línea {index}', product_id, 'product_id'),
+                       'branch_id': _uuid(f'Línea {index}', branch_id, 'branch_id'),
+                       'quantity': quantity, 'notes': line.get('notes')})
+    return parsed
+
+
+def assign_to_branches(lines: Iterable[Dict], user=None, notes: Optional[str] = None) -> Dict:
+    """
+    Asignar stock del inventario general a sucursales (assign_to_branch en lote).
+
+    Todo ocurre en una transacción: una consulta por tabla para cargar
+    productos, sucursales, inventario general e inventario regional (estos
+    dos con bloqueo, en orden de clave), un upsert de RegionalInventory, un
+    upsert de las cantidades de GeneralInventory y un bulk_create de
+    InventoryTransaction (tipo 'transfer', de 'general' a 'branch'). Si
+    alguna línea no es válida o no hay stock general suficiente no se
+    escribe nada.
+
+    Args:
+        lines: [{'product_id', 'branch_id', 'quantity', 'notes'}]
+        user: Usuario que registra las transacciones (opcional)
+        notes: Nota por defecto para las líneas sin 'notes'
+
+    Returns:
+        {'success', 'message', 'data': {'lines', 'assignments', 'created',
+        'updated', 'transactions'}} o {'success': False, 'error', 'data'}
+    """
+    lines = _parse_assignment_lines(lines)
+    if not lines:
+        return {'success': True, 'message': 'Sin líneas',
+                'data': {'lines': 0, 'assignments': 0, 'created': 0, 'updated': 0,
+                         'transactions': 0}}
+
+    pairs: Dict[tuple, int] = defaultdict(int)
+    per_product: Dict[str, int] = defaultdict(int)
+    for line in lines:
+        pairs[(line['product_id'], line['branch_id'])] += line['quantity']
+        per_product[line['product_id']] += line['quantity']
+    branch_ids = {branch_id for _, branch_id in pairs}
+
+    with transaction.atomic():
+        products = {str(p.pk): p for p in Product.objects.filter(pk__in=per_product).only(
+            'pk', 'product_code', 'product_name', 'min_temperature', 'max_temperature',
+            'special_conditions')}
+        regions = {str(pk): region_id for pk, region_id in
+                   Branch.objects.filter(pk__in=branch_ids).values_list('pk', 'region_id')}
+        general = {str(g.pk): g for g in GeneralInventory.objects.select_for_update()
+                   .filter(pk__in=per_product).order_by('pk')}
+        regional = {(str(r.product_id), str(r.branch_id)): r for r in
+                    RegionalInventory.objects.select_for_update()
+                    .filter(product_id__in=per_product, branch_id__in=branch_ids)
+                    .order_by('product_id', 'branch_id')}
+
+        errors = [f'Producto inexistente: {pk}' for pk in per_product if pk not in products]
+        errors += [f'Sucursal inexistente: {pk}' for pk in branch_ids if pk not in regions]
+        for product_id, requested in per_product.items():
+            available = general[product_id].quantity if product_id in general else 0
+            if product_id in products and available < requested:
+                errors.append(f'Stock general insuficiente para {product_id}: '
+                              f'disponible {available}, solicitado {requested}')
+        if errors:
+            return {'success': False, 'error': errors[0], 'data': {'errors': errors}}
+
+        # En conflicto solo se actualiza la cantidad; el resto aplica a filas nuevas
+        rows = []
+        for (product_id, branch_id), quantity in pairs.items():
+            existing = regional.get((product_id, branch_id))
+            product = products[product_id]
+            rows.append(RegionalInventory(
+                product_id=product_id, branch_id=branch_id, region_id=regions[branch_id],
+                product_sku=product.product_code, product_name=product.product_name,
+                quantity=(existing.quantity if existing else 0) + quantity,
+                min_temperature=product.min_temperature,
+                max_temperature=product.max_temperature,
+                special_conditions=product.special_conditions,
+            ))
+        RegionalInventory.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['product', 'branch'],
+            update_fields=['quantity', 'last_updated'])
+
+        for product_id, quantity in per_product.items():
+            general[product_id].quantity -= quantity
+        GeneralInventory.objects.bulk_create(
+            list(general.values()), update_conflicts=True, unique_fields=['product'],
+            update_fields=['quantity', 'last_updated'])
+
+        transactions = InventoryTransaction.objects.bulk_create([
+            InventoryTransaction(
+                transaction_type='transfer', product_id=line['product_id'],
+                from_location_type='general', to_location_type='branch',
+                to_location_id=line['branch_id'], quantity=line['quantity'],
+                notes=line['notes'] or notes or 'Asignación a sucursal',
+                created_by=user,
+            ) for line in lines
+        ])
+        # bulk_create no dispara post_save: el resumen se actualiza aquí
+        apply_transactions(transactions)
+
+    return {
+        'success': True,
+        'message': f'✅ {len(pairs)} asignaciones registradas',
+        'data': {
+            'lines': len(lines),
+            'assignments': len(pairs),
+            'created': len(pairs) - len(regional),
+            'updated': len(regional),
+            'transactions': len(transactions),
+        },
+    }
@@ -0,0 +1,38 @@
+# backend/inventory/signals.py
+"""Mantener InventorySummary al día con las escrituras del ORM y el índice de búsqueda tras migrar."""
+
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_migrate, post_save
+from django.dispatch import receiver
+
+from .models import GeneralInventory, InventoryTransaction
+from .search import ensure_search_index
+from .summary import apply_transactions, refresh_product_status
+
+SEARCH_MIGRATION = ('inventory', '0007_product_search')
+
+
+@receiver(post_save, sender=InventoryTransaction, dispatch_uid='inventory_summary_transaction')
+def update_summary_on_transaction(sender, instance, created, raw=False, **kwargs):
+    # Las transacciones son de solo inserción; raw = carga de fixtures
+    if created and not raw:
+        apply_transactions([instance])
+
+
+@receiver(post_save, sender=GeneralInventory, dispatch_uid='inventory_summary_thresholds')
+def update_summary_on_thresholds(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Solo cambian los contadores bajo/alto; las cantidades llegan por transacción
+    if raw or (update_fields and not {'min_stock', 'max_stock'} & set(update_fields)):
+        return
+    refresh_product_status([instance.pk])
+
+
+@receiver(post_migrate, dispatch_uid='inventory_product_search')
+def restore_search_index(sender, using='default', **kwargs):
+    # En SQLite, Django recrea inventory_product al alterar columnas y los triggers se pierden
+    if sender.name != 'inventory':
+        return
+    connection = connections[using]
+    if SEARCH_MIGRATION in MigrationRecorder(connection).applied_migrations():
+        ensure_search_index(connection)
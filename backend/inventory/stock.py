@@ -0,0 +1,279 @@
+# backend/inventory/stock.py
+"""
+Movimientos de stock seguros ante concurrencia.
+
+Nada de leer la cantidad, sumarle en Python y guardar: los cambios se
+aplican con F() en un UPDATE condicionado (`quantity + delta >= 0`), así
+dos movimientos simultáneos nunca pisan el resultado del otro ni dejan
+stock negativo.
+
+Un lote de movimientos se aplica en una sola transacción:
+1. Los deltas se agregan por ubicación (inventario general del producto o
+   inventario de la sucursal)
+2. Se crean en cero las filas destino que falten
+3. Se bloquean las filas en orden determinista: primero general por
+   producto, luego sucursales por (producto, sucursal), y al final el
+   resumen (inventory/summary.py). `assign_to_branches` usa el mismo
+   orden, por eso lotes cruzados no se bloquean mutuamente (deadlock)
+4. Un UPDATE por tabla con CASE aplica todos los deltas y fija
+   last_updated (.update() no pasa por auto_now); si alguna fila no
+   cumple la condición se revierte el lote completo
+5. Se registran las InventoryTransaction con bulk_create
+"""
+
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+from django.utils import timezone
+
+from .models import Product, Branch, GeneralInventory, RegionalInventory, InventoryTransaction
+from .summary import apply_transactions, BRANCH_LOCATIONS
+
+TRANSACTION_TYPES = {choice for choice, _ in InventoryTransaction.TRANSACTION_TYPES}
+LOCATION_TYPES = {choice for choice, _ in InventoryTransaction.LOCATION_TYPES}
+
+
+class InsufficientStock(Exception):
+    """Algún movimiento dejaría stock negativo; el lote no se aplicó."""
+
+    def __init__(self, shortages: List[Dict]):
+        self.shortages = shortages
+        first = shortages[0]
+        super().__init__(
+            f"Stock insuficiente en {first['location']} {first['product_id']}"
+            f"{' / ' + first['branch_id'] if first.get('branch_id') else ''}: "
+            f"disponible {first['available']}, se requiere {first['required']}")
+
+
+# ============================================
+# PREPARACIÓN
+# ============================================
+
+def _uuid(index: int, value, name: str) -> str:
+    # Misma forma que devuelve la base, para comparar claves
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        raise ValueError(f'Movimiento {index}: {name} inválido: {value}')
+
+
+def _parse_movement(index: int, movement: Dict) -> Dict:
+    product_id = movement.get('product_id')
+    if not product_id:
+        raise ValueError(f'Movimiento {index}: falta product_id')
+    try:
+        quantity = int(movement.get('quantity'))
+    except (TypeError, ValueError):
+        raise ValueError(f'Movimiento {index}: cantidad inválida')
+    if quantity <= 0:
+        raise ValueError(f'Movimiento {index}: la cantidad debe ser mayor que cero')
+    transaction_type = movement.get('transaction_type', 'transfer')
+    if transaction_type not in TRANSACTION_TYPES:
+        raise ValueError(f'Movimiento {index}: tipo de transacción inválido: {transaction_type}')
+
+    reference_id = movement.get('reference_id')
+    parsed = {'product_id': _uuid(index, product_id, 'product_id'), 'quantity': quantity,
+              'transaction_type': transaction_type, 'notes': movement.get('notes'),
+              'reference_id': (_uuid(index, reference_id, 'reference_id')
+                               if reference_id else None)}
+    for side in ('from', 'to'):
+        location_type = movement.get(f'{side}_location_type')
+        location_id = movement.get(f'{side}_location_id')
+        if location_type is None and side == 'from':
+            parsed['from_location_type'] = parsed['from_location_id'] = None
+            continue
+        if location_type not in LOCATION_TYPES:
+            raise ValueError(f'Movimiento {index}: ubicación inválida: {location_type}')
+        if location_type in BRANCH_LOCATIONS and not location_id:
+            raise ValueError(f'Movimiento {index}: falta {side}_location_id de la sucursal')
+        parsed[f'{side}_location_type'] = location_type
+        parsed[f'{side}_location_id'] = (_uuid(index, location_id, f'{side}_location_id')
+                                          if location_id else None)
+    return parsed
+
+
+def _net_deltas(movements: List[Dict]) -> Tuple[Dict[str, int], Dict[Tuple[str, str], int]]:
+    """Deltas netos por producto (general) y por (producto, sucursal)."""
+    general: Dict[str, int] = defaultdict(int)
+    branches: Dict[Tuple[str, str], int] = defaultdict(int)
+    for movement in movements:
+        for side, sign in (('from', -1), ('to', 1)):
+            location_type = movement[f'{side}_location_type']
+            if location_type == 'general':
+                general[movement['product_id']] += sign * movement['quantity']
+            elif location_type in BRANCH_LOCATIONS:
+                key = (movement['product_id'], movement[f'{side}_location_id'])
+                branches[key] += sign * movement['quantity']
+    return ({k: v for k, v in general.items() if v},
+            {k: v for k, v in branches.items() if v})
+
+
+def ensure_branch_rows(keys: List[Tuple[str, str]]):
+    """Crear en cero las filas de sucursal destino que no existan."""
+    existing = set(RegionalInventory.objects.filter(
+        product_id__in={p for p, _ in keys}, branch_id__in={b for _, b in keys}
+    ).values_list('product_id', 'branch_id'))
+    existing = {(str(p), str(b)) for p, b in existing}
+    missing = [key for key in keys if key not in existing]
+    if not missing:
+        return
+    products = {str(p.pk): p for p in Product.objects.filter(pk__in={p for p, _ in missing})}
+    regions = {str(pk): region for pk, region in
+               Branch.objects.filter(pk__in={b for _, b in missing}).values_list('pk', 'region_id')}
+    unknown = [f'{p}/{b}' for p, b in missing if p not in products or b not in regions]
+    if unknown:
+        raise ValueError(f'Producto o sucursal inexistente: {", ".join(unknown[:5])}')
+    RegionalInventory.objects.bulk_create([
+        RegionalInventory(
+            product_id=p, branch_id=b, region_id=regions[b],
+            product_sku=products[p].product_code, product_name=products[p].product_name,
+            quantity=0, min_temperature=products[p].min_temperature,
+            max_temperature=products[p].max_temperature,
+            special_conditions=products[p].special_conditions,
+        ) for p, b in missing
+    ], ignore_conflicts=True)
+
+
+# ============================================
+# APLICACIÓN
+# ============================================
+
+def _apply_general(deltas: Dict[str, int]) -> List[Dict]:
+    if not deltas:
+        return []
+    targets = [pk for pk, delta in deltas.items() if delta > 0]
+    if targets:
+        if Product.objects.filter(pk__in=targets).count() != len(targets):
+            raise ValueError('Producto inexistente en el lote')
+        GeneralInventory.objects.bulk_create(
+            [GeneralInventory(product_id=pk, quantity=0) for pk in targets],
+            ignore_conflicts=True)
+
+    keys = sorted(deltas)
+    current = dict(GeneralInventory.objects.select_for_update()
+                   .filter(pk__in=keys).order_by('pk').values_list('pk', 'quantity'))
+    current = {str(pk): quantity for pk, quantity in current.items()}
+    shortages = [{'location': 'general', 'product_id': pk,
+                  'available': current.get(pk, 0), 'required': -delta}
+                 for pk, delta in deltas.items() if current.get(pk, 0) + delta < 0]
+    if shortages:
+        return shortages
+
+    # Condición por fila: quantity + delta >= 0 (redundante con el bloqueo
+    # en PostgreSQL; en SQLite la lectura previa no bloquea)
+    condition = Q()
+    for pk in keys:
+        condition |= Q(pk=pk, quantity__gte=-deltas[pk]) if deltas[pk] < 0 else Q(pk=pk)
+    updated = GeneralInventory.objects.filter(condition).update(
+        quantity=Case(*[When(pk=pk, then=F('quantity') + deltas[pk]) for pk in keys]),
+        last_updated=timezone.now())
+    if updated != len(keys):
+        raise InsufficientStock([{'location': 'general', 'product_id': pk,
+                                  'available': None, 'required': -deltas[pk]}
+                                 for pk in keys if deltas[pk] < 0])
+    return []
+
+
+def _apply_branches(deltas: Dict[Tuple[str, str], int]) -> List[Dict]:
+    if not deltas:
+        return []
+    targets = [key for key, delta in deltas.items() if delta > 0]
+    if targets:
+        ensure_branch_rows(targets)
+
+    keys = sorted(deltas)
+    rows = (RegionalInventory.objects.select_for_update()
+            .filter(product_id__in={p for p, _ in keys}, branch_id__in={b for _, b in keys})
+            .order_by('product_id', 'branch_id')
+            .values_list('id', 'product_id', 'branch_id', 'quantity'))
+    ids, current = {}, {}
+    for pk, product_id, branch_id, quantity in rows:
+        key = (str(product_id), str(branch_id))
+        if key in deltas:
+            ids[key], current[key] = pk, quantity
+    shortages = [{'location': 'branch', 'product_id': p, 'branch_id': b,
+                  'available': current.get((p, b), 0), 'required': -delta}
+                 for (p, b), delta in deltas.items() if current.get((p, b), 0) + delta < 0]
+    if shortages:
+        return shortages
+
+    condition = Q()
+    for key in keys:
+        delta = deltas[key]
+        condition |= Q(pk=ids[key], quantity__gte=-delta) if delta < 0 else Q(pk=ids[key])
+    updated = RegionalInventory.objects.filter(condition).update(
+        quantity=Case(*[When(pk=ids[key], then=F('quantity') + deltas[key]) for key in keys]),
+        last_updated=timezone.now())
+    if updated != len(keys):
+        raise InsufficientStock([{'location': 'branch', 'product_id': p, 'branch_id': b,
+                                  'available': None, 'required': -deltas[(p, b)]}
+                                 for p, b in keys if deltas[(p, b)] < 0])
+    return []
+
+
+def apply_movements(movements: Iterable[Dict], user=None) -> List[InventoryTransaction]:
+    """
+    Aplicar un lote de movimientos dentro de la transacción actual.
+
+    Args:
+        movements: [{'product_id', 'quantity', 'from_location_type',
+            'from_location_id', 'to_location_type', 'to_location_id',
+            'transaction_type', 'notes', 'reference_id'}]; las ubicaciones
+            'general', 'regional' y 'branch' mueven stock, el resto
+            (proveedor, cliente, pérdida...) es externo
+        user: Usuario que registra las transacciones (opcional)
+
+    Returns:
+        Transacciones creadas
+
+    Raises:
+        ValueError: Movimiento mal formado o producto/sucursal inexistente
+        InsufficientStock: Algún origen quedaría negativo (nada se aplica)
+    """
+    movements = [_parse_movement(i, m) for i, m in enumerate(movements)]
+    if not movements:
+        return []
+    general, branches = _net_deltas(movements)
+
+    with transaction.atomic():
+        shortages = _apply_general(general)
+        shortages += _apply_branches(branches) if not shortages else []
+        if shortages:
+            raise InsufficientStock(shortages)
+
+        transactions = InventoryTransaction.objects.bulk_create([
+            InventoryTransaction(
+                transaction_type=m['transaction_type'], product_id=m['product_id'],
+                from_location_type=m['from_location_type'],
+                from_location_id=m['from_location_id'],
+                to_location_type=m['to_location_type'], to_location_id=m['to_location_id'],
+                quantity=m['quantity'], notes=m['notes'], reference_id=m['reference_id'],
+                created_by=user,
+            ) for m in movements
+        ])
+        apply_transactions(transactions)
+    return transactions
+
+
+def move_stock(movements: Iterable[Dict], user=None) -> Dict:
+    """
+    Aplicar movimientos y devolver el resultado en el formato de las APIs.
+
+    Returns:
+        {'success', 'message', 'data': {'movements'}} o
+        {'success': False, 'error', 'data': {'shortages'}}
+    """
+    try:
+        transactions = apply_movements(movements, user=user)
+    except InsufficientStock as e:
+        return {'success': False, 'error': str(e), 'data': {'shortages': e.shortages}}
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}
+    return {
+        'success': True,
+        'message': f'✅ {len(transactions)} movimientos aplicados',
+        'data': {'movements': len(transactions)},
+    }
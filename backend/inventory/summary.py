@@ -0,0 +1,234 @@
+# backend/inventory/summary.py
+"""
+Mantenimiento incremental de InventorySummary.
+
+Cada InventoryTransaction mueve `quantity` unidades de `from_location` a
+`to_location`. Solo cuentan como stock las ubicaciones internas:
+- 'general': inventario general del producto
+- 'regional' / 'branch': inventario de la sucursal `*_location_id`
+  (la región se toma de la sucursal)
+Proveedor, cliente, pérdida y externo quedan fuera del inventario, así
+que una venta resta y una compra suma, mientras que una transferencia
+interna solo cambia los totales por sucursal/región.
+
+`apply_transactions()` agrega los deltas de un lote. Las filas de
+producto se bloquean (en orden de clave) porque sus banderas bajo/alto
+dependen de la cantidad resultante; sucursal, región y la fila global
+se suman con UPDATE ... SET x = x + delta al final, así que dos
+escritores solo se esperan si tocan el mismo producto o desde ese último
+UPDATE hasta el commit. Las filas nuevas se crean con
+INSERT ... ON CONFLICT DO NOTHING RETURNING, para que product_count y
+branch_count cuenten solo las que insertó esta transacción. La señal
+post_save lo llama por cada transacción; las cargas con bulk_create
+deben llamarlo ellas mismas.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import (Branch, GeneralInventory, RegionalInventory, InventorySummary,
+                     InventoryTransaction)
+
+GLOBAL_KEY = ''
+BRANCH_LOCATIONS = ('regional', 'branch')
+INSERT_BATCH_SIZE = 500
+
+
+def stock_flags(quantity: int, min_stock: Optional[int], max_stock: Optional[int]) -> Tuple[int, int]:
+    """(bajo, alto) con las mismas reglas que GeneralInventory.status."""
+    if min_stock and quantity <= min_stock:
+        return 1, 0
+    if max_stock and quantity >= max_stock:
+        return 0, 1
+    return 0, 0
+
+
+def _location_delta(location_type: Optional[str], location_id, quantity: int, sign: int,
+                    products, generals, branches, product_id: str):
+    if location_type == 'general':
+        products[product_id] += sign * quantity
+        generals[product_id] += sign * quantity
+    elif location_type in BRANCH_LOCATIONS:
+        products[product_id] += sign * quantity
+        if location_id:
+            branches[str(location_id)] += sign * quantity
+
+
+def _insert_missing(scope: str, keys: Iterable[str]) -> Set[str]:
+    """
+    Crear las filas del alcance que no existan.
+
+    Returns:
+        Claves insertadas por esta transacción (si otra crea la misma fila
+        a la vez, solo una de las dos la cuenta)
+    """
+    keys = sorted(set(keys))  # Mismo orden en todos los escritores
+    existing = set(InventorySummary.objects.filter(scope=scope, key__in=keys)
+                   .values_list('key', flat=True))
+    missing = [key for key in keys if key not in existing]
+    if not missing:
+        return set()
+
+    qn = connection.ops.quote_name
+    columns = ('scope', 'key', 'total_quantity', 'general_quantity', 'low_stock_count',
+               'high_stock_count', 'product_count', 'branch_count', 'updated_at')
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    inserted = set()
+    with connection.cursor() as cursor:
+        for start in range(0, len(missing), INSERT_BATCH_SIZE):
+            chunk = missing[start:start + INSERT_BATCH_SIZE]
+            cursor.execute(
+                f'INSERT INTO {qn(InventorySummary._meta.db_table)} '
+                f'({", ".join(qn(c) for c in columns)}) VALUES '
+                + ', '.join(['(%s, %s, 0, 0, 0, 0, 0, 0, %s)'] * len(chunk))
+                + f' ON CONFLICT ({qn("scope")}, {qn("key")}) DO NOTHING RETURNING {qn("key")}',
+                [value for key in chunk for value in (scope, key, now)])
+            inserted.update(row[0] for row in cursor.fetchall())
+    return inserted
+
+
+def _increment(scope: str, deltas: Dict[str, Dict[str, int]]):
+    """Sumar con UPDATE ... SET campo = campo + delta, una fila a la vez en orden de clave."""
+    now = timezone.now()
+    for key in sorted(deltas):
+        fields = {field: F(field) + delta for field, delta in deltas[key].items() if delta}
+        if fields:
+            InventorySummary.objects.filter(scope=scope, key=key).update(**fields, updated_at=now)
+
+
+def _lock_products(keys: Iterable[str]) -> List[InventorySummary]:
+    return list(InventorySummary.objects.select_for_update()
+                .filter(scope='product', key__in=list(keys)).order_by('key'))
+
+
+@transaction.atomic
+def apply_transactions(transactions: Iterable[InventoryTransaction]):
+    """Sumar al resumen los movimientos de un lote de transacciones."""
+    products, generals, branches = defaultdict(int), defaultdict(int), defaultdict(int)
+    for tx in transactions:
+        product_id = str(tx.product_id)
+        _location_delta(tx.from_location_type, tx.from_location_id, tx.quantity, -1,
+                        products, generals, branches, product_id)
+        _location_delta(tx.to_location_type, tx.to_location_id, tx.quantity, 1,
+                        products, generals, branches, product_id)
+
+    products = {k: v for k, v in products.items() if v or generals[k]}
+    branches = {k: v for k, v in branches.items() if v}
+    if not products and not branches:
+        return
+
+    regions = defaultdict(int)
+    if branches:
+        for branch_id, region_id in Branch.objects.filter(pk__in=branches).values_list('pk', 'region_id'):
+            regions[str(region_id)] += branches[str(branch_id)]
+
+    totals = defaultdict(int)
+    totals['product_count'] = len(_insert_missing('product', products))
+    rows = _lock_products(products)
+    # Después del bloqueo: refresh_product_status pudo cambiar las banderas
+    thresholds = {
+        str(pk): (low, high) for pk, low, high in GeneralInventory.objects
+        .filter(pk__in=[k for k in products if generals[k]])
+        .values_list('pk', 'min_stock', 'max_stock')
+    }
+    now = timezone.now()
+    for row in rows:
+        row.total_quantity += products[row.key]
+        if generals[row.key]:
+            row.general_quantity += generals[row.key]
+            low, high = stock_flags(row.general_quantity, *thresholds.get(row.key, (None, None)))
+            totals['low_stock_count'] += low - row.low_stock_count
+            totals['high_stock_count'] += high - row.high_stock_count
+            row.low_stock_count, row.high_stock_count = low, high
+        totals['total_quantity'] += products[row.key]
+        totals['general_quantity'] += generals[row.key]
+        row.updated_at = now  # bulk_update no aplica auto_now
+    InventorySummary.objects.bulk_update(rows, [
+        'total_quantity', 'general_quantity', 'low_stock_count', 'high_stock_count', 'updated_at',
+    ])
+
+    totals['branch_count'] = len(_insert_missing('branch', branches))
+    _insert_missing('region', regions)
+    _insert_missing('global', [GLOBAL_KEY])
+    _increment('branch', {key: {'total_quantity': delta} for key, delta in branches.items()})
+    _increment('region', {key: {'total_quantity': delta} for key, delta in regions.items()})
+    _increment('global', {GLOBAL_KEY: totals})
+
+
+@transaction.atomic
+def refresh_product_status(product_ids: Iterable):
+    """Recalcular bajo/alto stock tras cambiar min_stock/max_stock."""
+    rows = _lock_products(str(pk) for pk in product_ids)
+    if not rows:
+        return
+    thresholds = dict(
+        (str(pk), (low, high)) for pk, low, high in GeneralInventory.objects
+        .filter(pk__in=[row.key for row in rows]).values_list('pk', 'min_stock', 'max_stock'))
+    totals = defaultdict(int)
+    now = timezone.now()
+    for row in rows:
+        low, high = stock_flags(row.general_quantity, *thresholds.get(row.key, (None, None)))
+        totals['low_stock_count'] += low - row.low_stock_count
+        totals['high_stock_count'] += high - row.high_stock_count
+        row.low_stock_count, row.high_stock_count = low, high
+        row.updated_at = now
+    InventorySummary.objects.bulk_update(rows, ['low_stock_count', 'high_stock_count', 'updated_at'])
+    _insert_missing('global', [GLOBAL_KEY])
+    _increment('global', {GLOBAL_KEY: totals})
+
+
+@transaction.atomic
+def rebuild_summary() -> Dict[str, int]:
+    """
+    Recalcular el resumen completo desde GeneralInventory y RegionalInventory.
+
+    Returns:
+        Filas creadas por alcance
+    """
+    products: Dict[str, InventorySummary] = {}
+
+    def product_row(key):
+        if key not in products:
+            products[key] = InventorySummary(scope='product', key=key)
+        return products[key]
+
+    for pk, quantity, low, high in GeneralInventory.objects.values_list(
+            'pk', 'quantity', 'min_stock', 'max_stock').iterator():
+        row = product_row(str(pk))
+        row.general_quantity = row.total_quantity = quantity
+        row.low_stock_count, row.high_stock_count = stock_flags(quantity, low, high)
+
+    for pk, quantity in (RegionalInventory.objects.values('product_id')
+                         .annotate(total=Sum('quantity')).values_list('product_id', 'total')):
+        product_row(str(pk)).total_quantity += quantity or 0
+
+    branches = [InventorySummary(scope='branch', key=str(pk), total_quantity=total or 0)
+                for pk, total in RegionalInventory.objects.values('branch_id')
+                .annotate(total=Sum('quantity')).values_list('branch_id', 'total')]
+    regions = [InventorySummary(scope='region', key=str(pk), total_quantity=total or 0)
+               for pk, total in RegionalInventory.objects.values('branch__region_id')
+               .annotate(total=Sum('quantity')).values_list('branch__region_id', 'total')]
+
+    totals = InventorySummary(
+        scope='global', key=GLOBAL_KEY,
+        total_quantity=sum(row.total_quantity for row in products.values()),
+        general_quantity=sum(row.general_quantity for row in products.values()),
+        low_stock_count=sum(row.low_stock_count for row in products.values()),
+        high_stock_count=sum(row.high_stock_count for row in products.values()),
+        product_count=len(products),
+        branch_count=len(branches),
+    )
+
+    InventorySummary.objects.all().delete()
+    InventorySummary.objects.bulk_create([totals, *products.values(), *branches, *regions],
+                                         batch_size=1000)
+    return {'products': len(products), 'branches': len(branches), 'regions': len(regions)}
+
+
+def get_summary(scope: str = 'global', key: str = GLOBAL_KEY) -> Optional[InventorySummary]:
+    """Leer una fila del resumen (una consulta por clave única)."""
+    return InventorySummary.objects.filter(scope=scope, key=key).first()
@@ -1,3 +1,182 @@
+import csv
+import io
+from datetime import timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from .exports import export_stream
+from .feed import transaction_feed
+from .models import (Branch, GeneralInventory, InventoryTransaction, Product, Region,
+                     RegionalInventory)
+from .services import assign_to_branches, create_general_inventory_batch
+from .stock import InsufficientStock, apply_movements
+from .summary import get_summary
+
+
+class InventoryTestCase(TestCase):
+    """Una región, dos sucursales y un producto con 100 unidades en el inventario general."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.region = Region.objects.create(name='Andina', climate_type='templado')
+        cls.branch = Branch.objects.create(branch_code='B1', name='Centro', region=cls.region,
+                                           address='-', contact_phone='-')
+        cls.other_branch = Branch.objects.create(branch_code='B2', name='Norte', region=cls.region,
+                                                 address='-', contact_phone='-')
+        cls.product = Product.objects.create(product_code='P1', product_name='Vacuna',
+                                             category='medicamentos')
+        result = create_general_inventory_batch(
+            [{'product_id': cls.product.pk, 'quantity': 100, 'min_stock': 10}])
+        assert result['success'], result
+
+    def movement(self, quantity, **locations):
+        return {'product_id': str(self.product.pk), 'quantity': quantity,
+                'transaction_type': 'transfer', **locations}
+
+    def totals(self, scope='global', key=''):
+        summary = get_summary(scope, key)
+        return (summary.total_quantity, summary.general_quantity) if summary else (0, 0)
+
+
+# ============================================
+# MOVIMIENTOS DE STOCK
+# ============================================
+
+class ApplyMovementsTests(InventoryTestCase):
+
+    def test_rejects_movement_that_leaves_negative_stock(self):
+        with self.assertRaises(InsufficientStock) as raised:
+            apply_movements([self.movement(150, from_location_type='general',
+                                           to_location_type='branch',
+                                           to_location_id=str(self.branch.pk))])
+
+        self.assertEqual(raised.exception.shortages[0]['required'], 150)
+        self.assertEqual(GeneralInventory.objects.get(product=self.product).quantity, 100)
+        self.assertFalse(RegionalInventory.objects.exists())
+        self.assertFalse(InventoryTransaction.objects.filter(transaction_type='transfer').exists())
+
+    def test_rejects_whole_batch_when_one_movement_is_short(self):
+        with self.assertRaises(InsufficientStock):
+            apply_movements([
+                self.movement(40, from_location_type='general', to_location_type='branch',
+                              to_location_id=str(self.branch.pk)),
+                self.movement(41, from_location_type='branch', from_location_id=str(self.branch.pk),
+                              to_location_type='customer'),
+            ])
+
+        self.assertEqual(GeneralInventory.objects.get(product=self.product).quantity, 100)
+        self.assertEqual(self.totals(), (100, 100))
+
+    def test_rejects_malformed_reference_id(self):
+        with self.assertRaises(ValueError):
+            apply_movements([self.movement(1, from_location_type='general',
+                                           to_location_type='customer', reference_id='x')])
+
+    def test_summary_deltas_after_movement(self):
+        apply_movements([
+            self.movement(30, from_location_type='general', to_location_type='branch',
+                          to_location_id=str(self.branch.pk)),
+            self.movement(5, from_location_type='branch', from_location_id=str(self.branch.pk),
+                          to_location_type='customer'),
+        ])
+
+        self.assertEqual(self.totals(), (95, 70))
+        self.assertEqual(self.totals('product', str(self.product.pk)), (95, 70))
+        self.assertEqual(self.totals('branch', str(self.branch.pk)), (25, 0))
+        self.assertEqual(self.totals('region', str(self.region.pk)), (25, 0))
+        self.assertEqual(
+            RegionalInventory.objects.get(product=self.product, branch=self.branch).quantity, 25)
+
+
+class AssignToBranchesTests(InventoryTestCase):
+
+    def test_summary_deltas_after_assign(self):
+        result = assign_to_branches([
+            {'product_id': self.product.pk, 'branch_id': self.branch.pk, 'quantity': 30},
+            {'product_id': self.product.pk, 'branch_id': self.other_branch.pk, 'quantity': 20},
+        ])
+
+        self.assertTrue(result['success'], result)
+        self.assertEqual(self.totals(), (100, 50))
+        self.assertEqual(self.totals('branch', str(self.branch.pk)), (30, 0))
+        self.assertEqual(self.totals('branch', str(self.other_branch.pk)), (20, 0))
+        self.assertEqual(self.totals('region', str(self.region.pk)), (50, 0))
+
+    def test_assign_over_general_stock_changes_nothing(self):
+        result = assign_to_branches(
+            [{'product_id': self.product.pk, 'branch_id': self.branch.pk, 'quantity': 101}])
+
+        self.assertFalse(result['success'])
+        self.assertEqual(self.totals(), (100, 100))
+        self.assertIsNone(get_summary('branch', str(self.branch.pk)))
+
+
+# ============================================
+# FEED DE TRANSACCIONES
+# ============================================
+
+class TransactionFeedTests(InventoryTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        InventoryTransaction.objects.all().delete()
+        created = [InventoryTransaction.objects.create(
+            transaction_type='sale', product=cls.product, from_location_type='general',
+            to_location_type='customer', quantity=i + 1) for i in range(7)]
+        # Tres filas con el mismo created_at: el id desempata
+        base = timezone.now() - timedelta(hours=1)
+        for i, row in enumerate(created):
+            InventoryTransaction.objects.filter(pk=row.pk).update(
+                created_at=base + timedelta(minutes=min(i, 3)))
+
+    def test_keyset_pages_cover_every_row_once_in_order(self):
+        expected = [str(pk) for pk in InventoryTransaction.objects.order_by(
+            '-created_at', '-id').values_list('id', flat=True)]
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = transaction_feed(cursor=cursor, limit=3)
+            seen += [row['id'] for row in page['results']]
+            pages += 1
+            if not page['has_more']:
+                self.assertIsNone(page['next_cursor'])
+                break
+            cursor = page['next_cursor']
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+
+    def test_location_filter_matches_type_and_id_on_the_same_side(self):
+        InventoryTransaction.objects.create(
+            transaction_type='transfer', product=self.product,
+            from_location_type='branch', from_location_id=self.other_branch.pk,
+            to_location_type='regional', to_location_id=self.branch.pk, quantity=1)
+
+        page = transaction_feed(location_type='branch', location_id=str(self.branch.pk))
+
+        self.assertEqual(page['results'], [])
+
+
+# ============================================
+# EXPORTACIÓN
+# ============================================
+
+class ExportTests(InventoryTestCase):
+
+    def read_csv(self, dataset, **filters):
+        chunks, _ = export_stream(dataset, 'csv', filters=filters, chunk_size=2)
+        return list(csv.reader(io.StringIO(b''.join(chunks).decode())))
+
+    def test_export_row_counts(self):
+        assign_to_branches([
+            {'product_id': self.product.pk, 'branch_id': self.branch.pk, 'quantity': 30},
+            {'product_id': self.product.pk, 'branch_id': self.other_branch.pk, 'quantity': 20},
+        ])
 
-# Create your tests here.
+        self.assertEqual(len(self.read_csv('general')) - 1, 1)
+        self.assertEqual(len(self.read_csv('regional')) - 1, 2)
+        self.assertEqual(len(self.read_csv('regional', branch_id=str(self.branch.pk))) - 1, 1)
+        self.assertEqual(len(self.read_csv('transactions')) - 1,
+                         InventoryTransaction.objects.count())
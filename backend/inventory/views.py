@@ -1,9 +1,28 @@
 # backend/inventory/views.py
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.utils.decorators import method_decorator
+from datetime import timedelta
+import gzip
 import json
+import uuid
+
+from rest_framework.exceptions import AuthenticationFailed
+
+from shared.authentication import SupabaseJWTAuthentication, GLOBAL_ROLES, django_user
+
+from .services import create_general_inventory_batch, assign_to_branches
+from .exports import export_stream
+from .feed import transaction_feed, InvalidCursor, DEFAULT_LIMIT
+from .imports import import_inventory, detect_format, DEFAULT_BATCH_SIZE
+from .ledger import stock_as_of
+from .rollups import trends, get_watermark
+from .search import search_products, autocomplete_products, DEFAULT_LIMIT as SEARCH_LIMIT, AUTOCOMPLETE_LIMIT
+from .stock import move_stock
+from .summary import get_summary
 
 # ==================== VIEWS BÁSICAS ====================
 
@@ -23,68 +42,146 @@ class SimpleHelloAPIView(View):
             'version': '1.0'
         })
 
+# ==================== AUTENTICACIÓN ====================
+
+def authenticate_request(request, roles=()):
+    """
+    Validar el token de Supabase del request (vistas de Django, sin DRF).
+    
+    Args:
+        roles: Roles aceptados (vacío = cualquier usuario autenticado)
+    
+    Returns:
+        (SupabaseUser, None) o (None, JsonResponse 401 sin token válido /
+        403 sin el rol)
+    """
+    try:
+        auth = SupabaseJWTAuthentication().authenticate(request)
+    except AuthenticationFailed as e:
+        return None, JsonResponse({'success': False, 'error': str(e.detail)}, status=401)
+    if auth is None:
+        return None, JsonResponse({
+            'success': False,
+            'error': 'Falta el token (Authorization: Bearer <token>)'
+        }, status=401)
+    if roles and not auth[0].has_role(*roles):
+        return None, JsonResponse({
+            'success': False,
+            'error': 'No tiene el rol requerido para esta operación'
+        }, status=403)
+    return auth[0], None
+
 # ==================== CRUD API VIEWS ====================
 
 @method_decorator(csrf_exempt, name='dispatch')
 class AssignToBranchAPIView(View):
-    """API para asignar productos a sucursales"""
+    """
+    API para asignar productos a sucursales.
+    
+    Acepta una línea {product_id, branch_id, quantity, notes}, una lista de
+    líneas o {"items": [...], "notes": ...}; el stock sale del inventario
+    general y todo se aplica en una sola transacción (ver
+    inventory/services.py::assign_to_branches). Exige un token de Supabase
+    con rol admin o service_role; las transacciones quedan a su nombre.
+    """
+    
+    required_roles = GLOBAL_ROLES
     
     def post(self, request):
+        principal, denied = authenticate_request(request, self.required_roles)
+        if denied:
+            return denied
         try:
             data = json.loads(request.body)
-            # Simulación - luego integraremos con PostgreSQL
-            return JsonResponse({
-                'success': True,
-                'message': f"Producto asignado exitosamente a sucursal",
-                'data': {
-                    'product_id': data.get('product_id', ''),
-                    'branch_id': data.get('branch_id', ''),
-                    'quantity': data.get('quantity', 0),
-                    'timestamp': '2024-01-01T00:00:00Z'  # Temporal
-                }
-            })
+            notes = data.get('notes') if isinstance(data, dict) and 'items' in data else None
+            lines = data.get('items', [data]) if isinstance(data, dict) else data
+            result = assign_to_branches(lines, user=django_user(principal), notes=notes)
+            return JsonResponse(result, status=200 if result['success'] else 400)
         except json.JSONDecodeError:
             return JsonResponse({
                 'success': False,
                 'error': 'JSON inválido'
             }, status=400)
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
         except Exception as e:
             return JsonResponse({
                 'success': False,
                 'error': str(e)
             }, status=500)
 
-@method_decorator(csrf_exempt, name='dispatch')  
-@csrf_exempt
-def create_general_inventory_api(request):
-    """Crea inventario general usando función PostgreSQL"""
-    if request.method == 'POST':
+@method_decorator(csrf_exempt, name='dispatch')
+class CreateGeneralInventoryAPIView(View):
+    """
+    API para crear/actualizar inventario general.
+    
+    Acepta un item, una lista de items o {"items": [...]}; todo se escribe
+    en una sola transacción (ver inventory/services.py). Exige un token de
+    Supabase con rol admin o service_role.
+    """
+    
+    required_roles = GLOBAL_ROLES
+    
+    def post(self, request):
+        principal, denied = authenticate_request(request, self.required_roles)
+        if denied:
+            return denied
         try:
             data = json.loads(request.body)
-            with connection.cursor() as cursor:
-                cursor.callproc('create_general_inventory', [
-                    data['product_id'],
-                    data['quantity'],
-                    data.get('min_stock'),
-                    data.get('max_stock'),
-                    data.get('location'),
-                    data.get('notes', '')
-                ])
-                result = cursor.fetchone()
-            return JsonResponse(result[0] if result else {'success': False})
+            items = data.get('items', [data]) if isinstance(data, dict) else data
+            result = create_general_inventory_batch(items, user=django_user(principal))
+            return JsonResponse(result, status=200 if result['success'] else 400)
+        except json.JSONDecodeError:
+            return JsonResponse({
+                'success': False,
+                'error': 'JSON inválido'
+            }, status=400)
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
         except Exception as e:
-            return JsonResponse({'success': False, 'error': str(e)})
-class CreateGeneralInventoryAPIView(View):
-    """API para crear/actualizar inventario general"""
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=500)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class StockMovementAPIView(View):
+    """
+    API para mover stock entre ubicaciones.
+    
+    Acepta un movimiento {product_id, quantity, from_location_type,
+    from_location_id, to_location_type, to_location_id, transaction_type,
+    notes}, una lista o {"items": [...]}. Los deltas se aplican con UPDATE
+    condicionados en una sola transacción (ver inventory/stock.py); si
+    algún origen quedaría negativo no se aplica nada y responde 409.
+    Exige un token de Supabase con rol admin o service_role; las
+    transacciones quedan a su nombre.
+    """
+    
+    required_roles = GLOBAL_ROLES
     
     def post(self, request):
+        principal, denied = authenticate_request(request, self.required_roles)
+        if denied:
+            return denied
         try:
             data = json.loads(request.body)
+            movements = data.get('items', [data]) if isinstance(data, dict) else data
+            result = move_stock(movements, user=django_user(principal))
+            if result['success']:
+                return JsonResponse(result)
+            return JsonResponse(result, status=409 if 'shortages' in result.get('data', {}) else 400)
+        except json.JSONDecodeError:
             return JsonResponse({
-                'success': True,
-                'message': 'Inventario general actualizado',
-                'data': data
-            })
+                'success': False,
+                'error': 'JSON inválido'
+            }, status=400)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -92,19 +189,426 @@ class CreateGeneralInventoryAPIView(View):
             }, status=500)
 
 class InventorySummaryAPIView(View):
-    """API para resumen del inventario"""
+    """
+    API para resumen del inventario.
+    
+    Lee una sola fila precalculada de InventorySummary (global, o la de
+    ?product_id= / ?branch_id= / ?region_id=), sin recorrer el inventario.
+    """
+    
+    SCOPE_PARAMS = (('product_id', 'product'), ('branch_id', 'branch'), ('region_id', 'region'))
+    
+    def get(self, request):
+        scope, key, key_param = 'global', '', None
+        for param, param_scope in self.SCOPE_PARAMS:
+            if request.GET.get(param):
+                try:
+                    # Misma forma de la clave que guarda inventory/summary.py
+                    key = str(uuid.UUID(request.GET[param]))
+                except ValueError:
+                    return JsonResponse({
+                        'success': False,
+                        'error': f'{param} inválido'
+                    }, status=400)
+                scope, key_param = param_scope, param
+                break
+        
+        summary = get_summary(scope, key)
+        if summary is None and scope != 'global':
+            return JsonResponse({
+                'success': False,
+                'error': f'Sin inventario registrado para {scope} {key}'
+            }, status=404)
+        
+        data = {
+            'scope': scope,
+            'total_stock': summary.total_quantity if summary else 0,
+            'general_stock': summary.general_quantity if summary else 0,
+            'low_stock_count': summary.low_stock_count if summary else 0,
+            'high_stock_count': summary.high_stock_count if summary else 0,
+            'updated_at': summary.updated_at.isoformat() if summary else None,
+            'message': 'Sistema de inventario activo',
+        }
+        if scope == 'global':
+            data['total_products'] = summary.product_count if summary else 0
+            data['total_branches'] = summary.branch_count if summary else 0
+        else:
+            data[key_param] = key
+        return JsonResponse({'success': True, 'data': data})
+
+class StockAsOfAPIView(View):
+    """
+    API para consultar el stock a una fecha desde el ledger.
+    
+    ?as_of= (ISO 8601, por defecto ahora) y filtros opcionales ?product_id=,
+    ?branch_id= y ?location=general|branch. Toma el último corte anterior
+    a la fecha y reaplica solo las transacciones posteriores (ver
+    inventory/ledger.py).
+    """
     
     def get(self, request):
+        as_of = None
+        if request.GET.get('as_of'):
+            # Un '+00:00' sin codificar llega como espacio
+            as_of = parse_datetime(request.GET['as_of'].replace(' ', '+'))
+            if as_of is None:
+                return JsonResponse({
+                    'success': False,
+                    'error': 'as_of inválido, usar ISO 8601 (ej: 2025-01-31T23:59:59)'
+                }, status=400)
+            if timezone.is_naive(as_of):
+                as_of = timezone.make_aware(as_of)
+        
+        location_type = request.GET.get('location')
+        if location_type not in (None, 'general', 'branch'):
+            return JsonResponse({
+                'success': False,
+                'error': 'location debe ser general o branch'
+            }, status=400)
+        try:
+            product_id = str(uuid.UUID(request.GET['product_id'])) if request.GET.get('product_id') else None
+            branch_id = str(uuid.UUID(request.GET['branch_id'])) if request.GET.get('branch_id') else None
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'product_id o branch_id inválido'
+            }, status=400)
+        if branch_id:
+            location_type = 'branch'
+        
+        balances, checkpoint = stock_as_of(as_of, product_id=product_id,
+                                           location_type=location_type, location_key=branch_id)
+        rows = [
+            {'product_id': product, 'location_type': row_type, 'branch_id': key or None,
+             'quantity': quantity}
+            for (product, row_type, key), quantity in sorted(balances.items())
+        ]
         return JsonResponse({
             'success': True,
             'data': {
-                'total_products': 0,
-                'total_branches': 0,
-                'total_stock': 0,
-                'message': 'Sistema de inventario activo'
+                'as_of': (as_of or timezone.now()).isoformat(),
+                'checkpoint_as_of': checkpoint.as_of.isoformat() if checkpoint else None,
+                'total_quantity': sum(balances.values()),
+                'balances': rows,
             }
         })
 
+class TransactionFeedAPIView(View):
+    """
+    API para listar transacciones de inventario (más recientes primero).
+    
+    Paginación por cursor: la respuesta trae `next_cursor` y la siguiente
+    página se pide con ?cursor=<next_cursor>; el tiempo por página no crece
+    con la profundidad (ver inventory/feed.py). Filtros opcionales:
+    ?product_id=, ?type=sale,transfer, ?location_type=, ?location_id=,
+    ?since= / ?until= (ISO 8601) y ?limit= (máximo 500). Con
+    ?include_archived=1 sigue con los meses archivados al agotar la tabla.
+    Exige un token de Supabase válido.
+    """
+    
+    def get(self, request):
+        _, denied = authenticate_request(request)
+        if denied:
+            return denied
+        params = request.GET
+        try:
+            product_id = str(uuid.UUID(params['product_id'])) if params.get('product_id') else None
+            location_id = str(uuid.UUID(params['location_id'])) if params.get('location_id') else None
+            limit = int(params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'product_id, location_id o limit inválido'
+            }, status=400)
+        
+        dates = {}
+        for name in ('since', 'until'):
+            if params.get(name):
+                value = parse_datetime(params[name].replace(' ', '+'))
+                if value is None:
+                    return JsonResponse({
+                        'success': False,
+                        'error': f'{name} inválido, usar ISO 8601'
+                    }, status=400)
+                dates[name] = timezone.make_aware(value) if timezone.is_naive(value) else value
+        
+        try:
+            page = transaction_feed(
+                cursor=params.get('cursor'),
+                limit=limit,
+                product_id=product_id,
+                transaction_types=[t for t in params.get('type', '').split(',') if t],
+                location_type=params.get('location_type'),
+                location_id=location_id,
+                include_archived=params.get('include_archived') in ('1', 'true'),
+                **dates,
+            )
+        except InvalidCursor as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        
+        return JsonResponse({
+            'success': True,
+            'data': page['results'],
+            'count': len(page['results']),
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more'],
+        })
+
+class TransactionTrendsAPIView(View):
+    """
+    API de tendencias diarias de transacciones (consumo, pérdidas, devoluciones).
+    
+    Lee solo el rollup diario (ver inventory/rollups.py). Parámetros:
+    ?days= (por defecto 90, máximo 730), ?product_id=, ?branch_id=,
+    ?type=sale,waste y ?group=day|product (una serie total o una por
+    producto). `refreshed_through` indica hasta dónde está al día el rollup.
+    Exige un token de Supabase válido.
+    """
+    
+    MAX_DAYS = 730
+    
+    def get(self, request):
+        _, denied = authenticate_request(request)
+        if denied:
+            return denied
+        params = request.GET
+        try:
+            days = int(params.get('days', 90))
+            product_id = str(uuid.UUID(params['product_id'])) if params.get('product_id') else None
+            branch_id = str(uuid.UUID(params['branch_id'])) if params.get('branch_id') else None
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'days, product_id o branch_id inválido'
+            }, status=400)
+        if not 1 <= days <= self.MAX_DAYS:
+            return JsonResponse({
+                'success': False,
+                'error': f'days debe estar entre 1 y {self.MAX_DAYS}'
+            }, status=400)
+        group = params.get('group', 'day')
+        if group not in ('day', 'product'):
+            return JsonResponse({
+                'success': False,
+                'error': 'group debe ser day o product'
+            }, status=400)
+        
+        end = timezone.localdate()
+        rows = trends(days=days, end=end, product_id=product_id, branch_id=branch_id,
+                      transaction_types=[t for t in params.get('type', '').split(',') if t],
+                      group=group)
+        
+        def point(row):
+            return {'day': row['day'].isoformat(), 'net': row['net'], 'gross': row['gross'],
+                    'transactions': row['transactions']}
+        
+        if group == 'product':
+            series = {}
+            for row in rows:
+                product = str(row['product_id'])
+                series.setdefault(product, {'product_id': product, 'points': []})['points'].append(point(row))
+            series = list(series.values())
+        else:
+            series = [point(row) for row in rows]
+        
+        mark = get_watermark()
+        return JsonResponse({
+            'success': True,
+            'data': {
+                'from': (end - timedelta(days=days - 1)).isoformat(),
+                'to': end.isoformat(),
+                'refreshed_through': mark.created_at.isoformat() if mark and mark.created_at else None,
+                'series': series,
+            }
+        })
+
+@method_decorator(csrf_exempt, name='dispatch')
+class InventoryImportAPIView(View):
+    """
+    API para importar productos e inventario desde un archivo.
+    
+    Recibe multipart/form-data con el campo `file` (.csv, .ndjson o .jsonl,
+    opcionalmente .gz). Django guarda en disco los archivos grandes y el
+    archivo se procesa en streaming por lotes (ver inventory/imports.py).
+    Parámetros opcionales: ?format=csv|ndjson, ?batch_size= y ?dry_run=1.
+    Responde 200 con los contadores y los errores por línea; `success`
+    es false si alguna fila se saltó.
+    
+    Puede reemplazar el catálogo y fijar el stock de todas las sucursales,
+    así que exige un token de Supabase con rol admin o service_role
+    (401 sin token válido, 403 con otro rol); los ajustes quedan a su
+    nombre.
+    """
+    
+    MAX_BATCH_SIZE = 10000
+    required_roles = GLOBAL_ROLES
+    
+    def post(self, request):
+        principal, denied = authenticate_request(request, self.required_roles)
+        if denied:
+            return denied
+        
+        upload = request.FILES.get('file')
+        if upload is None:
+            return JsonResponse({
+                'success': False,
+                'error': 'Falta el archivo (campo file)'
+            }, status=400)
+        fmt = request.GET.get('format') or detect_format(upload.name)
+        if fmt is None:
+            return JsonResponse({
+                'success': False,
+                'error': 'No se reconoce el formato: usar ?format=csv|ndjson'
+            }, status=400)
+        try:
+            batch_size = int(request.GET.get('batch_size', DEFAULT_BATCH_SIZE))
+        except ValueError:
+            batch_size = 0
+        if not 1 <= batch_size <= self.MAX_BATCH_SIZE:
+            return JsonResponse({
+                'success': False,
+                'error': f'batch_size debe estar entre 1 y {self.MAX_BATCH_SIZE}'
+            }, status=400)
+        
+        stream = upload.file
+        if upload.name.lower().endswith('.gz'):
+            stream = gzip.GzipFile(fileobj=stream)
+        try:
+            result = import_inventory(stream, fmt, batch_size=batch_size, user=django_user(principal),
+                                      dry_run=request.GET.get('dry_run') in ('1', 'true'))
+        except (ValueError, UnicodeDecodeError, OSError) as e:
+            return JsonResponse({
+                'success': False,
+                'error': f'Archivo inválido: {e}'
+            }, status=400)
+        return JsonResponse(result)
+
+class InventoryExportAPIView(View):
+    """
+    API para exportar inventario o transacciones como archivo.
+    
+    Datasets: general, regional y transactions (en la URL). La respuesta
+    es un StreamingHttpResponse: las filas se leen por bloques y se envían
+    a medida que se codifican, con memoria constante (ver
+    inventory/exports.py). Parámetros: ?format=csv|ndjson, ?gzip=1 y los
+    filtros del dataset: ?product_id=, ?category= (general), ?branch_id=,
+    ?region_id= (regional), ?type=, ?since=, ?until= e ?include_archived=1
+    (transactions). Exige un token de Supabase válido.
+    """
+    
+    def get(self, request, dataset):
+        _, denied = authenticate_request(request)
+        if denied:
+            return denied
+        params = request.GET
+        filters = {}
+        try:
+            for name in ('product_id', 'branch_id', 'region_id'):
+                if params.get(name):
+                    filters[name] = str(uuid.UUID(params[name]))
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'product_id, branch_id o region_id inválido'
+            }, status=400)
+        if params.get('category'):
+            filters['category'] = params['category']
+        if params.get('type'):
+            filters['types'] = [t for t in params['type'].split(',') if t]
+        for name in ('since', 'until'):
+            if params.get(name):
+                value = parse_datetime(params[name].replace(' ', '+'))
+                if value is None:
+                    return JsonResponse({
+                        'success': False,
+                        'error': f'{name} inválido, usar ISO 8601'
+                    }, status=400)
+                filters[name] = timezone.make_aware(value) if timezone.is_naive(value) else value
+        
+        fmt = params.get('format', 'csv')
+        compress = params.get('gzip') in ('1', 'true')
+        try:
+            chunks, content_type = export_stream(
+                dataset, fmt, compress=compress, filters=filters,
+                include_archived=params.get('include_archived') in ('1', 'true'),
+            )
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        
+        filename = f'{dataset}_{timezone.localtime():%Y%m%d_%H%M%S}.{fmt}' + ('.gz' if compress else '')
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+class ProductSearchAPIView(View):
+    """
+    API de búsqueda de productos por código, nombre y categoría.
+    
+    Usa el índice de inventory/search.py (FTS5 en SQLite, tsvector y
+    pg_trgm en PostgreSQL) y ordena por relevancia. Parámetros: ?q=
+    (obligatorio), ?category=, ?requires_refrigeration=1|0 y ?limit=
+    (máximo 100). Con ?autocomplete=1 responde como
+    ProductAutocompleteAPIView.
+    """
+    
+    default_limit = SEARCH_LIMIT
+    autocomplete = False
+    
+    def get(self, request):
+        params = request.GET
+        query = params.get('q', '').strip()
+        if not query:
+            return JsonResponse({
+                'success': False,
+                'error': 'Falta el parámetro q'
+            }, status=400)
+        try:
+            limit = int(params.get('limit', self.default_limit))
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'limit inválido'
+            }, status=400)
+        refrigeration = params.get('requires_refrigeration', '').lower()
+        if refrigeration not in ('', '1', '0', 'true', 'false'):
+            return JsonResponse({
+                'success': False,
+                'error': 'requires_refrigeration debe ser 1 o 0'
+            }, status=400)
+        
+        filters = {
+            'category': params.get('category') or None,
+            'requires_refrigeration': refrigeration in ('1', 'true') if refrigeration else None,
+        }
+        if self.autocomplete or params.get('autocomplete') in ('1', 'true'):
+            results = autocomplete_products(query, limit=limit, **filters)
+        else:
+            results = search_products(query, limit=limit, **filters)
+        return JsonResponse({
+            'success': True,
+            'data': results,
+            'count': len(results),
+        })
+
+class ProductAutocompleteAPIView(ProductSearchAPIView):
+    """
+    API de sugerencias de productos mientras se escribe.
+    
+    La última palabra se busca como prefijo (mínimo 2 caracteres) y solo
+    se ordenan por relevancia los primeros candidatos, así que responde
+    igual de rápido con prefijos muy comunes. Mismos parámetros que
+    ProductSearchAPIView; ?limit= por defecto 10.
+    """
+    
+    default_limit = AUTOCOMPLETE_LIMIT
+    autocomplete = True
+
 # ==================== FUNCTIONS (para urls.py antiguo) ====================
 
 @csrf_exempt
@@ -115,6 +619,14 @@ def assign_to_branch_api(request):
         return view.post(request)
     return JsonResponse({'error': 'Método no permitido'}, status=405)
 
+@csrf_exempt
+def create_general_inventory_api(request):
+    """Función para compatibilidad: crea inventario general (uno o varios items)"""
+    if request.method == 'POST':
+        view = CreateGeneralInventoryAPIView()
+        return view.post(request)
+    return JsonResponse({'error': 'Método no permitido'}, status=405)
+
 def inventory_summary_api(request):
     """Función para compatibilidad con urls.py existente"""
     view = InventorySummaryAPIView()
@@ -0,0 +1,360 @@
+# postgrest_standin.py - Servidor local que imita lo básico de Supabase/PostgREST
+#
+# Sirve tablas en memoria bajo /rest/v1/<tabla> para los benchmarks del
+# cliente (bench_*.py) sin depender de la red ni de credenciales.
+# Soporta filtros `eq.`/`gt.`/`in.`/`and=()`, `select`, `limit`, `offset`,
+# `order`, el header `Range`, conteos por HEAD (Content-Range) y,
+# opcionalmente, ETag/If-None-Match.
+# `inject_fault()` simula fallos (status de error, latencia, conexión
+# cortada) para probar reintentos y circuit breaker.
+#
+# Uso como script: python postgrest_standin.py [puerto] [--tls]
+import hashlib
+import json
+import os
+import ssl
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+
+def make_self_signed_cert(directory: str):
+    """Crear un certificado autofirmado para 127.0.0.1 (requiere cryptography)."""
+    import datetime
+    import ipaddress
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, '127.0.0.1')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address('127.0.0.1'))]),
+                       critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, 'standin.crt')
+    key_path = os.path.join(directory, 'standin.key')
+    with open(cert_path, 'wb') as fh:
+        fh.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, 'wb') as fh:
+        fh.write(key.private_bytes(serialization.Encoding.PEM,
+                                   serialization.PrivateFormat.TraditionalOpenSSL,
+                                   serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    # ============================================
+    # UTILIDADES
+    # ============================================
+
+    def _parse(self):
+        parts = urlsplit(self.path)
+        prefix = '/rest/v1/'
+        table = parts.path[len(prefix):] if parts.path.startswith(prefix) else None
+        return table, parse_qsl(parts.query, keep_blank_values=True)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length)) if length else None
+
+    def _send(self, status, payload=None, headers=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _count(self):
+        """Contar el request y aplicar latencia/fallos; True si ya se respondió."""
+        with self.server.lock:
+            self.server.requests += 1
+            fault = self._take_fault()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if fault is None:
+            return False
+        # Consumir el cuerpo para no contaminar la conexión keep-alive
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if fault['delay']:
+            time.sleep(fault['delay'])
+        if fault['drop']:
+            # Cerrar sin responder: el cliente ve una conexión cortada
+            self.close_connection = True
+            return True
+        if fault['status']:
+            self._send(fault['status'], {'message': 'fallo inyectado'})
+            return True
+        return False
+
+    def _take_fault(self):
+        table, _ = self._parse()
+        for fault in self.server.faults:
+            if fault['count'] == 0:
+                continue
+            if fault['table'] not in (None, table):
+                continue
+            if fault['methods'] and self.command not in fault['methods']:
+                continue
+            if fault['count'] > 0:
+                fault['count'] -= 1
+            return fault
+        return None
+
+    @staticmethod
+    def _matches(row, filters):
+        for column, condition in filters:
+            op, _, value = condition.partition('.')
+            current = row.get(column)
+            if op == 'eq' and str(current).lower() != value.lower():
+                return False
+            if op == 'gt' and not (current is not None and str(current) > value):
+                return False
+            if op == 'in' and str(current) not in value.strip('()').split(','):
+                return False
+        return True
+
+    def _select(self, table, query):
+        rows = self.server.tables.get(table)
+        if rows is None:
+            return None, 0
+        filters, select, limit, offset, order = [], None, None, 0, None
+        for name, value in query:
+            if name == 'select':
+                select = value
+            elif name == 'limit':
+                limit = int(value)
+            elif name == 'offset':
+                offset = int(value)
+            elif name == 'order':
+                order = value
+            elif name == 'and':
+                for condition in value.strip('()').split(','):
+                    column, _, rest = condition.partition('.')
+                    filters.append((column, rest))
+            elif name not in ('count', 'on_conflict', 'columns'):
+                filters.append((name, value))
+        result = [row for row in rows if self._matches(row, filters)]
+        if order:
+            column, _, direction = order.partition('.')
+            result.sort(key=lambda r: str(r.get(column)), reverse=direction == 'desc')
+        total = len(result)
+        result = result[offset:offset + limit if limit is not None else None]
+        if select and select not in ('*', 'count'):
+            columns = [c.strip() for c in select.split(',')]
+            result = [{c: row.get(c) for c in columns} for row in result]
+        return result, total
+
+    # ============================================
+    # VERBOS
+    # ============================================
+
+    def do_GET(self):
+        if self._count():
+            return
+        table, query = self._parse()
+        if table == '':
+            return self._send(200, {'swagger': '2.0'})
+        rows, total = self._select(table, query)
+        if rows is None:
+            return self._send(404, {'message': f'relation "{table}" does not exist'})
+        if ('select', 'count') in query:
+            return self._send(200, [{'count': total}])
+        requested = self.headers.get('Range')
+        if requested:
+            start, _, end = requested.partition('-')
+            start, end = int(start), int(end)
+            rows = rows[start:end + 1]
+            last = start + len(rows) - 1
+            status = 206 if start > 0 or end + 1 < total else 200
+            return self._send(status, rows, {'Content-Range': f'{start}-{last}/{total}'})
+        if self.server.etags:
+            etag = '"%s"' % hashlib.sha1(json.dumps(rows, sort_keys=True).encode()).hexdigest()
+            if self.headers.get('If-None-Match') == etag:
+                return self._send(304, headers={'ETag': etag})
+            return self._send(200, rows, {'ETag': etag})
+        self._send(200, rows)
+
+    def do_HEAD(self):
+        if self._count():
+            return
+        table, query = self._parse()
+        rows, total = self._select(table, query)
+        if rows is None:
+            return self._send(404)
+        # El stand-in siempre cuenta exacto, sea cual sea `Prefer: count=`
+        content_range = f'0-{len(rows) - 1}/{total}' if rows else f'*/{total}'
+        self._send(200, headers={'Content-Range': content_range})
+
+    def do_POST(self):
+        if self._count():
+            return
+        table, query = self._parse()
+        payload = self._body()
+        rows = payload if isinstance(payload, list) else [payload]
+        prefer = self.headers.get('Prefer', '')
+        on_conflict = dict(query).get('on_conflict')
+        with self.server.lock:
+            stored = self.server.tables.setdefault(table, [])
+            if on_conflict and 'resolution=merge-duplicates' in prefer:
+                # Upsert: fusiona por las columnas de on_conflict
+                columns = on_conflict.split(',')
+                index = {tuple(str(r.get(c)) for c in columns): r for r in stored}
+                for row in rows:
+                    existing = index.get(tuple(str(row.get(c)) for c in columns))
+                    if existing is not None:
+                        existing.update(row)
+                    else:
+                        stored.append(row)
+                        index[tuple(str(row.get(c)) for c in columns)] = row
+            else:
+                stored.extend(rows)
+        if 'return=minimal' in prefer:
+            return self._send(201)
+        self._send(201, rows)
+
+    def do_PATCH(self):
+        if self._count():
+            return
+        table, query = self._parse()
+        changes = self._body() or {}
+        updated = []
+        with self.server.lock:
+            for row in self.server.tables.get(table, []):
+                if self._matches(row, query):
+                    row.update(changes)
+                    updated.append(row)
+        self._send(200, updated)
+
+    def do_DELETE(self):
+        if self._count():
+            return
+        table, query = self._parse()
+        with self.server.lock:
+            rows = self.server.tables.get(table, [])
+            self.server.tables[table] = [r for r in rows if not self._matches(r, query)]
+        self._send(204)
+
+
+class _StandInServer(ThreadingHTTPServer):
+    # El backlog por defecto (5) descarta conexiones simultáneas y el
+    # cliente espera ~1 s a reintentar el SYN
+    request_queue_size = 128
+
+
+class PostgRESTStandIn:
+    """
+    Servidor PostgREST de prueba en un hilo.
+
+    Uso:
+        with PostgRESTStandIn({'regions': [...]}) as server:
+            client = SupabaseClient(api_key='x', base_url=server.url)
+    """
+
+    def __init__(self, tables=None, host='127.0.0.1', port=0, tls=False, latency=0.0,
+                 etags=False):
+        self.httpd = _StandInServer((host, port), StandInHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.tables = tables if tables is not None else {}
+        self.httpd.lock = threading.Lock()
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.latency = latency
+        self.httpd.etags = etags
+        self.httpd.faults = []
+        self.cert_path = None
+        if tls:
+            self._tmpdir = tempfile.TemporaryDirectory()
+            self.cert_path, key_path = make_self_signed_cert(self._tmpdir.name)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(self.cert_path, key_path)
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+        scheme = 'https' if tls else 'http'
+        self.url = f'{scheme}://{host}:{self.httpd.server_address[1]}'
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def tables(self):
+        return self.httpd.tables
+
+    @property
+    def connections(self) -> int:
+        return self.httpd.connections
+
+    @property
+    def requests(self) -> int:
+        return self.httpd.requests
+
+    def inject_fault(self, status=None, count=1, delay=0.0, drop=False, table=None,
+                     methods=None):
+        """
+        Programar fallos para los próximos requests.
+
+        Args:
+            status: Status HTTP a devolver (ej: 503)
+            count: Requests afectados (-1 = hasta clear_faults)
+            delay: Segundos extra antes de responder (simula timeouts)
+            drop: Cerrar la conexión sin responder
+            table: Solo esa tabla (None = todas)
+            methods: Solo esos verbos, ej: ('GET',)
+        """
+        with self.httpd.lock:
+            self.httpd.faults.append({'status': status, 'count': count, 'delay': delay,
+                                      'drop': drop, 'table': table,
+                                      'methods': tuple(methods or ())})
+
+    def clear_faults(self):
+        with self.httpd.lock:
+            self.httpd.faults.clear()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].isdigit() else 54321
+    server = PostgRESTStandIn(port=port, tls='--tls' in sys.argv).start()
+    print(f"🧪 PostgREST stand-in escuchando en {server.url}/rest/v1/")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -153,6 +153,122 @@ SUPABASE_CONFIG = {
     'service_role_key': os.getenv('SUPABASE_SERVICE_ROLE_KEY'),
 }
 
+# Conexiones HTTP hacia Supabase (shared/http_pool.py)
+SUPABASE_HTTP_CONFIG = {
+    # Conexiones keep-alive máximas por URL base
+    'pool_size': int(os.getenv('SUPABASE_HTTP_POOL_SIZE', '20')),
+    'keep_alive': os.getenv('SUPABASE_HTTP_KEEP_ALIVE', 'True') == 'True',
+    'connect_timeout': float(os.getenv('SUPABASE_HTTP_CONNECT_TIMEOUT', '3.05')),
+    'read_timeout': float(os.getenv('SUPABASE_HTTP_READ_TIMEOUT', '15')),
+    # Unir GETs idénticos en vuelo en un solo request (shared/single_flight.py)
+    'coalesce_gets': os.getenv('SUPABASE_HTTP_COALESCE_GETS', 'True') == 'True',
+}
+
+# TTL (segundos) de la caché de datos de referencia de SupabaseClient
+# (shared/reference_cache.py); 0 desactiva la caché de esa tabla
+SUPABASE_REFERENCE_CACHE_TTLS = {
+    'regions': int(os.getenv('SUPABASE_CACHE_TTL_REGIONS', '3600')),
+    'branches': int(os.getenv('SUPABASE_CACHE_TTL_BRANCHES', '600')),
+    'special_zones': int(os.getenv('SUPABASE_CACHE_TTL_SPECIAL_ZONES', '3600')),
+}
+
+# Reintentos, presupuesto y circuit breaker del transporte (shared/resilience.py)
+SUPABASE_RESILIENCE_CONFIG = {
+    'max_attempts': int(os.getenv('SUPABASE_RETRY_MAX_ATTEMPTS', '3')),
+    'base_delay': float(os.getenv('SUPABASE_RETRY_BASE_DELAY', '0.1')),
+    'max_delay': float(os.getenv('SUPABASE_RETRY_MAX_DELAY', '2.0')),
+    # Fracción de ficha por request y recarga mínima por segundo
+    'retry_budget_ratio': float(os.getenv('SUPABASE_RETRY_BUDGET_RATIO', '0.2')),
+    'retry_budget_per_second': float(os.getenv('SUPABASE_RETRY_BUDGET_PER_SECOND', '1.0')),
+    'retry_budget_max': float(os.getenv('SUPABASE_RETRY_BUDGET_MAX', '20')),
+    'breaker_failure_threshold': int(os.getenv('SUPABASE_BREAKER_FAILURES', '5')),
+    'breaker_reset_timeout': float(os.getenv('SUPABASE_BREAKER_RESET_TIMEOUT', '30')),
+    # Deadline por llamada cuando no hay uno en contexto (0 = sin límite)
+    'default_deadline': float(os.getenv('SUPABASE_DEFAULT_DEADLINE', '0')),
+}
+
+# Autenticación JWT de Supabase (shared/authentication.py, shared/jwks.py)
+SUPABASE_AUTH_CONFIG = {
+    # JWKS: TTL por defecto si Supabase no envía Cache-Control (segundos)
+    'jwks_ttl': int(os.getenv('SUPABASE_JWKS_TTL', '600')),
+    'jwks_min_ttl': int(os.getenv('SUPABASE_JWKS_MIN_TTL', '60')),
+    'jwks_max_ttl': int(os.getenv('SUPABASE_JWKS_MAX_TTL', '86400')),
+    # Mínimo entre re-descargas provocadas por un `kid` desconocido
+    'jwks_min_refetch_interval': int(os.getenv('SUPABASE_JWKS_MIN_REFETCH', '30')),
+    'jwks_timeout': float(os.getenv('SUPABASE_JWKS_TIMEOUT', '5')),
+    # JWKS local para arrancar sin red (opcional)
+    'jwks_file': os.getenv('SUPABASE_JWKS_FILE'),
+    # Secreto JWT legado del proyecto, solo para tokens HS256 (opcional)
+    'jwt_secret': os.getenv('SUPABASE_JWT_SECRET'),
+    # Caché de tokens verificados (0 la desactiva)
+    'token_cache_size': int(os.getenv('SUPABASE_TOKEN_CACHE_SIZE', '10000')),
+    # Segundos que se restan al `exp` de cada token
+    'token_cache_skew': int(os.getenv('SUPABASE_TOKEN_CACHE_SKEW', '30')),
+    # Alias de CACHES compartido entre workers, ej: 'default' con Redis (opcional)
+    'token_cache_backend': os.getenv('SUPABASE_TOKEN_CACHE_BACKEND'),
+}
+
+# Inventario en modo ledger (inventory/ledger.py): InventoryTransaction es
+# la fuente de verdad y las cantidades de GeneralInventory/RegionalInventory
+# son una proyección; los cambios absolutos de cantidad quedan como ajustes
+INVENTORY_LEDGER_CONFIG = {
+    'enabled': os.getenv('INVENTORY_LEDGER_ENABLED', 'False') == 'True',
+    # Antigüedad mínima (segundos) de las transacciones que entran en un corte,
+    # para no dejar fuera las que aún no confirmaron su transacción
+    'settle_seconds': int(os.getenv('INVENTORY_LEDGER_SETTLE_SECONDS', '300')),
+}
+
+# Rollups diarios de transacciones (inventory/rollups.py)
+INVENTORY_ROLLUP_CONFIG = {
+    # Antigüedad mínima (segundos) de las transacciones que entran al rollup
+    'settle_seconds': int(os.getenv('INVENTORY_ROLLUP_SETTLE_SECONDS', '60')),
+    # Transacciones por lote (cada lote es una transacción de base de datos)
+    'chunk_size': int(os.getenv('INVENTORY_ROLLUP_CHUNK_SIZE', '5000')),
+}
+
+# Particiones y archivo en frío de inventory_transactions (inventory/archive.py)
+INVENTORY_ARCHIVE_CONFIG = {
+    # Carpeta de los Parquet (relativa a BASE_DIR o absoluta)
+    'directory': os.getenv('INVENTORY_ARCHIVE_DIR', 'archive/transactions'),
+    # Meses cerrados que se quedan en la tabla antes de archivarse
+    'keep_months': int(os.getenv('INVENTORY_ARCHIVE_KEEP_MONTHS', '6')),
+    # Particiones mensuales creadas por adelantado (solo PostgreSQL)
+    'partitions_ahead': int(os.getenv('INVENTORY_ARCHIVE_PARTITIONS_AHEAD', '3')),
+    'compression': os.getenv('INVENTORY_ARCHIVE_COMPRESSION', 'zstd'),
+}
+
+# Logging estructurado (shared/logs.py)
+# LOG_LEVEL=DEBUG activa además el desglose de tiempos por request
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'WARNING')
+
+# Fracción de eventos DEBUG/INFO que se emiten por logger (WARNING+ siempre)
+LOG_SAMPLING = {
+    'default': float(os.getenv('LOG_SAMPLE_RATE', '1.0')),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'structured': {
+            '()': 'shared.logs.StructuredFormatter',
+        },
+    },
+    'handlers': {
+        'structured_console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'structured',
+        },
+    },
+    'loggers': {
+        'shared': {
+            'handlers': ['structured_console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+    },
+}
+
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -0,0 +1,483 @@
+"""
+Cliente asíncrono de Supabase para vistas async de Django (ASGI).
+
+Mismos métodos que `SupabaseClient`, pero sobre `httpx.AsyncClient` con
+pool de conexiones keep-alive. Permite lanzar varias llamadas a PostgREST
+a la vez en lugar de una detrás de otra:
+
+    client = AsyncSupabaseClient()
+    regions, branches, inventory = await asyncio.gather(
+        client.get_regions(),
+        client.get_branches(),
+        client.get_inventory_by_region(region_id),
+    )
+
+Requiere `httpx` (pip install httpx).
+"""
+
+import asyncio
+import weakref
+from typing import Optional, List, Dict, Any, AsyncIterator, Sequence, Union
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from .http_pool import http_config
+from .logs import SampledLogger
+from .reference_cache import get_reference_cache
+from .resilience import (get_resilience_policy, endpoint_name, ResilienceError,
+                         CircuitOpenError)
+from .single_flight import async_single_flight, request_key
+from .supabase_client import (SupabaseAPIError, SupabaseClient, COUNT_MODES, keyset_filter,
+                              parse_content_range)
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - dependencia opcional
+    httpx = None
+
+log = SampledLogger(__name__)
+
+_read_params = SupabaseClient._read_params
+
+# Un AsyncClient por event loop y URL base: las conexiones de httpx quedan
+# ligadas al loop en el que se abrieron
+_clients: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+
+def get_async_http_client(base_url: str, pool_size: Optional[int] = None) -> 'httpx.AsyncClient':
+    """
+    Obtener el AsyncClient compartido del loop actual para una URL base.
+
+    Args:
+        base_url: URL base de Supabase
+        pool_size: Conexiones máximas hacia ese host
+
+    Returns:
+        httpx.AsyncClient con pool keep-alive
+    """
+    if httpx is None:
+        raise ImproperlyConfigured('AsyncSupabaseClient requiere httpx: pip install httpx')
+    config = http_config()
+    pool_size = pool_size or config['pool_size']
+    loop = asyncio.get_running_loop()
+    per_loop = _clients.setdefault(loop, {})
+    key = (base_url, pool_size)
+    client = per_loop.get(key)
+    if client is None or client.is_closed:
+        keepalive = pool_size if config['keep_alive'] else 0
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=pool_size,
+                                max_keepalive_connections=keepalive),
+            timeout=httpx.Timeout(config['read_timeout'], connect=config['connect_timeout']),
+        )
+        per_loop[key] = client
+    return client
+
+
+async def aclose_async_clients():
+    """Cerrar los AsyncClient del loop actual (ej: en el shutdown de ASGI)."""
+    per_loop = _clients.pop(asyncio.get_running_loop(), {})
+    for client in per_loop.values():
+        await client.aclose()
+
+
+class AsyncSupabaseClient:
+    """
+    Cliente asíncrono para la API REST de Supabase.
+
+    Características:
+    - Misma interfaz que SupabaseClient, con métodos `async`
+    - Pool de conexiones keep-alive compartido por event loop
+    - Timeouts de conexión y lectura por separado
+    - GETs idénticos en vuelo desde varias tareas comparten un solo request
+    - Deadline, reintentos con backoff y circuit breaker por endpoint
+      (shared/resilience.py)
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 pool_size: Optional[int] = None, use_reference_cache: bool = True):
+        """
+        Inicializar cliente Supabase asíncrono.
+
+        Args:
+            api_key: Clave API de Supabase (anon o service_role)
+            base_url: URL base de Supabase
+            pool_size: Conexiones máximas hacia Supabase
+            use_reference_cache: Si True, las escrituras de regiones
+                invalidan la caché de referencia del proceso (la que leen
+                los SupabaseClient)
+        """
+        if httpx is None:
+            raise ImproperlyConfigured('AsyncSupabaseClient requiere httpx: pip install httpx')
+        self.base_url = base_url or settings.SUPABASE_CONFIG['url']
+        self.api_key = api_key or settings.SUPABASE_CONFIG['anon_key']
+        self.pool_size = pool_size
+        self.coalesce_gets = http_config()['coalesce_gets']
+        self.resilience = get_resilience_policy()
+        self.reference_cache = get_reference_cache() if use_reference_cache else None
+        self.default_headers = {
+            'apikey': self.api_key,
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json',
+            'Prefer': 'return=representation'  # Retornar datos insertados/actualizados
+        }
+
+    @property
+    def http(self) -> 'httpx.AsyncClient':
+        return get_async_http_client(self.base_url, self.pool_size)
+
+    async def _make_request(self, method: str, endpoint: str,
+                            data: Optional[Dict] = None,
+                            params: Optional[Dict] = None,
+                            headers: Optional[Dict] = None) -> Optional[Any]:
+        """
+        Método genérico para realizar requests a la API de Supabase.
+
+        Args:
+            method: Método HTTP (GET, POST, PATCH, DELETE)
+            endpoint: Endpoint de la API (ej: 'regions', 'regional_inventory')
+            data: Datos para POST/PATCH
+            params: Parámetros de query string
+            headers: Headers adicionales
+
+        Returns:
+            Datos de respuesta o None si hay error
+        """
+        try:
+            response = await self._send_request(method, endpoint, data=data,
+                                                params=params, headers=headers)
+
+            if response.status_code in [200, 201, 206]:  # 206: página de un Range
+                return response.json() if response.content else True
+            elif response.status_code == 204:
+                return True  # No content (DELETE exitoso)
+            else:
+                log.warning('supabase.http_error', method=method, endpoint=endpoint,
+                            status=response.status_code, body=response.text[:200])
+                return None
+
+        except CircuitOpenError:
+            log.warning('supabase.circuit_open', method=method, endpoint=endpoint)
+            return None
+        except ResilienceError as e:
+            log.warning('supabase.deadline_exceeded', method=method, endpoint=endpoint,
+                        error=str(e))
+            return None
+        except httpx.TimeoutException:
+            log.warning('supabase.timeout', method=method, endpoint=endpoint)
+            return None
+        except httpx.TransportError:
+            log.warning('supabase.connection_error', method=method, endpoint=endpoint)
+            return None
+        except Exception as e:
+            log.exception('supabase.unexpected_error', method=method, endpoint=endpoint,
+                          error_type=type(e).__name__)
+            return None
+
+    async def _send_request(self, method: str, endpoint: str,
+                            data: Optional[Any] = None,
+                            params: Optional[Dict] = None,
+                            headers: Optional[Dict] = None,
+                            idempotent: bool = False) -> 'httpx.Response':
+        """
+        Enviar un request a PostgREST y devolver la respuesta tal cual.
+
+        Si otra tarea ya tiene en vuelo el mismo GET se espera su respuesta
+        en lugar de repetirlo; los errores de red se propagan. Los intentos
+        pasan por la política de resiliencia (ver SupabaseClient._send_request).
+        """
+        url = f"{self.base_url}/rest/v1/{endpoint}"
+        request_headers = {**self.default_headers, **(headers or {})}
+        config = http_config()
+
+        async def attempt(timeout: float) -> 'httpx.Response':
+            timer = log.timer()
+            response = await self.http.request(
+                method.upper(), url,
+                headers=request_headers,
+                json=data,
+                params=params,
+                timeout=httpx.Timeout(timeout, connect=min(config['connect_timeout'], timeout)),
+            )
+            if timer:
+                timer.mark('http')
+                timer.emit('supabase.request', method=method, endpoint=endpoint,
+                           status=response.status_code)
+            return response
+
+        async def send() -> 'httpx.Response':
+            return await self.resilience.acall(
+                endpoint_name(self.base_url, endpoint), method, attempt,
+                (httpx.TimeoutException, httpx.TransportError),
+                config['read_timeout'], idempotent=idempotent)
+
+        key = request_key(method, url, request_headers, params) if self.coalesce_gets else None
+        if key is None or data is not None:
+            return await send()
+        return await async_single_flight.do(key, send)
+
+    # ============================================
+    # MÉTODOS DE AUTENTICACIÓN
+    # ============================================
+
+    async def login(self, email: str, password: str) -> Optional[Dict]:
+        """
+        Iniciar sesión y obtener token JWT.
+
+        Returns:
+            Diccionario con token y datos de usuario, o None si falla
+        """
+        auth_url = f"{self.base_url}/auth/v1/token?grant_type=password"
+        try:
+            response = await self.http.post(
+                auth_url,
+                headers={'apikey': self.api_key, 'Content-Type': 'application/json'},
+                json={'email': email, 'password': password},
+            )
+            if response.status_code == 200:
+                data = response.json()
+                # Actualizar headers con el nuevo token
+                self.default_headers['Authorization'] = f'Bearer {data["access_token"]}'
+                return data
+            log.warning('supabase.login_error', status=response.status_code,
+                        body=response.text[:100])
+            return None
+        except Exception as e:
+            log.warning('supabase.login_connection_error', error=str(e))
+            return None
+
+    async def logout(self) -> bool:
+        """Cerrar sesión."""
+        try:
+            response = await self.http.post(f"{self.base_url}/auth/v1/logout",
+                                            headers=self.default_headers)
+            return response.status_code == 204
+        except Exception:
+            return False
+
+    async def get_current_user(self) -> Optional[Dict]:
+        """Obtener información del usuario actual."""
+        try:
+            response = await self.http.get(f"{self.base_url}/auth/v1/user",
+                                           headers=self.default_headers)
+            return response.json() if response.status_code == 200 else None
+        except Exception:
+            return None
+
+    # ============================================
+    # MÉTODOS PARA REGIONES
+    # ============================================
+
+    async def get_regions(self, filters: Optional[Dict] = None,
+                          columns=None, embed: Optional[Dict] = None) -> List[Dict]:
+        """Obtener todas las regiones (filtros, columnas y embebidos estilo PostgREST)."""
+        params = _read_params(filters, columns, embed)
+        return await self._make_request('GET', 'regions', params=params) or []
+
+    async def get_region(self, region_id: str, columns=None,
+                         embed: Optional[Dict] = None) -> Optional[Dict]:
+        """Obtener una región específica por ID."""
+        params = _read_params({'id': f'eq.{region_id}'}, columns, embed)
+        result = await self._make_request('GET', 'regions', params=params)
+        return result[0] if result and len(result) > 0 else None
+
+    async def create_region(self, data: Dict) -> Optional[Dict]:
+        """Crear una nueva región."""
+        result = await self._make_request('POST', 'regions', data=data)
+        self.invalidate_reference_data('regions')
+        return result
+
+    async def update_region(self, region_id: str, data: Dict) -> Optional[Dict]:
+        """Actualizar una región existente."""
+        result = await self._make_request('PATCH', f'regions?id=eq.{region_id}', data=data)
+        self.invalidate_reference_data('regions')
+        return result
+
+    async def delete_region(self, region_id: str) -> bool:
+        """Eliminar una región."""
+        result = await self._make_request('DELETE', f'regions?id=eq.{region_id}') is True
+        self.invalidate_reference_data('regions')
+        return result
+
+    # ============================================
+    # CACHÉ DE DATOS DE REFERENCIA
+    # ============================================
+
+    def invalidate_reference_data(self, table: Optional[str] = None):
+        """
+        Descartar la caché de referencia tras cambiar datos por otra vía.
+
+        Args:
+            table: 'regions', 'branches' o 'special_zones' (None = todas)
+        """
+        if self.reference_cache is not None:
+            self.reference_cache.invalidate(table)
+
+    # ============================================
+    # MÉTODOS PARA INVENTARIO REGIONAL
+    # ============================================
+
+    async def get_inventory(self, filters: Optional[Dict] = None,
+                            columns=None, embed: Optional[Dict] = None) -> List[Dict]:
+        """Obtener inventario regional (filtros, columnas y embebidos estilo PostgREST)."""
+        params = _read_params(filters, columns, embed)
+        return await self._make_request('GET', 'regional_inventory', params=params) or []
+
+    async def get_inventory_by_region(self, region_id: str, **kwargs) -> List[Dict]:
+        """Obtener inventario de una región específica (acepta columns/embed)."""
+        return await self.get_inventory({'region_id': f'eq.{region_id}'}, **kwargs)
+
+    async def create_inventory_item(self, data: Dict) -> Optional[Dict]:
+        """Crear un nuevo item de inventario."""
+        return await self._make_request('POST', 'regional_inventory', data=data)
+
+    async def update_inventory_quantity(self, inventory_id: str, new_quantity: int) -> Optional[Dict]:
+        """Actualizar cantidad de un item de inventario."""
+        return await self._make_request('PATCH', f'regional_inventory?id=eq.{inventory_id}',
+                                        data={'quantity': new_quantity,
+                                              'last_updated': timezone.now().isoformat()})
+
+    # ============================================
+    # MÉTODOS PARA SUCURSALES
+    # ============================================
+
+    async def get_branches(self, active_only: bool = True,
+                           columns=None, embed: Optional[Dict] = None) -> List[Dict]:
+        """Obtener todas las sucursales (solo activas por defecto)."""
+        filters = {'is_active': 'eq.true'} if active_only else {}
+        params = _read_params(filters, columns, embed)
+        return await self._make_request('GET', 'branches', params=params) or []
+
+    async def get_branch(self, branch_code: str, columns=None,
+                         embed: Optional[Dict] = None) -> Optional[Dict]:
+        """Obtener una sucursal específica por código."""
+        params = _read_params({'branch_code': f'eq.{branch_code}'}, columns, embed)
+        result = await self._make_request('GET', 'branches', params=params)
+        return result[0] if result and len(result) > 0 else None
+
+    # ============================================
+    # MÉTODOS PARA PRODUCTOS
+    # ============================================
+
+    async def get_products(self, filters: Optional[Dict] = None, columns=None,
+                           embed: Optional[Dict] = None,
+                           active_only: bool = True) -> List[Dict]:
+        """Obtener productos (ver SupabaseClient.get_products)."""
+        filters = dict(filters or {})
+        if active_only:
+            filters.setdefault('is_active', 'eq.true')
+        params = _read_params(filters, columns, embed)
+        return await self._make_request('GET', 'products', params=params) or []
+
+    async def get_products_with_inventory(self, branch_id: str, columns=None,
+                                          inventory_columns=('quantity', 'min_stock', 'max_stock'),
+                                          active_only: bool = True) -> List[Dict]:
+        """Productos con su inventario general de una sucursal en un solo request."""
+        return await self.get_products(
+            {'general_inventory.branch_id': f'eq.{branch_id}', 'order': 'product_name.asc'},
+            columns=columns,
+            embed={'general_inventory': list(inventory_columns)},
+            active_only=active_only,
+        )
+
+    # ============================================
+    # LECTURA PAGINADA (STREAMING)
+    # ============================================
+
+    async def iter_rows(self, table: str, filters: Optional[Dict] = None,
+                        page_size: Optional[int] = None, key: str = 'id',
+                        select: Optional[str] = None,
+                        prefetch: bool = False) -> AsyncIterator[Dict]:
+        """
+        Recorrer una tabla con paginado keyset y memoria constante.
+
+        Mismos argumentos que SupabaseClient.iter_rows (solo modo keyset);
+        con `prefetch` la página siguiente se pide como tarea mientras se
+        consume la actual.
+
+        Raises:
+            SupabaseAPIError: si falla una página
+        """
+        page_size = page_size or SupabaseClient.DEFAULT_PAGE_SIZE
+        base_params = dict(filters or {})
+        if select:
+            columns = [c.strip() for c in select.split(',')]
+            if key not in columns and '*' not in columns:
+                select = f'{select},{key}'
+            base_params['select'] = select
+
+        async def fetch(cursor):
+            params = {**base_params, 'order': f'{key}.asc', 'limit': page_size}
+            if cursor is not None:
+                keyset_filter(params, key, cursor)
+            page = await self._make_request('GET', table, params=params)
+            if page is None:
+                raise SupabaseAPIError(f'Error leyendo {table} (cursor={cursor})')
+            return page
+
+        page = await fetch(None)
+        pending = None
+        try:
+            while True:
+                following = page[-1][key] if len(page) == page_size else None
+                if following is not None and prefetch:
+                    pending = asyncio.create_task(fetch(following))
+                for row in page:
+                    yield row
+                if following is None:
+                    return
+                page = await pending if pending else await fetch(following)
+                pending = None
+        finally:
+            if pending and not pending.done():
+                pending.cancel()
+
+    def iter_inventory(self, filters: Optional[Dict] = None, **kwargs) -> AsyncIterator[Dict]:
+        """Recorrer el inventario regional por páginas (ver iter_rows)."""
+        return self.iter_rows('regional_inventory', filters, **kwargs)
+
+    # ============================================
+    # MÉTODOS DE UTILIDAD
+    # ============================================
+
+    async def health_check(self) -> bool:
+        """Verificar que la API esté funcionando."""
+        try:
+            response = await self.http.get(f"{self.base_url}/rest/v1/",
+                                           headers={'apikey': self.api_key}, timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+    async def get_table_count(self, table_name: str) -> int:
+        """Obtener conteo de registros en una tabla."""
+        return await self.count(table_name) or 0
+
+    async def count(self, table: str, filters: Optional[Dict] = None,
+                    mode: str = 'exact') -> Optional[int]:
+        """Contar filas con un HEAD (ver SupabaseClient.count)."""
+        if mode not in COUNT_MODES:
+            raise ValueError(f'Modo de conteo inválido: {mode} (usar {", ".join(COUNT_MODES)})')
+        try:
+            response = await self._send_request('HEAD', table, params=filters,
+                                                headers={'Prefer': f'count={mode}'})
+        except (httpx.HTTPError, ResilienceError) as e:
+            log.warning('supabase.count_error', table=table, mode=mode,
+                        error_type=type(e).__name__)
+            return None
+        if response.status_code not in (200, 206):
+            log.warning('supabase.http_error', method='HEAD', endpoint=table,
+                        status=response.status_code)
+            return None
+        return parse_content_range(response.headers.get('Content-Range'))
+
+    async def count_tables(self, tables: Union[Sequence[str], Dict[str, Optional[Dict]]],
+                           mode: str = 'exact') -> Dict[str, Optional[int]]:
+        """Contar varias tablas a la vez (ver SupabaseClient.count_tables)."""
+        if not isinstance(tables, dict):
+            tables = {table: None for table in tables}
+        counts = await asyncio.gather(*(self.count(table, filters, mode)
+                                        for table, filters in tables.items()))
+        return dict(zip(tables, counts))
@@ -4,13 +4,127 @@ AUTENTICACIÓN JWT PARA SUPABASE - VERSIÓN FUNCIONAL CON cryptography
 """
 import jwt
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from rest_framework import authentication
 from rest_framework.exceptions import AuthenticationFailed
-import requests
 import json
-import base64
-from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.primitives import serialization
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Mapping
+
+from .jwks import get_jwks_store
+from .logs import SampledLogger, StageTimer
+from .token_cache import get_token_cache
+
+log = SampledLogger(__name__)
+
+SUPPORTED_ALGORITHMS = ('ES256', 'RS256', 'HS256', 'EdDSA')
+
+# Roles de aplicación con acceso a todas las sucursales
+GLOBAL_ROLES = ('admin', 'service_role')
+
+_EMPTY_METADATA = MappingProxyType({})
+
+
+class SupabaseUser:
+    """
+    Usuario autenticado por Supabase.
+
+    Solo guarda el diccionario de claims; `user_metadata`, `app_metadata`,
+    rol y sucursal se leen de él cuando se piden, así crear el usuario en
+    cada request no copia nada.
+
+    Rol y sucursal salen solo de `app_metadata`, que únicamente se escribe
+    con la service key. `user_metadata` lo edita el propio usuario
+    (auth.updateUser) y no sirve para autorizar.
+    """
+    __slots__ = ('claims',)
+
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+
+    def __init__(self, claims: Dict[str, Any]):
+        self.claims = claims
+
+    @property
+    def id(self) -> Optional[str]:
+        return self.claims.get('sub')
+
+    @property
+    def pk(self) -> Optional[str]:
+        return self.claims.get('sub')
+
+    @property
+    def email(self) -> Optional[str]:
+        return self.claims.get('email')
+
+    @property
+    def username(self) -> Optional[str]:
+        return self.claims.get('email')
+
+    @property
+    def role(self) -> str:
+        """Rol de Postgres del token (authenticated, service_role...)."""
+        return self.claims.get('role', 'authenticated')
+
+    @property
+    def user_metadata(self) -> Mapping[str, Any]:
+        return self.claims.get('user_metadata') or _EMPTY_METADATA
+
+    @property
+    def app_metadata(self) -> Mapping[str, Any]:
+        return self.claims.get('app_metadata') or _EMPTY_METADATA
+
+    @property
+    def app_role(self) -> Optional[str]:
+        """Rol de la aplicación (admin, operador...), de app_metadata."""
+        return self.app_metadata.get('role')
+
+    @property
+    def branch_id(self) -> Optional[str]:
+        """Sucursal asignada al usuario, de app_metadata."""
+        return self.app_metadata.get('branch_id')
+
+    def has_role(self, *roles: str) -> bool:
+        """True si el rol de aplicación o el rol del token está en `roles`."""
+        return self.app_role in roles or self.role in roles
+
+    def has_branch_access(self, branch_id) -> bool:
+        """True si el usuario puede operar sobre la sucursal indicada."""
+        if self.has_role(*GLOBAL_ROLES):
+            return True
+        branch_id = str(branch_id)
+        if self.branch_id is not None and str(self.branch_id) == branch_id:
+            return True
+        return branch_id in (str(b) for b in self.app_metadata.get('branch_ids', ()))
+
+    def __str__(self):
+        return self.email or self.id
+
+    def get_username(self):
+        return self.email
+
+    def has_perm(self, perm, obj=None):
+        return self.role == 'service_role'
+
+    def has_module_perms(self, app_label):
+        return True
+
+
+def django_user(user: SupabaseUser):
+    """
+    Usuario de Django que representa al usuario de Supabase, para claves
+    foráneas como InventoryTransaction.created_by.
+
+    Se crea la primera vez con username = sub. Los tokens sin sub
+    (service_role) devuelven None.
+    """
+    if not user.id:
+        return None
+    account, _ = get_user_model().objects.get_or_create(
+        username=user.id, defaults={'email': user.email or ''})
+    return account
+
 
 class SupabaseJWTAuthentication(authentication.BaseAuthentication):
     """
@@ -18,179 +132,88 @@ class SupabaseJWTAuthentication(authentication.BaseAuthentication):
     """
     
     def authenticate(self, request):
-        print("🔍 [AUTH] Iniciando autenticación JWT")
-        
         # Extraer token
         auth_header = request.headers.get('Authorization')
         
-        if not auth_header:
-            print("   [AUTH] No hay header Authorization")
-            return None
-            
-        print(f"   [AUTH] Header encontrado: {auth_header[:50]}...")
-        
-        # Verificar formato
-        if not auth_header.startswith('Bearer '):
-            print("   [AUTH] Formato incorrecto (no empieza con 'Bearer ')")
+        # Sin header o formato distinto de 'Bearer <token>': otro autenticador decide
+        if not auth_header or not auth_header.startswith('Bearer '):
             return None
             
         token = auth_header[7:]  # Remover 'Bearer '
-        print(f"   [AUTH] Token extraído: {token[:30]}...")
+        timer = log.timer()
         
-        # Validar token
-        print("   [AUTH] Validando token...")
-        user_data = self.validate_token(token)
+        # Reutilizar la verificación si el token ya pasó por aquí
+        token_cache = get_token_cache()
+        user_data = token_cache.get(token)
+        cached = user_data is not None
+        if timer:
+            timer.mark('cache')
+        
+        if not cached:
+            # Validar token
+            user_data = self.validate_token(token, timer)
+            if user_data:
+                token_cache.set(token, user_data)
         
         if not user_data:
-            print("   [AUTH] Token inválido")
             raise AuthenticationFailed('Token inválido o expirado')
-            
-        print(f"   [AUTH] Token válido. Usuario: {user_data.get('email')}")
         
         # Crear usuario
         user = self.create_user_from_token(user_data)
+        if timer:
+            timer.mark('user')
+            timer.emit('auth.timing', cached=cached)
         
         return (user, token)
     
-    def validate_token(self, token: str):
+    def validate_token(self, token: str, timer: Optional[StageTimer] = None):
         """
-        Validar token JWT - Versión que funciona con ES256 usando cryptography
+        Validar token JWT (ES256, RS256, HS256 o EdDSA) con la clave
+        precompilada del JWKS
         """
         try:
-            print("      [AUTH] Obteniendo JWKS de Supabase...")
-            
-            # URL de JWKS
-            jwks_url = f"{settings.SUPABASE_CONFIG['url']}/auth/v1/.well-known/jwks.json"
-            headers = {'apikey': settings.SUPABASE_CONFIG['anon_key']}
-            
-            print(f"      [AUTH] URL: {jwks_url}")
-            
-            response = requests.get(jwks_url, headers=headers, timeout=10)
-            print(f"      [AUTH] Status: {response.status_code}")
-            
-            if response.status_code != 200:
-                print(f"      [AUTH] Error HTTP: {response.status_code}")
-                return None
-                
-            jwks = response.json()
-            print(f"      [AUTH] JWKS obtenido. Claves: {len(jwks.get('keys', []))}")
-            
             # Obtener header del token
             header = jwt.get_unverified_header(token)
-            print(f"      [AUTH] Header: alg={header.get('alg')}, kid={header.get('kid')}")
             
-            # Buscar clave
+            # Buscar clave (ya construida) en el JWKS cacheado del proceso
             kid = header.get('kid')
-            key_found = None
-            
-            for key in jwks.get('keys', []):
-                if key.get('kid') == kid:
-                    key_found = key
-                    print(f"      [AUTH] Clave encontrada: {key.get('kid')}")
-                    break
+            signing_key = get_jwks_store().get_signing_key(kid, header.get('alg'))
+            if timer:
+                timer.mark('jwks')
             
-            if not key_found:
-                print(f"      [AUTH] No se encontró clave con kid={kid}")
+            if signing_key is None:
+                log.info('auth.unknown_kid', kid=kid, alg=header.get('alg'))
                 return None
             
-            # Determinar algoritmo
-            algorithm = key_found.get('alg', 'ES256')
-            print(f"      [AUTH] Algoritmo: {algorithm}")
-            
-            if algorithm == 'ES256':
-                # Para ES256: convertir JWK EC a clave pública usando cryptography
-                print("      [AUTH] Convirtiendo JWK EC a clave pública...")
-                
-                # Decodificar coordenadas base64 URL-safe
-                x = base64.urlsafe_b64decode(key_found['x'] + '==')
-                y = base64.urlsafe_b64decode(key_found['y'] + '==')
-                
-                # Crear números públicos EC
-                public_numbers = ec.EllipticCurvePublicNumbers(
-                    x=int.from_bytes(x, 'big'),
-                    y=int.from_bytes(y, 'big'),
-                    curve=ec.SECP256R1()  # P-256 curve
-                )
-                
-                # Crear clave pública
-                public_key = public_numbers.public_key()
-                
-                # Convertir a formato PEM (PyJWT lo necesita así)
-                pem = public_key.public_bytes(
-                    encoding=serialization.Encoding.PEM,
-                    format=serialization.PublicFormat.SubjectPublicKeyInfo
-                )
-                
-                print("      [AUTH] Clave PEM creada")
-                
-                # Verificar token con la clave PEM
-                print("      [AUTH] Verificando firma ES256...")
-                payload = jwt.decode(
-                    token,
-                    pem,
-                    algorithms=['ES256'],
-                    audience='authenticated',
-                    issuer=f"{settings.SUPABASE_CONFIG['url']}/auth/v1"
-                )
-                
-                print(f"      [AUTH] ¡Token ES256 válido! Usuario: {payload.get('email')}")
-                return payload
-                
-            elif algorithm == 'RS256':
-                # Para RS256: PyJWT puede manejar JWK directamente
-                print("      [AUTH] Verificando firma RS256...")
-                payload = jwt.decode(
-                    token,
-                    key=key_found,
-                    algorithms=['RS256'],
-                    audience='authenticated',
-                    issuer=f"{settings.SUPABASE_CONFIG['url']}/auth/v1"
-                )
-                print(f"      [AUTH] ¡Token RS256 válido! Usuario: {payload.get('email')}")
-                return payload
-                
-            else:
-                print(f"      [AUTH] Algoritmo no soportado: {algorithm}")
+            # El algoritmo lo fija la clave, nunca el header del token
+            algorithm = signing_key.algorithm_name
+            if algorithm not in SUPPORTED_ALGORITHMS:
+                log.warning('auth.unsupported_algorithm', kid=kid, alg=algorithm)
                 return None
+            
+            payload = jwt.decode(
+                token,
+                signing_key.key,
+                algorithms=[algorithm],
+                audience='authenticated',
+                issuer=f"{settings.SUPABASE_CONFIG['url']}/auth/v1"
+            )
+            if timer:
+                timer.mark('decode')
+            return payload
                 
         except jwt.ExpiredSignatureError:
-            print("      [AUTH] Token expirado")
+            log.debug('auth.token_expired')
             return None
         except jwt.InvalidTokenError as e:
-            print(f"      [AUTH] Token inválido: {e}")
+            log.info('auth.invalid_token', error=str(e))
             return None
         except Exception as e:
-            print(f"      [AUTH] Error inesperado: {type(e).__name__}: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception('auth.unexpected_error', error_type=type(e).__name__)
             return None
     
     def create_user_from_token(self, payload):
         """
-        Crear objeto usuario Django.
+        Crear el usuario del request a partir de los claims verificados.
         """
-        class SupabaseUser:
-            def __init__(self, token_payload):
-                self.id = token_payload.get('sub')
-                self.email = token_payload.get('email')
-                self.role = token_payload.get('role', 'authenticated')
-                self.user_metadata = token_payload.get('user_metadata', {})
-                self.app_metadata = token_payload.get('app_metadata', {})
-                self.is_authenticated = True
-                self.is_anonymous = False
-                self.username = self.email
-                print(f"      [AUTH] Usuario creado: {self.email}")
-            
-            def __str__(self):
-                return self.email or self.id
-            
-            def get_username(self):
-                return self.email
-            
-            def has_perm(self, perm, obj=None):
-                return self.role == 'service_role'
-            
-            def has_module_perms(self, app_label):
-                return True
-        
         return SupabaseUser(payload)
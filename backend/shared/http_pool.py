@@ -0,0 +1,81 @@
+"""
+Pool de conexiones HTTP keep-alive compartido por el proceso.
+
+Cada URL base de Supabase tiene una sola `requests.Session` con su propio
+pool de conexiones (urllib3), así las llamadas reutilizan la conexión
+TCP+TLS en lugar de abrir una nueva cada vez. `requests.Session` es segura
+para hacer requests concurrentes desde varios hilos mientras no se
+modifique su estado compartido (headers, cookies), por eso los headers de
+autenticación se envían siempre por request.
+"""
+
+import threading
+from typing import Dict, Tuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+_sessions: Dict[Tuple[str, int, bool], requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def http_config() -> Dict:
+    """Configuración HTTP de settings con valores por defecto."""
+    config = getattr(settings, 'SUPABASE_HTTP_CONFIG', {})
+    return {
+        'pool_size': config.get('pool_size', 20),
+        'keep_alive': config.get('keep_alive', True),
+        'connect_timeout': config.get('connect_timeout', 3.05),
+        'read_timeout': config.get('read_timeout', 15),
+        'coalesce_gets': config.get('coalesce_gets', True),
+    }
+
+
+def get_timeout(read_timeout: Optional[float] = None) -> Tuple[float, float]:
+    """Timeout (conexión, lectura) para requests."""
+    config = http_config()
+    return (config['connect_timeout'], read_timeout or config['read_timeout'])
+
+
+def get_session(base_url: str, pool_size: Optional[int] = None,
+                keep_alive: Optional[bool] = None) -> requests.Session:
+    """
+    Obtener la sesión compartida para una URL base.
+
+    Args:
+        base_url: URL base (ej: https://xxxx.supabase.co)
+        pool_size: Conexiones máximas abiertas hacia ese host
+        keep_alive: Si False, se cierra la conexión tras cada respuesta
+
+    Returns:
+        Sesión de requests con el pool montado
+    """
+    config = http_config()
+    pool_size = pool_size or config['pool_size']
+    keep_alive = config['keep_alive'] if keep_alive is None else keep_alive
+    key = (base_url, pool_size, keep_alive)
+
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                # pool_block=False: si el pool se llena se abre una conexión
+                # extra en vez de bloquear el hilo
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                if not keep_alive:
+                    session.headers['Connection'] = 'close'
+                _sessions[key] = session
+    return session
+
+
+def close_sessions():
+    """Cerrar todas las sesiones (y sus conexiones) del proceso."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
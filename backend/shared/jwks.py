@@ -0,0 +1,271 @@
+"""
+Almacén de claves JWKS de Supabase compartido por todo el proceso.
+
+Evita pedir `/auth/v1/.well-known/jwks.json` en cada request autenticado:
+- Índice por `kid`
+- TTL tomado de Cache-Control (max-age) con límites configurables
+- Refresco en segundo plano antes de que venza el TTL
+- Re-descarga ante un `kid` desconocido, con límite de frecuencia
+- Arranque opcional desde un archivo JWKS local (modo offline)
+- Objetos de clave (ES256, RS256, HS256, EdDSA) construidos una sola vez
+  por versión del JWKS, listos para pasarlos a `jwt.decode`
+"""
+
+import base64
+import json
+import re
+import threading
+import time
+from typing import Optional, Dict, Any
+
+import jwt
+import requests
+from django.conf import settings
+
+_MAX_AGE_RE = re.compile(r'max-age\s*=\s*(\d+)', re.IGNORECASE)
+
+
+class JWKSStore:
+    """
+    Caché de JWKS indexada por `kid`.
+
+    Las claves vencidas se siguen sirviendo mientras se refrescan (o si
+    Supabase no responde): una clave rotada sigue siendo válida hasta que
+    el JWKS nuevo deja de publicarla.
+    """
+
+    def __init__(self, jwks_url: str,
+                 headers: Optional[Dict] = None,
+                 default_ttl: int = 600,
+                 min_ttl: int = 60,
+                 max_ttl: int = 86400,
+                 refresh_ahead: float = 0.2,
+                 min_refetch_interval: int = 30,
+                 timeout: float = 5,
+                 local_file: Optional[str] = None,
+                 jwt_secret: Optional[str] = None):
+        """
+        Args:
+            jwks_url: URL del JWKS
+            headers: Headers para la descarga (ej: apikey)
+            default_ttl: TTL en segundos si la respuesta no trae Cache-Control
+            min_ttl: TTL mínimo aceptado
+            max_ttl: TTL máximo aceptado
+            refresh_ahead: Fracción del TTL antes del vencimiento en la que
+                se lanza el refresco en segundo plano
+            min_refetch_interval: Segundos mínimos entre descargas forzadas
+                por un `kid` desconocido
+            timeout: Timeout de la descarga en segundos
+            local_file: Ruta opcional a un JWKS local para arrancar sin red
+            jwt_secret: Secreto JWT legado del proyecto para tokens HS256
+                sin `kid` (opcional)
+        """
+        self.jwks_url = jwks_url
+        self.headers = headers or {}
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.refresh_ahead = refresh_ahead
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self.local_file = local_file
+
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._signing_keys: Dict[str, jwt.PyJWK] = {}
+        self._secret_key: Optional[jwt.PyJWK] = None
+        if jwt_secret:
+            self._secret_key = jwt.PyJWK({
+                'kty': 'oct',
+                'alg': 'HS256',
+                'k': base64.urlsafe_b64encode(jwt_secret.encode()).rstrip(b'=').decode(),
+            })
+        self._version = 0
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._last_fetch_attempt = float('-inf')
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._refreshing = False
+
+        if local_file:
+            self.load_file(local_file)
+
+    # ============================================
+    # CONSULTA
+    # ============================================
+
+    @property
+    def version(self) -> int:
+        """Se incrementa cada vez que cambia el conjunto de claves."""
+        return self._version
+
+    def get_key(self, kid: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Obtener el JWK con el `kid` indicado.
+
+        Returns:
+            Diccionario JWK o None si el `kid` no existe
+        """
+        now = time.monotonic()
+
+        if not self._keys:
+            if self._can_refetch(now):
+                self.refresh()
+        elif now >= self._refresh_at:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None and self._can_refetch(now):
+            # Posible rotación de claves: se vuelve a descargar una sola vez
+            self.refresh()
+            key = self._keys.get(kid)
+        return key
+
+    def get_signing_key(self, kid: Optional[str],
+                        alg: Optional[str] = None) -> Optional[jwt.PyJWK]:
+        """
+        Obtener la clave ya construida para verificar firmas con el `kid`.
+
+        `signing_key.key` es el objeto de clave de cryptography (o los bytes
+        del secreto HS256) y `signing_key.algorithm_name` el algoritmo.
+
+        Args:
+            kid: `kid` del header del token
+            alg: `alg` del header; con HS256 y sin `kid` publicado se usa
+                el secreto JWT configurado
+
+        Returns:
+            PyJWK o None si el `kid` no existe o su clave no es utilizable
+        """
+        if alg == 'HS256' and self._secret_key and kid not in self._keys:
+            return self._secret_key
+        if self.get_key(kid) is None:
+            return None
+        return self._signing_keys.get(kid)
+
+    def _can_refetch(self, now: float) -> bool:
+        return now - self._last_fetch_attempt >= self.min_refetch_interval
+
+    # ============================================
+    # CARGA
+    # ============================================
+
+    def refresh(self) -> bool:
+        """
+        Descargar el JWKS de forma síncrona.
+
+        Si otro hilo ya está descargando, espera a que termine y reutiliza
+        su resultado.
+
+        Returns:
+            True si se obtuvo un JWKS válido
+        """
+        started = time.monotonic()
+        with self._fetch_lock:
+            if self._last_fetch_attempt >= started and self._keys:
+                return True
+            self._last_fetch_attempt = time.monotonic()
+            try:
+                response = requests.get(self.jwks_url, headers=self.headers,
+                                        timeout=self.timeout)
+                if response.status_code != 200:
+                    return False
+                jwks = response.json()
+            except (requests.exceptions.RequestException, ValueError):
+                return False
+            ttl = self._ttl_from_headers(response.headers)
+            return self._install(jwks, ttl)
+
+    def load_file(self, path: str) -> bool:
+        """Cargar un JWKS desde disco (usado como semilla offline)."""
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                jwks = json.load(fh)
+        except (OSError, ValueError):
+            return False
+        # Se marca para refrescar en cuanto haya red, sin dejar de servirlo
+        return self._install(jwks, 0)
+
+    def _install(self, jwks: Dict[str, Any], ttl: int) -> bool:
+        keys = {key['kid']: key for key in jwks.get('keys', []) if key.get('kid')}
+        if not keys:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if keys != self._keys:
+                # Las claves se construyen aquí, una vez por versión del JWKS
+                self._signing_keys = self._build_signing_keys(keys)
+                self._keys = keys
+                self._version += 1
+            self._expires_at = now + ttl
+            self._refresh_at = now + ttl * (1 - self.refresh_ahead)
+        return True
+
+    @staticmethod
+    def _build_signing_keys(keys: Dict[str, Dict[str, Any]]) -> Dict[str, jwt.PyJWK]:
+        signing_keys = {}
+        for kid, jwk in keys.items():
+            try:
+                signing_keys[kid] = jwt.PyJWK(jwk)
+            except (jwt.PyJWKError, jwt.InvalidKeyError):
+                # Tipo de clave no soportado: se ignora sin invalidar el resto
+                continue
+        return signing_keys
+
+    def _ttl_from_headers(self, headers) -> int:
+        cache_control = headers.get('Cache-Control', '')
+        if 'no-store' in cache_control or 'no-cache' in cache_control:
+            return self.min_ttl
+        match = _MAX_AGE_RE.search(cache_control)
+        ttl = int(match.group(1)) if match else self.default_ttl
+        return max(self.min_ttl, min(ttl, self.max_ttl))
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing or not self._can_refetch(time.monotonic()):
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name='jwks-refresh', daemon=True).start()
+
+
+# ============================================
+# INSTANCIA COMPARTIDA DEL PROCESO
+# ============================================
+
+_store: Optional[JWKSStore] = None
+_store_lock = threading.Lock()
+
+
+def get_jwks_store() -> JWKSStore:
+    """Obtener (o crear) el almacén JWKS del proceso según settings."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = getattr(settings, 'SUPABASE_AUTH_CONFIG', {})
+                _store = JWKSStore(
+                    jwks_url=f"{settings.SUPABASE_CONFIG['url']}/auth/v1/.well-known/jwks.json",
+                    headers={'apikey': settings.SUPABASE_CONFIG['anon_key']},
+                    default_ttl=config.get('jwks_ttl', 600),
+                    min_ttl=config.get('jwks_min_ttl', 60),
+                    max_ttl=config.get('jwks_max_ttl', 86400),
+                    min_refetch_interval=config.get('jwks_min_refetch_interval', 30),
+                    timeout=config.get('jwks_timeout', 5),
+                    local_file=config.get('jwks_file'),
+                    jwt_secret=config.get('jwt_secret'),
+                )
+    return _store
+
+
+def reset_jwks_store():
+    """Descartar el almacén compartido (útil en pruebas o tras cambiar settings)."""
+    global _store
+    with _store_lock:
+        _store = None
@@ -0,0 +1,115 @@
+"""
+Logging estructurado y muestreado para las rutas calientes (auth, cliente
+Supabase).
+
+- `SampledLogger` envuelve un logger estándar: DEBUG/INFO se muestrean
+  según `settings.LOG_SAMPLING`; WARNING y superiores siempre se emiten.
+- Los campos van en `record.fields` y `StructuredFormatter` los escribe
+  como una línea JSON.
+- `StageTimer` mide el desglose de tiempos de un request. Si el nivel
+  DEBUG está desactivado (o la muestra no toca) no se crea y el costo en
+  la ruta caliente es una sola comparación.
+"""
+
+import json
+import logging
+import random
+import time
+from typing import Optional, Dict, Any
+
+from django.conf import settings
+
+
+class SampledLogger:
+    """Logger con muestreo por nombre y campos estructurados."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.logger = logging.getLogger(name)
+        self._sample_rate: Optional[float] = None
+
+    @property
+    def sample_rate(self) -> float:
+        if self._sample_rate is None:
+            sampling = getattr(settings, 'LOG_SAMPLING', {})
+            self._sample_rate = float(sampling.get(self.name, sampling.get('default', 1.0)))
+        return self._sample_rate
+
+    def is_enabled(self, level: int) -> bool:
+        """True si un evento de este nivel debe emitirse ahora."""
+        if not self.logger.isEnabledFor(level):
+            return False
+        if level >= logging.WARNING:
+            return True
+        rate = self.sample_rate
+        return rate >= 1.0 or random.random() < rate
+
+    def log(self, level: int, event: str, exc_info=False, **fields):
+        if self.is_enabled(level):
+            self.logger.log(level, event, exc_info=exc_info,
+                            extra={'fields': fields})
+
+    def debug(self, event: str, **fields):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields):
+        self.log(logging.ERROR, event, **fields)
+
+    def exception(self, event: str, **fields):
+        self.log(logging.ERROR, event, exc_info=True, **fields)
+
+    def timer(self) -> Optional['StageTimer']:
+        """
+        Crear un cronómetro por etapas si toca registrar este request.
+
+        Returns:
+            StageTimer o None si el logging DEBUG está apagado o no hay muestra
+        """
+        if self.is_enabled(logging.DEBUG):
+            return StageTimer(self)
+        return None
+
+
+class StageTimer:
+    """Acumula la duración de cada etapa de un request en milisegundos."""
+
+    __slots__ = ('_log', '_last', 'stages')
+
+    def __init__(self, log: SampledLogger):
+        self._log = log
+        self._last = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def mark(self, stage: str):
+        """Cerrar la etapa en curso con el nombre indicado."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last) * 1000
+        self._last = now
+
+    def emit(self, event: str, **fields):
+        timings = {f'{stage}_ms': round(ms, 3) for stage, ms in self.stages.items()}
+        timings['total_ms'] = round(sum(self.stages.values()), 3)
+        # El muestreo ya se decidió al crear el cronómetro
+        self._log.logger.debug(event, extra={'fields': {**fields, **timings}})
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON con sus campos."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, Any] = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage(),
+        }
+        data.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
@@ -0,0 +1,46 @@
+# shared/permissions.py
+"""
+Permisos DRF basados en los claims del token de Supabase.
+
+Usan los accesos perezosos de `SupabaseUser`, así que no vuelven a
+decodificar ni validar el token.
+"""
+from rest_framework.permissions import BasePermission
+
+from .authentication import SupabaseUser
+
+
+class HasAppRole(BasePermission):
+    """
+    Permite el acceso si el usuario tiene alguno de los roles de la vista.
+
+    Uso:
+        class MiVista(APIView):
+            permission_classes = [HasAppRole]
+            required_roles = ('admin', 'operador')
+    """
+    message = 'No tiene el rol requerido para esta operación'
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not isinstance(user, SupabaseUser):
+            return False
+        roles = getattr(view, 'required_roles', ())
+        return not roles or user.has_role(*roles)
+
+
+class HasBranchAccess(BasePermission):
+    """
+    Permite el acceso si el usuario puede operar sobre la sucursal pedida.
+
+    La sucursal se toma del kwarg de URL `branch_id` o, si no está, del
+    parámetro `branch_id` del query string. Sin sucursal no se restringe.
+    """
+    message = 'No tiene acceso a esta sucursal'
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not isinstance(user, SupabaseUser):
+            return False
+        branch_id = view.kwargs.get('branch_id') or request.query_params.get('branch_id')
+        return branch_id is None or user.has_branch_access(branch_id)
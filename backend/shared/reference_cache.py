@@ -0,0 +1,238 @@
+"""
+Caché read-through de datos de referencia (regiones, sucursales, zonas
+especiales) para SupabaseClient.
+
+Son tablas pequeñas que casi nunca cambian, así que se guarda la tabla
+completa por proceso:
+- TTL por tabla (settings.SUPABASE_REFERENCE_CACHE_TTLS, 0 la desactiva)
+- Al vencer se revalida con If-None-Match si Supabase envió ETag (304 =
+  se reutiliza la copia sin volver a transferirla)
+- Índices por `id` y por código (`branch_code`, `zone_code`)
+- Invalidación explícita tras escribir (create/update/delete_region).
+  Las copias se piden sin coalescer (una lectura posterior a la escritura
+  no puede unirse a un GET anterior) y una copia cuya lectura se cruzó
+  con una invalidación no se guarda
+- Si Supabase falla (o su circuito está abierto) se sirve la última copia
+  conocida y no se vuelve a intentar hasta ERROR_RETRY_SECONDS después
+- La tabla se pide con `Prefer: count=exact`: si el total de
+  Content-Range supera lo recibido (el `max-rows` de PostgREST cortó la
+  respuesta), el resto se pide por páginas con el header Range
+- Contadores de aciertos para medir la tasa de acierto
+"""
+
+import hashlib
+import threading
+import time
+from typing import Optional, List, Dict, Any, Tuple
+
+import requests
+from django.conf import settings
+
+from .resilience import ResilienceError
+
+# Columnas indexadas por tabla
+REFERENCE_INDEXES = {
+    'regions': ('id', 'name'),
+    'branches': ('id', 'branch_code'),
+    'special_zones': ('id', 'zone_code'),
+}
+
+DEFAULT_TTLS = {
+    'regions': 3600,
+    'branches': 600,
+    'special_zones': 3600,
+}
+
+# Espera antes de reintentar tras un fallo sirviendo la copia vieja
+ERROR_RETRY_SECONDS = 30
+
+
+class _Snapshot:
+    __slots__ = ('rows', 'indexes', 'etag', 'expires_at')
+
+    def __init__(self, rows: List[Dict], columns: Tuple[str, ...], etag: Optional[str],
+                 expires_at: float):
+        self.rows = rows
+        self.indexes = {
+            column: {str(row[column]): row for row in rows if row.get(column) is not None}
+            for column in columns
+        }
+        self.etag = etag
+        self.expires_at = expires_at
+
+
+class ReferenceDataCache:
+    """Copias completas de las tablas de referencia, por URL y credencial."""
+
+    def __init__(self, ttls: Optional[Dict[str, int]] = None):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._snapshots: Dict[Tuple[str, str], _Snapshot] = {}
+        # Invalidaciones por tabla; None cuenta para todas
+        self._generations: Dict[Optional[str], int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stale_served = 0
+        self.errors = 0
+
+    def enabled(self, table: str) -> bool:
+        return self.ttls.get(table, 0) > 0
+
+    def _generation(self, table: str) -> Tuple[int, int]:
+        return self._generations.get(table, 0), self._generations.get(None, 0)
+
+    @staticmethod
+    def _scope(client) -> str:
+        # Con RLS cada credencial puede ver filas distintas
+        auth = client.default_headers.get('Authorization', '')
+        return hashlib.sha256(f'{client.base_url}|{auth}'.encode()).hexdigest()[:16]
+
+    # ============================================
+    # LECTURA
+    # ============================================
+
+    def rows(self, client, table: str) -> Optional[List[Dict]]:
+        """
+        Filas de la tabla, desde caché o recién obtenidas.
+
+        Returns:
+            Lista de filas (compartida: no modificar) o None si no se pudo
+            obtener y no hay copia previa
+        """
+        snapshot = self._snapshot(client, table)
+        return snapshot.rows if snapshot else None
+
+    def lookup(self, client, table: str, column: str, value) -> Optional[Dict]:
+        """Buscar una fila por una columna indexada (id o código)."""
+        snapshot = self._snapshot(client, table)
+        if snapshot is None:
+            return None
+        return snapshot.indexes[column].get(str(value))
+
+    def _snapshot(self, client, table: str) -> Optional[_Snapshot]:
+        key = (self._scope(client), table)
+        snapshot = self._snapshots.get(key)
+        now = time.monotonic()
+        if snapshot is not None and now < snapshot.expires_at:
+            with self._lock:
+                self.hits += 1
+            return snapshot
+
+        headers = {'Prefer': 'count=exact'}
+        if snapshot and snapshot.etag:
+            headers['If-None-Match'] = snapshot.etag
+        generation = self._generation(table)
+        rows, etag = None, None
+        try:
+            response = client._send_request('GET', table, params={'order': 'id.asc'},
+                                            headers=headers, coalesce=False)
+            if response.status_code == 200:
+                rows, etag = self._read_all(client, table, response)
+        except (requests.exceptions.RequestException, ResilienceError):
+            response = None
+
+        ttl = self.ttls.get(table, 0)
+        if response is not None and response.status_code == 304 and snapshot is not None:
+            snapshot.expires_at = now + ttl
+            with self._lock:
+                self.revalidated += 1
+            return snapshot
+
+        if rows is not None:
+            snapshot = _Snapshot(rows, REFERENCE_INDEXES.get(table, ('id',)), etag, now + ttl)
+            with self._lock:
+                # Si hubo una escritura mientras se leía, la respuesta puede
+                # ser anterior a ella: se entrega a este llamador pero no se guarda
+                if self._generation(table) == generation:
+                    self._snapshots[key] = snapshot
+                self.misses += 1
+            return snapshot
+
+        with self._lock:
+            self.errors += 1
+            if snapshot is not None:
+                # La copia vieja se sigue sirviendo sin golpear a Supabase en cada lectura
+                snapshot.expires_at = now + min(ttl, ERROR_RETRY_SECONDS)
+                self.stale_served += 1
+        return snapshot
+
+    @staticmethod
+    def _read_all(client, table: str, response) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """
+        Filas de la respuesta más las páginas que el `max-rows` haya dejado fuera.
+
+        Returns:
+            (filas o None si falló alguna página, ETag; None si hubo
+            páginas, porque el ETag solo cubre la primera)
+        """
+        from .supabase_client import parse_content_range  # supabase_client importa este módulo
+
+        rows = response.json()
+        etag = response.headers.get('ETag')
+        total = parse_content_range(response.headers.get('Content-Range'))
+        page_size = len(rows)
+        if total is None or total <= page_size or not page_size:
+            return rows, etag
+        for start in range(page_size, total, page_size):
+            page = client._send_request('GET', table, params={'order': 'id.asc'}, headers={
+                'Range-Unit': 'items', 'Range': f'{start}-{start + page_size - 1}'},
+                coalesce=False)
+            if page.status_code not in (200, 206):
+                return None, None
+            rows.extend(page.json())
+        return rows, None
+
+    # ============================================
+    # INVALIDACIÓN Y MÉTRICAS
+    # ============================================
+
+    def invalidate(self, table: Optional[str] = None):
+        """Descartar las copias de una tabla (o de todas si table es None)."""
+        with self._lock:
+            self._generations[table] = self._generations.get(table, 0) + 1
+            if table is None:
+                self._snapshots.clear()
+            else:
+                for key in [k for k in self._snapshots if k[1] == table]:
+                    del self._snapshots[key]
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            served = self.hits + self.revalidated
+            lookups = served + self.misses + self.errors
+            return {
+                'tables': len(self._snapshots),
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidated': self.revalidated,
+                'stale_served': self.stale_served,
+                'errors': self.errors,
+                'hit_rate': round(served / lookups, 4) if lookups else 0.0,
+            }
+
+
+# ============================================
+# INSTANCIA COMPARTIDA DEL PROCESO
+# ============================================
+
+_cache: Optional[ReferenceDataCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_reference_cache() -> ReferenceDataCache:
+    """Obtener (o crear) la caché de referencia del proceso según settings."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ReferenceDataCache(getattr(settings, 'SUPABASE_REFERENCE_CACHE_TTLS', None))
+    return _cache
+
+
+def reset_reference_cache():
+    """Descartar la caché compartida (útil en pruebas o tras cambiar settings)."""
+    global _cache
+    with _cache_lock:
+        _cache = None
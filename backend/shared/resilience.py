@@ -0,0 +1,426 @@
+"""
+Política de resiliencia del transporte hacia Supabase.
+
+Cuando Supabase se degrada no queremos que todos los hilos queden
+esperando 15 s por llamadas que van a fallar. Cada request pasa por:
+
+- Deadline: `with deadline(2.0): ...` acota el tiempo total de todas las
+  llamadas dentro del bloque (se propaga por contextvars a corrutinas y
+  al prefetch de iter_rows); el timeout de lectura de cada intento se
+  recorta a lo que quede
+- Reintentos con backoff exponencial y jitter completo, solo para verbos
+  idempotentes (GET, HEAD, PUT, DELETE) o requests marcados como tales
+  (upsert con on_conflict)
+- Presupuesto de reintentos por endpoint: cada request aporta una
+  fracción de ficha y cada reintento gasta una, así los reintentos no
+  multiplican la carga de un servicio caído
+- Circuit breaker por endpoint: tras N fallos seguidos se abre y falla al
+  instante; pasado `reset_timeout` deja pasar una sola sonda (half_open)
+
+Los cambios de estado del breaker se registran como
+`supabase.circuit_state` y se pueden observar con `on_transition()`.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Callable, Awaitable, Tuple, Type, List
+
+from django.conf import settings
+
+from .logs import SampledLogger
+
+log = SampledLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'})
+# Respuestas que vale la pena reintentar
+RETRYABLE_STATUSES = frozenset({408, 429, 502, 503, 504})
+# Respuestas que cuentan como fallo del servicio para el breaker
+FAILURE_STATUSES = frozenset({500, 502, 503, 504})
+
+DEFAULT_CONFIG = {
+    'max_attempts': 3,
+    'base_delay': 0.1,
+    'max_delay': 2.0,
+    'retry_budget_ratio': 0.2,
+    'retry_budget_per_second': 1.0,
+    'retry_budget_max': 20.0,
+    'breaker_failure_threshold': 5,
+    'breaker_reset_timeout': 30.0,
+    'default_deadline': 0,
+}
+
+
+class ResilienceError(Exception):
+    """El request no se envió (o se abandonó) por la política de resiliencia."""
+
+
+class CircuitOpenError(ResilienceError):
+    """El circuit breaker del endpoint está abierto."""
+
+
+class DeadlineExceeded(ResilienceError):
+    """Se agotó el deadline antes de completar el request."""
+
+
+# ============================================
+# DEADLINE
+# ============================================
+
+_deadline: ContextVar[Optional[float]] = ContextVar('supabase_deadline', default=None)
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    Acotar el tiempo total de las llamadas a Supabase dentro del bloque.
+
+    Un deadline anidado nunca extiende al exterior: se usa el más cercano.
+    """
+    expires_at = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        expires_at = min(expires_at, current)
+    token = _deadline.set(expires_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Segundos que quedan del deadline actual (None si no hay)."""
+    expires_at = _deadline.get()
+    return None if expires_at is None else expires_at - time.monotonic()
+
+
+# ============================================
+# PRESUPUESTO DE REINTENTOS
+# ============================================
+
+class RetryBudget:
+    """
+    Fichas para reintentar: cada request deposita `ratio`, además se
+    recargan `per_second` por segundo, hasta `max_tokens`.
+    """
+
+    def __init__(self, ratio: float = 0.2, per_second: float = 1.0, max_tokens: float = 20.0):
+        self.ratio = ratio
+        self.per_second = per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, extra: float = 0.0):
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens,
+                          self.tokens + (now - self._updated) * self.per_second + extra)
+        self._updated = now
+
+    def deposit(self):
+        with self._lock:
+            self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+# ============================================
+# CIRCUIT BREAKER
+# ============================================
+
+class CircuitBreaker:
+    """Breaker de tres estados (closed, open, half_open) por endpoint."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 on_transition: Optional[Callable[[str, str, str], None]] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_transition = on_transition
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str) -> Optional[Tuple[str, str]]:
+        if state == self.state:
+            return None
+        previous, self.state = self.state, state
+        if state == self.OPEN:
+            self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        return previous, state
+
+    def _notify(self, change: Optional[Tuple[str, str]]):
+        if change and self.on_transition:
+            self.on_transition(self.name, *change)
+
+    def allow(self) -> bool:
+        """True si el request puede enviarse ahora."""
+        change = None
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                change = self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                allowed = not self._probe_in_flight
+                self._probe_in_flight = True
+            else:
+                allowed = self.state == self.CLOSED
+        self._notify(change)
+        return allowed
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            change = self._set_state(self.CLOSED)
+        self._notify(change)
+
+    def record_failure(self):
+        change = None
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                change = self._set_state(self.OPEN)
+        self._notify(change)
+
+    def release(self):
+        """Liberar la sonda sin juzgar al servicio (error ajeno a la red)."""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+# ============================================
+# POLÍTICA
+# ============================================
+
+class ResiliencePolicy:
+    """Reintentos, presupuesto y breakers por endpoint, compartidos por el proceso."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**DEFAULT_CONFIG, **(config or {})}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._budgets: Dict[str, RetryBudget] = {}
+        self._listeners: List[Callable[[str, str, str], None]] = []
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.rejected = 0
+        self.deadline_exceeded = 0
+
+    def on_transition(self, callback: Callable[[str, str, str], None]):
+        """Registrar callback(endpoint, estado_anterior, estado_nuevo)."""
+        self._listeners.append(callback)
+
+    def _transition(self, name: str, previous: str, state: str):
+        log.warning('supabase.circuit_state', endpoint=name, previous=previous, state=state)
+        for callback in self._listeners:
+            callback(name, previous, state)
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(name, CircuitBreaker(
+                    name, self.config['breaker_failure_threshold'],
+                    self.config['breaker_reset_timeout'], self._transition))
+        return breaker
+
+    def budget(self, name: str) -> RetryBudget:
+        budget = self._budgets.get(name)
+        if budget is None:
+            with self._lock:
+                budget = self._budgets.setdefault(name, RetryBudget(
+                    self.config['retry_budget_ratio'], self.config['retry_budget_per_second'],
+                    self.config['retry_budget_max']))
+        return budget
+
+    def backoff(self, attempt: int) -> float:
+        """Backoff exponencial con jitter completo."""
+        ceiling = min(self.config['max_delay'], self.config['base_delay'] * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    # ============================================
+    # PASOS COMUNES (sync y async)
+    # ============================================
+
+    def _enter(self, name: str) -> Tuple[CircuitBreaker, RetryBudget, Optional[float]]:
+        breaker = self.breaker(name)
+        if not breaker.allow():
+            with self._lock:
+                self.rejected += 1
+            raise CircuitOpenError(f'Circuito abierto para {name}')
+        budget = self.budget(name)
+        budget.deposit()
+        expires_at = _deadline.get()
+        if expires_at is None and self.config['default_deadline']:
+            expires_at = time.monotonic() + self.config['default_deadline']
+        return breaker, budget, expires_at
+
+    def _attempt_timeout(self, breaker: CircuitBreaker, expires_at: Optional[float],
+                         read_timeout: float) -> float:
+        if expires_at is None:
+            return read_timeout
+        left = expires_at - time.monotonic()
+        if left <= 0:
+            breaker.release()
+            with self._lock:
+                self.deadline_exceeded += 1
+            raise DeadlineExceeded('Deadline agotado antes de enviar el request')
+        return min(read_timeout, left)
+
+    def _after(self, name: str, method: str, idempotent: bool, breaker: CircuitBreaker,
+               budget: RetryBudget, expires_at: Optional[float], attempt: int,
+               status: Optional[int] = None) -> Optional[float]:
+        """Registrar el resultado y devolver la espera antes de reintentar (o None)."""
+        failed = status is None or status in FAILURE_STATUSES
+        if failed:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+        retryable = status is None or status in RETRYABLE_STATUSES
+        if not (retryable and (idempotent or method in IDEMPOTENT_METHODS)):
+            return None
+        if attempt + 1 >= self.config['max_attempts'] or breaker.state == breaker.OPEN:
+            return None
+        delay = self.backoff(attempt)
+        if expires_at is not None and time.monotonic() + delay >= expires_at:
+            return None
+        if not budget.withdraw():
+            with self._lock:
+                self.budget_exhausted += 1
+            log.warning('supabase.retry_budget_exhausted', endpoint=name)
+            return None
+        with self._lock:
+            self.retries += 1
+        log.info('supabase.retry', endpoint=name, method=method, attempt=attempt + 1,
+                 status=status, delay_ms=round(delay * 1000, 1))
+        return delay
+
+    # ============================================
+    # EJECUCIÓN
+    # ============================================
+
+    def call(self, name: str, method: str, send: Callable[[float], Any],
+             transient: Tuple[Type[BaseException], ...], read_timeout: float,
+             idempotent: bool = False) -> Any:
+        """
+        Ejecutar `send(timeout)` con la política.
+
+        Args:
+            name: Endpoint (clave de breaker y presupuesto)
+            method: Verbo HTTP
+            send: Envía un intento con ese timeout de lectura y devuelve la respuesta
+            transient: Excepciones de red que cuentan como fallo reintentable
+            read_timeout: Timeout de lectura por intento sin deadline
+            idempotent: Permite reintentar aunque el verbo no lo sea
+
+        Returns:
+            La última respuesta obtenida
+
+        Raises:
+            CircuitOpenError, DeadlineExceeded o la última excepción de red
+        """
+        method = method.upper()
+        breaker, budget, expires_at = self._enter(name)
+        attempt = 0
+        while True:
+            timeout = self._attempt_timeout(breaker, expires_at, read_timeout)
+            try:
+                response = send(timeout)
+            except transient:
+                delay = self._after(name, method, idempotent, breaker, budget, expires_at, attempt)
+                if delay is None:
+                    raise
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                delay = self._after(name, method, idempotent, breaker, budget, expires_at,
+                                    attempt, response.status_code)
+                if delay is None:
+                    return response
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, name: str, method: str, send: Callable[[float], Awaitable[Any]],
+                    transient: Tuple[Type[BaseException], ...], read_timeout: float,
+                    idempotent: bool = False) -> Any:
+        """Versión async de `call` (`send` es una corrutina)."""
+        method = method.upper()
+        breaker, budget, expires_at = self._enter(name)
+        attempt = 0
+        while True:
+            timeout = self._attempt_timeout(breaker, expires_at, read_timeout)
+            try:
+                response = await send(timeout)
+            except transient:
+                delay = self._after(name, method, idempotent, breaker, budget, expires_at, attempt)
+                if delay is None:
+                    raise
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                delay = self._after(name, method, idempotent, breaker, budget, expires_at,
+                                    attempt, response.status_code)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'retries': self.retries,
+            'budget_exhausted': self.budget_exhausted,
+            'rejected': self.rejected,
+            'deadline_exceeded': self.deadline_exceeded,
+            'breakers': {name: {'state': b.state, 'failures': b.failures}
+                         for name, b in list(self._breakers.items())},
+        }
+
+
+def endpoint_name(base_url: str, endpoint: str) -> str:
+    """Clave de breaker/presupuesto: URL base + recurso (sin query string)."""
+    return f"{base_url}/{endpoint.split('?', 1)[0]}"
+
+
+# ============================================
+# INSTANCIA COMPARTIDA DEL PROCESO
+# ============================================
+
+_policy: Optional[ResiliencePolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_resilience_policy() -> ResiliencePolicy:
+    """Obtener (o crear) la política del proceso según settings."""
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                _policy = ResiliencePolicy(getattr(settings, 'SUPABASE_RESILIENCE_CONFIG', None))
+    return _policy
+
+
+def reset_resilience_policy():
+    """Descartar la política compartida (útil en pruebas o tras cambiar settings)."""
+    global _policy
+    with _policy_lock:
+        _policy = None
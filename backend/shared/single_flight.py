@@ -0,0 +1,141 @@
+"""
+Coalescencia de requests idénticos en vuelo ("single-flight").
+
+Cuando varios hilos (o tareas async) piden a la vez el mismo GET, solo el
+primero llama a Supabase; el resto espera y recibe la misma respuesta.
+Se comparte la respuesta HTTP ya leída, no el JSON: cada llamador lo
+parsea por su cuenta y puede modificar su resultado sin afectar a otros.
+"""
+
+import asyncio
+import threading
+from typing import Any, Callable, Awaitable, Dict, Hashable, Optional
+
+# Solo se coalescen lecturas: repetir un POST/PATCH no es equivalente
+COALESCED_METHODS = ('GET', 'HEAD')
+
+
+def request_key(method: str, url: str, headers: Dict[str, str],
+                params: Optional[Any] = None) -> Optional[Hashable]:
+    """
+    Clave de coalescencia de un request, o None si no se debe coalescer.
+
+    Incluye todos los headers (credencial, Range, Prefer...) para que dos
+    requests solo se unan si Supabase respondería exactamente lo mismo.
+    """
+    method = method.upper()
+    if method not in COALESCED_METHODS:
+        return None
+    items = params.items() if isinstance(params, dict) else (params or ())
+    return (method, url,
+            tuple(sorted((str(k), str(v)) for k, v in items)),
+            tuple(sorted((k.lower(), v) for k, v in headers.items())))
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Counters:
+    def __init__(self):
+        self.executions = 0
+        self.merged = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        calls = self.executions + self.merged
+        return {
+            'executions': self.executions,
+            'merged': self.merged,
+            'merge_ratio': round(self.merged / calls, 4) if calls else 0.0,
+        }
+
+
+class SingleFlight(_Counters):
+    """Single-flight para código con hilos (SupabaseClient)."""
+
+    def __init__(self):
+        super().__init__()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Ejecutar `fn` una sola vez por `key` entre los llamadores concurrentes.
+
+        Returns:
+            El resultado de la ejecución compartida (o su excepción)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.merged += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+
+class AsyncSingleFlight(_Counters):
+    """
+    Single-flight para corrutinas (AsyncSupabaseClient), por event loop.
+
+    `fn()` corre en su propia tarea y todos los llamadores, el primero
+    incluido, la esperan con `asyncio.shield`: si se cancela uno (p. ej.
+    el cliente se desconectó), los demás siguen esperando el resultado.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Marca la excepción como recuperada aunque todos se cancelaran
+        if not task.cancelled():
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        key = (id(loop), key)
+        task = self._calls.get(key)
+        if task is not None:
+            self.merged += 1
+        else:
+            task = self._calls[key] = loop.create_task(fn())
+            task.add_done_callback(lambda done: self._done(key, done))
+            self.executions += 1
+        return await asyncio.shield(task)
+
+
+# Instancias compartidas del proceso
+single_flight = SingleFlight()
+async_single_flight = AsyncSingleFlight()
+
+
+def coalescing_stats() -> Dict[str, Dict[str, Any]]:
+    """Métricas de coalescencia de los clientes síncrono y asíncrono."""
+    return {'sync': single_flight.stats, 'async': async_single_flight.stats}
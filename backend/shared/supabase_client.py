@@ -6,8 +6,113 @@ Esta es la solución temporal mientras resolvemos la conexión directa PostgreSQ
 import os
 import requests
 import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
-from typing import Optional, List, Dict, Any
+from django.utils import timezone
+from typing import Optional, List, Dict, Any, Iterator, Iterable, Sequence, Union
+
+from .http_pool import get_session, get_timeout, http_config
+from .logs import SampledLogger
+from .reference_cache import get_reference_cache
+from .resilience import (get_resilience_policy, endpoint_name, ResilienceError,
+                         CircuitOpenError)
+from .single_flight import single_flight, request_key
+
+log = SampledLogger(__name__)
+
+
+class SupabaseAPIError(Exception):
+    """Error de Supabase en una operación que no puede degradar a None/[]."""
+
+
+# Modos de conteo de PostgREST (header `Prefer: count=<modo>`):
+# - exact: COUNT(*) real, caro en tablas grandes
+# - planned: estimación del planner de PostgreSQL (pg_class.reltuples)
+# - estimated: exact si el conteo es menor que el `db-max-rows` de
+#   PostgREST, planned por encima
+COUNT_MODES = ('exact', 'planned', 'estimated')
+
+
+def parse_content_range(value: Optional[str]) -> Optional[int]:
+    """
+    Total de filas de un header Content-Range de PostgREST.
+    
+    Ejemplo: '0-24/3573' -> 3573, '*/0' -> 0, '0-24/*' -> None
+    """
+    if not value or '/' not in value:
+        return None
+    total = value.rsplit('/', 1)[1].strip()
+    return int(total) if total.isdigit() else None
+
+
+def build_select(columns: Optional[Union[str, Sequence]] = None,
+                 embed: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Construir el parámetro `select` de PostgREST.
+    
+    Args:
+        columns: Columnas propias ('id,name' o ['id', 'name']); por defecto '*'.
+            Un elemento dict dentro de la lista equivale a `embed`, lo que
+            permite embeber en varios niveles
+        embed: Recursos embebidos {relación: columnas}; la relación admite
+            la sintaxis de PostgREST (alias:tabla, tabla!inner)
+            
+    Ejemplo:
+        build_select(['id', 'product_name'],
+                     {'general_inventory': ['quantity', 'min_stock', 'max_stock']})
+        -> 'id,product_name,general_inventory(quantity,min_stock,max_stock)'
+    """
+    items = [columns] if isinstance(columns, str) else list(columns or ())
+    if embed:
+        items.append(embed)
+    parts = []
+    for item in items:
+        if isinstance(item, dict):
+            parts.extend(f'{relation}({build_select(spec)})' for relation, spec in item.items())
+        else:
+            parts.append(item)
+    if all(isinstance(item, dict) for item in items):
+        parts.insert(0, '*')
+    return ','.join(parts)
+
+
+def keyset_filter(params: Dict, key: str, cursor) -> Dict:
+    """
+    Agregar a `params` la condición `key > cursor` del paginado keyset.
+
+    Si el llamador ya filtra por `key`, la condición va en `and` (junto
+    con el `and` que ya trajera) para no pisar su filtro.
+    """
+    if key not in params:
+        params[key] = f'gt.{cursor}'
+        return params
+    conditions = [f'{key}.gt.{cursor}']
+    if params.get('and'):
+        conditions.insert(0, params['and'].strip()[1:-1])
+    params['and'] = f'({",".join(conditions)})'
+    return params
+
+
+def chunk_json_rows(rows: Iterable[Dict], max_bytes: int, max_rows: int) -> Iterator[List[bytes]]:
+    """
+    Serializar filas a JSON y agruparlas en lotes acotados por tamaño.
+    
+    Cada fila se serializa una sola vez; el lote se corta cuando agregar
+    la siguiente fila superaría `max_bytes` o al llegar a `max_rows`.
+    Una fila que por sí sola supera `max_bytes` va en un lote propio.
+    """
+    chunk: List[bytes] = []
+    size = 2  # corchetes del array
+    for row in rows:
+        encoded = json.dumps(row, default=str, separators=(',', ':')).encode()
+        if chunk and (size + len(encoded) + 1 > max_bytes or len(chunk) >= max_rows):
+            yield chunk
+            chunk, size = [], 2
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    if chunk:
+        yield chunk
 
 class SupabaseClient:
     """
@@ -17,16 +122,25 @@ class SupabaseClient:
     - Autenticación JWT
     - CRUD completo para todas las tablas
     - Manejo de errores robusto
-    - Timeouts configurables
+    - Timeouts configurables (conexión y lectura por separado)
+    - Conexiones keep-alive reutilizadas desde un pool compartido
+    - GETs idénticos en vuelo desde varios hilos comparten un solo request
+    - Deadline, reintentos con backoff y circuit breaker por endpoint
+      (shared/resilience.py)
     """
     
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 pool_size: Optional[int] = None, use_reference_cache: bool = True):
         """
         Inicializar cliente Supabase.
         
         Args:
             api_key: Clave API de Supabase (anon o service_role)
             base_url: URL base de Supabase
+            pool_size: Conexiones máximas hacia Supabase (por defecto,
+                SUPABASE_HTTP_CONFIG['pool_size'])
+            use_reference_cache: Si True, regiones, sucursales y zonas
+                especiales se leen de la caché de referencia del proceso
         """
         self.base_url = base_url or settings.SUPABASE_CONFIG['url']
         self.api_key = api_key or settings.SUPABASE_CONFIG['anon_key']
@@ -36,7 +150,11 @@ class SupabaseClient:
             'Content-Type': 'application/json',
             'Prefer': 'return=representation'  # Retornar datos insertados/actualizados
         }
-        self.timeout = 15  # segundos
+        self.session = get_session(self.base_url, pool_size=pool_size)
+        self.timeout = get_timeout()  # (conexión, lectura) en segundos
+        self.coalesce_gets = http_config()['coalesce_gets']
+        self.resilience = get_resilience_policy()
+        self.reference_cache = get_reference_cache() if use_reference_cache else None
     
     def _make_request(self, method: str, endpoint: str, 
                      data: Optional[Dict] = None, 
@@ -55,44 +173,99 @@ class SupabaseClient:
         Returns:
             Datos de respuesta o None si hay error
         """
-        url = f"{self.base_url}/rest/v1/{endpoint}"
-        request_headers = {**self.default_headers, **(headers or {})}
-        
         try:
-            response = requests.request(
-                method=method.upper(),
-                url=url,
-                headers=request_headers,
-                json=data,
-                params=params,
-                timeout=self.timeout
-            )
-            
-            # Log para debugging (solo en desarrollo)
-            if settings.DEBUG:
-                print(f"Supabase API Request: {method} {url}")
-                print(f"Status: {response.status_code}")
-                if response.status_code not in [200, 201, 204]:
-                    print(f"Error: {response.text[:200]}")
+            response = self._send_request(method, endpoint, data=data,
+                                          params=params, headers=headers)
             
-            if response.status_code in [200, 201]:
+            if response.status_code in [200, 201, 206]:  # 206: página de un Range
                 return response.json() if response.content else True
             elif response.status_code == 204:
                 return True  # No content (DELETE exitoso)
             else:
-                print(f"Supabase API Error {response.status_code}: {response.text[:200]}")
+                log.warning('supabase.http_error', method=method, endpoint=endpoint,
+                            status=response.status_code, body=response.text[:200])
                 return None
                 
+        except CircuitOpenError:
+            log.warning('supabase.circuit_open', method=method, endpoint=endpoint)
+            return None
+        except ResilienceError as e:
+            log.warning('supabase.deadline_exceeded', method=method, endpoint=endpoint,
+                        error=str(e))
+            return None
         except requests.exceptions.Timeout:
-            print(f"Supabase API Timeout: {method} {endpoint}")
+            log.warning('supabase.timeout', method=method, endpoint=endpoint)
             return None
         except requests.exceptions.ConnectionError:
-            print(f"Supabase API Connection Error: {method} {endpoint}")
+            log.warning('supabase.connection_error', method=method, endpoint=endpoint)
             return None
         except Exception as e:
-            print(f"Supabase API Unexpected Error: {e}")
+            log.exception('supabase.unexpected_error', method=method, endpoint=endpoint,
+                          error_type=type(e).__name__)
             return None
     
+    def _send_request(self, method: str, endpoint: str,
+                      data: Optional[Any] = None,
+                      params: Optional[Dict] = None,
+                      headers: Optional[Dict] = None,
+                      body: Optional[bytes] = None,
+                      idempotent: bool = False,
+                      coalesce: bool = True) -> requests.Response:
+        """
+        Enviar un request a PostgREST y devolver la respuesta tal cual.
+        
+        A diferencia de _make_request no traduce errores a None: los
+        errores de red se propagan como excepciones de requests.
+        
+        Si otro hilo ya tiene en vuelo el mismo GET (misma URL, parámetros
+        y headers), se espera su respuesta en lugar de repetirlo. La
+        respuesta se comparte ya leída; cada llamador parsea su propio JSON.
+        
+        Los intentos pasan por la política de resiliencia: pueden lanzar
+        CircuitOpenError o DeadlineExceeded (ResilienceError).
+        
+        Args:
+            body: Cuerpo JSON ya serializado (en lugar de `data`)
+            idempotent: Permite reintentar un POST/PATCH (ej: upsert con
+                on_conflict); GET, HEAD, PUT y DELETE siempre se reintentan
+            coalesce: False para no unirse a un GET en vuelo (ej: la caché
+                de referencia, que no puede recibir una respuesta anterior
+                a su invalidación)
+        """
+        url = f"{self.base_url}/rest/v1/{endpoint}"
+        request_headers = {**self.default_headers, **(headers or {})}
+        connect_timeout, read_timeout = self.timeout
+        
+        def attempt(timeout: float) -> requests.Response:
+            timer = log.timer()
+            response = self.session.request(
+                method=method.upper(),
+                url=url,
+                headers=request_headers,
+                json=data if body is None else None,
+                data=body,
+                params=params,
+                timeout=(min(connect_timeout, timeout), timeout)
+            )
+            
+            if timer:
+                timer.mark('http')
+                timer.emit('supabase.request', method=method, endpoint=endpoint,
+                           status=response.status_code)
+            return response
+        
+        def send() -> requests.Response:
+            return self.resilience.call(
+                endpoint_name(self.base_url, endpoint), method, attempt,
+                (requests.exceptions.Timeout, requests.exceptions.ConnectionError),
+                read_timeout, idempotent=idempotent)
+        
+        key = (request_key(method, url, request_headers, params)
+               if self.coalesce_gets and coalesce else None)
+        if key is None or data is not None or body is not None:
+            return send()
+        return single_flight.do(key, send)
+    
     # ============================================
     # MÉTODOS DE AUTENTICACIÓN
     # ============================================
@@ -111,7 +284,7 @@ class SupabaseClient:
         auth_url = f"{self.base_url}/auth/v1/token?grant_type=password"
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 auth_url,
                 headers={
                     'apikey': self.api_key,
@@ -127,11 +300,12 @@ class SupabaseClient:
                 self.default_headers['Authorization'] = f'Bearer {data["access_token"]}'
                 return data
             else:
-                print(f"Login Error {response.status_code}: {response.text[:100]}")
+                log.warning('supabase.login_error', status=response.status_code,
+                            body=response.text[:100])
                 return None
                 
         except Exception as e:
-            print(f"Login Connection Error: {e}")
+            log.warning('supabase.login_connection_error', error=str(e))
             return None
     
     def logout(self) -> bool:
@@ -139,7 +313,7 @@ class SupabaseClient:
         auth_url = f"{self.base_url}/auth/v1/logout"
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 auth_url,
                 headers=self.default_headers,
                 timeout=self.timeout
@@ -153,7 +327,7 @@ class SupabaseClient:
         auth_url = f"{self.base_url}/auth/v1/user"
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 auth_url,
                 headers=self.default_headers,
                 timeout=self.timeout
@@ -166,88 +340,514 @@ class SupabaseClient:
     # MÉTODOS PARA REGIONES
     # ============================================
     
-    def get_regions(self, filters: Optional[Dict] = None) -> List[Dict]:
+    def get_regions(self, filters: Optional[Dict] = None,
+                    columns: Optional[Union[str, Sequence]] = None,
+                    embed: Optional[Dict] = None) -> List[Dict]:
         """
         Obtener todas las regiones.
         
         Args:
             filters: Filtros opcionales (ej: {'climate_type': 'eq.tropical'})
+            columns: Columnas a traer (ver build_select)
+            embed: Recursos embebidos (ej: {'branches': ['id', 'name']})
             
         Returns:
             Lista de regiones
         """
-        params = filters or {}
+        if not (filters or columns or embed) and self._cached('regions'):
+            return self._cached_rows('regions')
+        params = self._read_params(filters, columns, embed)
         return self._make_request('GET', 'regions', params=params) or []
     
-    def get_region(self, region_id: str) -> Optional[Dict]:
+    def get_region(self, region_id: str,
+                   columns: Optional[Union[str, Sequence]] = None,
+                   embed: Optional[Dict] = None) -> Optional[Dict]:
         """Obtener una región específica por ID."""
-        result = self._make_request('GET', f'regions?id=eq.{region_id}')
+        if not (columns or embed) and self._cached('regions'):
+            return self._cached_lookup('regions', 'id', region_id)
+        params = self._read_params({'id': f'eq.{region_id}'}, columns, embed)
+        result = self._make_request('GET', 'regions', params=params)
         return result[0] if result and len(result) > 0 else None
     
     def create_region(self, data: Dict) -> Optional[Dict]:
         """Crear una nueva región."""
-        return self._make_request('POST', 'regions', data=data)
+        result = self._make_request('POST', 'regions', data=data)
+        self.invalidate_reference_data('regions')
+        return result
     
     def update_region(self, region_id: str, data: Dict) -> Optional[Dict]:
         """Actualizar una región existente."""
-        return self._make_request('PATCH', f'regions?id=eq.{region_id}', data=data)
+        result = self._make_request('PATCH', f'regions?id=eq.{region_id}', data=data)
+        self.invalidate_reference_data('regions')
+        return result
     
     def delete_region(self, region_id: str) -> bool:
         """Eliminar una región."""
-        return self._make_request('DELETE', f'regions?id=eq.{region_id}') is True
+        result = self._make_request('DELETE', f'regions?id=eq.{region_id}') is True
+        self.invalidate_reference_data('regions')
+        return result
     
     # ============================================
     # MÉTODOS PARA INVENTARIO REGIONAL
     # ============================================
     
-    def get_inventory(self, filters: Optional[Dict] = None) -> List[Dict]:
+    def get_inventory(self, filters: Optional[Dict] = None,
+                      columns: Optional[Union[str, Sequence]] = None,
+                      embed: Optional[Dict] = None) -> List[Dict]:
         """
         Obtener inventario regional.
         
         Args:
             filters: Filtros (ej: {'region_id': 'eq.uuid', 'quantity': 'gt.10'})
+            columns: Columnas a traer (ej: ['id', 'product_id', 'quantity'])
+            embed: Recursos embebidos (ej: {'products': ['product_code']})
             
         Returns:
             Lista de items de inventario
         """
-        params = filters or {}
+        params = self._read_params(filters, columns, embed)
         return self._make_request('GET', 'regional_inventory', params=params) or []
     
-    def get_inventory_by_region(self, region_id: str) -> List[Dict]:
-        """Obtener inventario de una región específica."""
-        return self.get_inventory({'region_id': f'eq.{region_id}'})
+    def get_inventory_by_region(self, region_id: str, **kwargs) -> List[Dict]:
+        """Obtener inventario de una región específica (acepta columns/embed)."""
+        return self.get_inventory({'region_id': f'eq.{region_id}'}, **kwargs)
     
     def create_inventory_item(self, data: Dict) -> Optional[Dict]:
         """Crear un nuevo item de inventario."""
         return self._make_request('POST', 'regional_inventory', data=data)
     
     def update_inventory_quantity(self, inventory_id: str, new_quantity: int) -> Optional[Dict]:
-        """Actualizar cantidad de un item de inventario."""
+        """
+        Fijar la cantidad de un item de inventario (sobrescribe el valor;
+        para mover stock usar apply_stock_movements).
+        """
         return self._make_request('PATCH', f'regional_inventory?id=eq.{inventory_id}', 
-                                 data={'quantity': new_quantity})
+                                 data={'quantity': new_quantity,
+                                       'last_updated': timezone.now().isoformat()})
+    
+    # ============================================
+    # OPERACIONES MASIVAS
+    # ============================================
+    
+    BULK_MAX_CHUNK_BYTES = 512 * 1024
+    BULK_MAX_CHUNK_ROWS = 5000
+    
+    def bulk_upsert(self, table: str, rows: Iterable[Dict],
+                    on_conflict: Optional[str] = None,
+                    max_chunk_bytes: Optional[int] = None,
+                    max_chunk_rows: Optional[int] = None,
+                    returning: bool = False) -> Dict:
+        """
+        Insertar o actualizar muchas filas con arrays JSON por lotes.
+        
+        Cada lote es un POST con `Prefer: resolution=merge-duplicates`
+        (INSERT ... ON CONFLICT DO UPDATE en PostgREST). Un lote fallido no
+        detiene los siguientes; el resultado detalla cada uno.
+        
+        Args:
+            table: Tabla destino
+            rows: Filas a escribir (todas con las mismas columnas)
+            on_conflict: Columnas de la restricción única (ej: 'product_id,branch_id')
+            max_chunk_bytes: Tamaño máximo del cuerpo de cada lote
+            max_chunk_rows: Filas máximas por lote
+            returning: Si True, devuelve las filas escritas en 'data'
+            
+        Returns:
+            {'success', 'total_rows', 'written_rows', 'chunks': [{'index',
+            'rows', 'bytes', 'status', 'error'}], 'data'}
+        """
+        max_chunk_bytes = max_chunk_bytes or self.BULK_MAX_CHUNK_BYTES
+        max_chunk_rows = max_chunk_rows or self.BULK_MAX_CHUNK_ROWS
+        params = {'on_conflict': on_conflict} if on_conflict else None
+        prefer = 'resolution=merge-duplicates,' + (
+            'return=representation' if returning else 'return=minimal')
+        
+        chunks, data = [], []
+        total = written = 0
+        for index, encoded in enumerate(chunk_json_rows(rows, max_chunk_bytes, max_chunk_rows)):
+            body = b'[' + b','.join(encoded) + b']'
+            report = {'index': index, 'rows': len(encoded), 'bytes': len(body),
+                      'status': None, 'error': None}
+            total += len(encoded)
+            try:
+                # Con on_conflict el upsert es idempotente y se puede reintentar
+                response = self._send_request('POST', table, params=params,
+                                              headers={'Prefer': prefer}, body=body,
+                                              idempotent=bool(on_conflict))
+                report['status'] = response.status_code
+                if response.status_code in (200, 201, 204):
+                    written += len(encoded)
+                    if returning and response.content:
+                        data.extend(response.json())
+                else:
+                    report['error'] = response.text[:500]
+            except (requests.exceptions.RequestException, ResilienceError) as e:
+                report['error'] = f'{type(e).__name__}: {e}'
+            if report['error']:
+                log.warning('supabase.bulk_chunk_error', table=table, chunk=index,
+                            rows=len(encoded), status=report['status'], error=report['error'])
+            chunks.append(report)
+        
+        return {
+            'success': written == total,
+            'total_rows': total,
+            'written_rows': written,
+            'chunks': chunks,
+            'data': data if returning else None,
+        }
+    
+    def bulk_upsert_inventory(self, rows: Iterable[Dict],
+                              on_conflict: str = 'product_id,branch_id',
+                              **kwargs) -> Dict:
+        """
+        Upsert masivo de inventario regional (ver bulk_upsert).
+        
+        Args:
+            rows: Filas completas de regional_inventory
+            on_conflict: Restricción única usada para fusionar duplicados
+        """
+        return self.bulk_upsert('regional_inventory', rows, on_conflict=on_conflict, **kwargs)
+    
+    def bulk_update_quantities(self, mapping: Dict, branch_id: Optional[str] = None,
+                               table: str = 'general_inventory', **kwargs) -> Dict:
+        """
+        Fijar las cantidades de muchos productos en pocas llamadas.
+        
+        Equivale a llamar `update_general_inventory` por cada producto: es
+        un upsert por (product_id, branch_id) que solo envía la cantidad y
+        last_updated (como la función), así que la tabla debe tener valores
+        por defecto en el resto de columnas (como general_inventory en
+        Supabase).
+        
+        Args:
+            mapping: {product_id: cantidad} junto con `branch_id`, o
+                {(product_id, branch_id): cantidad}
+            branch_id: Sucursal común cuando las claves son solo product_id
+            table: Tabla destino
+            
+        Returns:
+            Resultado por lotes (ver bulk_upsert)
+        """
+        now = timezone.now().isoformat()
+        
+        def rows():
+            for key, quantity in mapping.items():
+                if branch_id is not None:
+                    product_id, row_branch = key, branch_id
+                else:
+                    product_id, row_branch = key
+                yield {'product_id': product_id, 'branch_id': row_branch, 'quantity': quantity,
+                       'last_updated': now}
+        
+        return self.bulk_upsert(table, rows(), on_conflict='product_id,branch_id', **kwargs)
+    
+    # ============================================
+    # FUNCIONES RPC
+    # ============================================
+    
+    def rpc(self, function: str, params: Optional[Dict] = None) -> Optional[Any]:
+        """
+        Ejecutar una función de PostgreSQL expuesta por PostgREST.
+    
+        Args:
+            function: Nombre de la función (ej: 'update_general_inventory')
+            params: Argumentos por nombre (ej: {'p_product_id': ...})
+    
+        Returns:
+            Lo que devuelva la función, o None si hay error
+        """
+        return self._make_request('POST', f'rpc/{function}', data=params or {})
+    
+    def create_general_inventory_batch(self, items: Iterable[Dict]) -> Optional[Dict]:
+        """
+        Crear/actualizar el inventario general de muchos productos en una
+        sola llamada y una sola transacción (create_general_inventory_batch).
+    
+        Args:
+            items: [{'product_id', 'branch_id', 'quantity', 'min_stock',
+                'max_stock', 'location', 'notes'}]
+    
+        Returns:
+            {'success', 'message', 'data': {'rows'}} o None si hay error
+        """
+        return self.rpc('create_general_inventory_batch', {'p_items': list(items)})
+    
+    def update_general_inventory_batch(self, items: Iterable[Dict]) -> Optional[Dict]:
+        """
+        Fijar la cantidad de muchos (producto, sucursal) en una sola llamada
+        (update_general_inventory_batch; versión por lotes de
+        update_general_inventory).
+    
+        Args:
+            items: [{'product_id', 'branch_id', 'quantity'}]
+        """
+        product_ids, branch_ids, quantities = [], [], []
+        for item in items:
+            product_ids.append(item['product_id'])
+            branch_ids.append(item['branch_id'])
+            quantities.append(item.get('quantity', item.get('new_quantity')))
+        return self.rpc('update_general_inventory_batch', {
+            'p_product_ids': product_ids,
+            'p_branch_ids': branch_ids,
+            'p_quantities': quantities,
+        })
+    
+    def apply_stock_movements(self, movements: Iterable[Dict]) -> Optional[Dict]:
+        """
+        Mover stock con deltas atómicos (apply_stock_movements) en lugar de
+        leer la cantidad y escribirla con update_inventory_quantity.
+    
+        Args:
+            movements: [{'product_id', 'quantity', 'from_location_type',
+                'from_location_id', 'to_location_type', 'to_location_id',
+                'transaction_type', 'notes'}]
+    
+        Returns:
+            {'success', 'message', 'data': {'movements'}},
+            {'success': False, 'error', 'data': {'shortages'}} o None si hay error
+        """
+        return self.rpc('apply_stock_movements', {'p_movements': list(movements)})
     
     # ============================================
     # MÉTODOS PARA SUCURSALES
     # ============================================
     
-    def get_branches(self, active_only: bool = True) -> List[Dict]:
+    def get_branches(self, active_only: bool = True,
+                     columns: Optional[Union[str, Sequence]] = None,
+                     embed: Optional[Dict] = None) -> List[Dict]:
         """
         Obtener todas las sucursales.
         
         Args:
             active_only: Si True, solo devuelve sucursales activas
+            columns: Columnas a traer (ver build_select)
+            embed: Recursos embebidos (ej: {'regions': ['name', 'climate_type']})
             
         Returns:
             Lista de sucursales
         """
+        if not (columns or embed) and self._cached('branches'):
+            rows = self._cached_rows('branches')
+            return [row for row in rows if row.get('is_active')] if active_only else rows
         filters = {'is_active': 'eq.true'} if active_only else {}
-        return self._make_request('GET', 'branches', params=filters) or []
+        params = self._read_params(filters, columns, embed)
+        return self._make_request('GET', 'branches', params=params) or []
     
-    def get_branch(self, branch_code: str) -> Optional[Dict]:
+    def get_branch(self, branch_code: str,
+                   columns: Optional[Union[str, Sequence]] = None,
+                   embed: Optional[Dict] = None) -> Optional[Dict]:
         """Obtener una sucursal específica por código."""
-        result = self._make_request('GET', f'branches?branch_code=eq.{branch_code}')
+        if not (columns or embed) and self._cached('branches'):
+            return self._cached_lookup('branches', 'branch_code', branch_code)
+        params = self._read_params({'branch_code': f'eq.{branch_code}'}, columns, embed)
+        result = self._make_request('GET', 'branches', params=params)
         return result[0] if result and len(result) > 0 else None
     
+    # ============================================
+    # MÉTODOS PARA ZONAS ESPECIALES
+    # ============================================
+    
+    def get_special_zones(self) -> List[Dict]:
+        """Obtener todas las zonas especiales (refrigeración, etc.)."""
+        if self._cached('special_zones'):
+            return self._cached_rows('special_zones')
+        return self._make_request('GET', 'special_zones') or []
+    
+    def get_special_zone(self, zone_code: str) -> Optional[Dict]:
+        """Obtener una zona especial por código."""
+        if self._cached('special_zones'):
+            return self._cached_lookup('special_zones', 'zone_code', zone_code)
+        result = self._make_request('GET', 'special_zones', params={'zone_code': f'eq.{zone_code}'})
+        return result[0] if result and len(result) > 0 else None
+    
+    # ============================================
+    # CACHÉ DE DATOS DE REFERENCIA
+    # ============================================
+    
+    def invalidate_reference_data(self, table: Optional[str] = None):
+        """
+        Descartar la caché de referencia tras cambiar datos por otra vía.
+        
+        Args:
+            table: 'regions', 'branches' o 'special_zones' (None = todas)
+        """
+        if self.reference_cache is not None:
+            self.reference_cache.invalidate(table)
+    
+    def _cached(self, table: str) -> bool:
+        return self.reference_cache is not None and self.reference_cache.enabled(table)
+    
+    def _cached_rows(self, table: str) -> List[Dict]:
+        # Copias: quien llama puede modificar las filas sin tocar la caché
+        rows = self.reference_cache.rows(self, table)
+        return [dict(row) for row in rows] if rows else []
+    
+    def _cached_lookup(self, table: str, column: str, value) -> Optional[Dict]:
+        row = self.reference_cache.lookup(self, table, column, value)
+        return dict(row) if row is not None else None
+    
+    # ============================================
+    # MÉTODOS PARA PRODUCTOS
+    # ============================================
+    
+    def get_products(self, filters: Optional[Dict] = None,
+                     columns: Optional[Union[str, Sequence]] = None,
+                     embed: Optional[Dict] = None,
+                     active_only: bool = True) -> List[Dict]:
+        """
+        Obtener productos.
+        
+        Args:
+            filters: Filtros estilo PostgREST; los de recursos embebidos van
+                con prefijo (ej: {'general_inventory.branch_id': 'eq.uuid'})
+            columns: Columnas a traer (ver build_select)
+            embed: Recursos embebidos
+            active_only: Si True, solo productos activos
+            
+        Returns:
+            Lista de productos
+        """
+        filters = dict(filters or {})
+        if active_only:
+            filters.setdefault('is_active', 'eq.true')
+        params = self._read_params(filters, columns, embed)
+        return self._make_request('GET', 'products', params=params) or []
+    
+    def get_products_with_inventory(self, branch_id: str,
+                                    columns: Optional[Union[str, Sequence]] = None,
+                                    inventory_columns: Sequence[str] = ('quantity', 'min_stock', 'max_stock'),
+                                    active_only: bool = True) -> List[Dict]:
+        """
+        Productos con su inventario general de una sucursal en un solo request.
+        
+        Reemplaza el patrón N+1 (productos y luego un general_inventory por
+        producto): PostgREST hace el join y filtra el recurso embebido por
+        sucursal. Los productos sin stock en la sucursal traen
+        `general_inventory: []`.
+        
+        Args:
+            branch_id: Sucursal cuyo inventario se embebe
+            columns: Columnas del producto (por defecto todas)
+            inventory_columns: Columnas de general_inventory a traer
+            active_only: Si True, solo productos activos
+        """
+        return self.get_products(
+            {'general_inventory.branch_id': f'eq.{branch_id}', 'order': 'product_name.asc'},
+            columns=columns,
+            embed={'general_inventory': list(inventory_columns)},
+            active_only=active_only,
+        )
+    
+    @staticmethod
+    def _read_params(filters: Optional[Dict],
+                     columns: Optional[Union[str, Sequence]],
+                     embed: Optional[Dict]) -> Dict:
+        """Parámetros de lectura: copia de los filtros más `select` si aplica."""
+        params = dict(filters or {})
+        if columns or embed:
+            params['select'] = build_select(columns, embed)
+        return params
+    
+    # ============================================
+    # LECTURA PAGINADA (STREAMING)
+    # ============================================
+    
+    DEFAULT_PAGE_SIZE = 1000
+    
+    def iter_rows(self, table: str, filters: Optional[Dict] = None,
+                  page_size: Optional[int] = None, key: str = 'id',
+                  select: Optional[str] = None, paging: str = 'keyset',
+                  prefetch: bool = False) -> Iterator[Dict]:
+        """
+        Recorrer una tabla página a página con memoria constante.
+        
+        Args:
+            table: Tabla o vista de PostgREST
+            filters: Filtros estilo PostgREST (ej: {'branch_id': 'eq.uuid'})
+            page_size: Filas por página (por defecto DEFAULT_PAGE_SIZE)
+            key: Columna única y ordenable para el paginado keyset
+            select: Columnas a traer (ej: 'id,product_id,quantity')
+            paging: 'keyset' (order=key + key>último, costo constante por
+                página) o 'range' (header Range, para tablas sin clave única;
+                se degrada con la profundidad como un OFFSET). En 'range' se
+                ordena por el `order` de `filters` o, si no hay, por `key`:
+                sin orden fijo las páginas pueden repetir o saltar filas
+            prefetch: Si True, pide la página siguiente en segundo plano
+                mientras el llamador procesa la actual
+            
+        Yields:
+            Cada fila como diccionario
+            
+        Raises:
+            SupabaseAPIError: si falla una página (no se devuelven datos
+                truncados en silencio)
+        """
+        if paging not in ('keyset', 'range'):
+            raise ValueError("paging debe ser 'keyset' o 'range'")
+        page_size = page_size or self.DEFAULT_PAGE_SIZE
+        base_params = dict(filters or {})
+        if select:
+            columns = [c.strip() for c in select.split(',')]
+            if paging == 'keyset' and key not in columns and '*' not in columns:
+                select = f'{select},{key}'
+            base_params['select'] = select
+        
+        def fetch(cursor):
+            params = dict(base_params)
+            headers = None
+            if paging == 'keyset':
+                params['order'] = f'{key}.asc'
+                params['limit'] = page_size
+                if cursor is not None:
+                    keyset_filter(params, key, cursor)
+            else:
+                params.setdefault('order', f'{key}.asc')
+                start = cursor or 0
+                headers = {'Range-Unit': 'items', 'Range': f'{start}-{start + page_size - 1}'}
+            page = self._make_request('GET', table, params=params, headers=headers)
+            if page is None:
+                raise SupabaseAPIError(f'Error leyendo {table} (cursor={cursor})')
+            return page
+        
+        def next_cursor(page, cursor):
+            if len(page) < page_size:
+                return None
+            if paging == 'keyset':
+                return page[-1][key]
+            return (cursor or 0) + page_size
+        
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            cursor = None
+            page = fetch(cursor)
+            while True:
+                following = next_cursor(page, cursor)
+                pending = None
+                if following is not None and executor:
+                    # Copia el contexto para que el prefetch respete el deadline
+                    pending = executor.submit(contextvars.copy_context().run, fetch, following)
+                yield from page
+                if following is None:
+                    return
+                cursor = following
+                page = pending.result() if pending else fetch(cursor)
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    def iter_inventory(self, filters: Optional[Dict] = None, **kwargs) -> Iterator[Dict]:
+        """Recorrer el inventario regional por páginas (ver iter_rows)."""
+        return self.iter_rows('regional_inventory', filters, **kwargs)
+    
+    def iter_regions(self, filters: Optional[Dict] = None, **kwargs) -> Iterator[Dict]:
+        """Recorrer las regiones por páginas (ver iter_rows)."""
+        return self.iter_rows('regions', filters, **kwargs)
+    
+    def iter_branches(self, active_only: bool = True, **kwargs) -> Iterator[Dict]:
+        """Recorrer las sucursales por páginas (ver iter_rows)."""
+        filters = {'is_active': 'eq.true'} if active_only else {}
+        return self.iter_rows('branches', filters, **kwargs)
+    
     # ============================================
     # MÉTODOS DE UTILIDAD
     # ============================================
@@ -255,10 +855,10 @@ class SupabaseClient:
     def health_check(self) -> bool:
         """Verificar que la API esté funcionando."""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/rest/v1/",
                 headers={'apikey': self.api_key},
-                timeout=5
+                timeout=get_timeout(5)
             )
             return response.status_code == 200
         except:
@@ -266,9 +866,64 @@ class SupabaseClient:
     
     def get_table_count(self, table_name: str) -> int:
         """Obtener conteo de registros en una tabla."""
-        params = {
-            'select': 'count',
-            'count': 'exact'
-        }
-        result = self._make_request('GET', table_name, params=params)
-        return result[0]['count'] if result else 0
\ No newline at end of file
+        return self.count(table_name) or 0
+    
+    def count(self, table: str, filters: Optional[Dict] = None,
+              mode: str = 'exact') -> Optional[int]:
+        """
+        Contar filas con un HEAD, leyendo el total del header Content-Range.
+        
+        No se transfiere ninguna fila; con mode='planned' o 'estimated'
+        PostgreSQL tampoco recorre la tabla.
+        
+        Args:
+            table: Nombre de la tabla
+            filters: Filtros PostgREST (ej: {'branch_id': 'eq.<uuid>'})
+            mode: 'exact', 'planned' o 'estimated' (ver COUNT_MODES)
+            
+        Returns:
+            Número de filas o None si hubo error
+        """
+        if mode not in COUNT_MODES:
+            raise ValueError(f'Modo de conteo inválido: {mode} (usar {", ".join(COUNT_MODES)})')
+        try:
+            response = self._send_request('HEAD', table, params=filters,
+                                          headers={'Prefer': f'count={mode}'})
+        except (requests.exceptions.RequestException, ResilienceError) as e:
+            log.warning('supabase.count_error', table=table, mode=mode,
+                        error_type=type(e).__name__)
+            return None
+        if response.status_code not in (200, 206):
+            log.warning('supabase.http_error', method='HEAD', endpoint=table,
+                        status=response.status_code)
+            return None
+        return parse_content_range(response.headers.get('Content-Range'))
+    
+    def count_tables(self, tables: Union[Sequence[str], Dict[str, Optional[Dict]]],
+                     mode: str = 'exact') -> Dict[str, Optional[int]]:
+        """
+        Contar varias tablas a la vez (un HEAD por tabla, en paralelo).
+        
+        El tiempo total es el de la tabla más lenta, no la suma, así los
+        contadores de un dashboard cuestan un solo viaje de red.
+        
+        Args:
+            tables: Lista de tablas o {tabla: filtros}
+            mode: Modo de conteo para todas (ver count)
+            
+        Returns:
+            {tabla: número de filas o None si falló}
+        """
+        if not isinstance(tables, dict):
+            tables = {table: None for table in tables}
+        if not tables:
+            return {}
+        # No más hilos que conexiones del pool
+        workers = min(len(tables), http_config()['pool_size'])
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                table: executor.submit(contextvars.copy_context().run,
+                                       self.count, table, filters, mode)
+                for table, filters in tables.items()
+            }
+            return {table: future.result() for table, future in futures.items()}
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+Caché de tokens JWT ya verificados.
+
+El frontend reenvía el mismo bearer token cientos de veces por sesión; con
+esta caché la firma se verifica una sola vez por token y proceso:
+- Clave: SHA-256 del token (el token nunca se guarda en claro)
+- Cada entrada vence en el `exp` del token menos el margen de reloj
+- LRU acotado por tamaño, con contadores de aciertos/fallos
+- Backend compartido opcional (un alias de CACHES de Django, ej: Redis)
+  para que todos los workers reutilicen las mismas verificaciones
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+from django.conf import settings
+
+SHARED_KEY_PREFIX = 'supabase-jwt:'
+
+
+class VerifiedTokenCache:
+    """LRU de claims verificados indexado por el digest del token."""
+
+    def __init__(self, max_size: int = 10000, clock_skew: int = 30,
+                 shared_backend: Optional[str] = None):
+        """
+        Args:
+            max_size: Máximo de tokens en memoria (0 desactiva la caché)
+            clock_skew: Segundos que se restan al `exp` de cada token
+            shared_backend: Alias de `settings.CACHES` compartido entre
+                procesos (opcional)
+        """
+        self.max_size = max_size
+        self.clock_skew = clock_skew
+        self.shared_backend = shared_backend
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtener los claims de un token verificado previamente.
+
+        Returns:
+            Claims del token o None si no está en caché o ya venció
+        """
+        if not self.max_size:
+            return None
+        key = self.digest(token)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, claims = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self._entries[key]
+
+        claims = self._get_shared(key)
+        if claims is not None:
+            self._store(key, claims, self._expires_at(claims))
+            with self._lock:
+                self.shared_hits += 1
+            return claims
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, token: str, claims: Dict[str, Any]):
+        """Guardar los claims de un token recién verificado."""
+        if not self.max_size:
+            return
+        expires_at = self._expires_at(claims)
+        if expires_at <= time.time():
+            return
+        key = self.digest(token)
+        self._store(key, claims, expires_at)
+        self._set_shared(key, claims, expires_at)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Contadores de la caché (para métricas o depuración)."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _expires_at(self, claims: Dict[str, Any]) -> float:
+        exp = claims.get('exp')
+        if not isinstance(exp, (int, float)):
+            return 0
+        return exp - self.clock_skew
+
+    def _store(self, key: str, claims: Dict[str, Any], expires_at: float):
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # ============================================
+    # BACKEND COMPARTIDO (OPCIONAL)
+    # ============================================
+
+    def _shared(self):
+        if not self.shared_backend:
+            return None
+        from django.core.cache import caches
+        return caches[self.shared_backend]
+
+    def _get_shared(self, key: str) -> Optional[Dict[str, Any]]:
+        cache = self._shared()
+        if cache is None:
+            return None
+        try:
+            claims = cache.get(SHARED_KEY_PREFIX + key)
+        except Exception:
+            # Un backend caído no debe tumbar la autenticación
+            return None
+        if claims is None or self._expires_at(claims) <= time.time():
+            return None
+        return claims
+
+    def _set_shared(self, key: str, claims: Dict[str, Any], expires_at: float):
+        cache = self._shared()
+        if cache is None:
+            return
+        timeout = int(expires_at - time.time())
+        if timeout <= 0:
+            return
+        try:
+            cache.set(SHARED_KEY_PREFIX + key, claims, timeout=timeout)
+        except Exception:
+            pass
+
+
+# ============================================
+# INSTANCIA COMPARTIDA DEL PROCESO
+# ============================================
+
+_cache: Optional[VerifiedTokenCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_token_cache() -> VerifiedTokenCache:
+    """Obtener (o crear) la caché de tokens del proceso según settings."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                config = getattr(settings, 'SUPABASE_AUTH_CONFIG', {})
+                _cache = VerifiedTokenCache(
+                    max_size=config.get('token_cache_size', 10000),
+                    clock_skew=config.get('token_cache_skew', 30),
+                    shared_backend=config.get('token_cache_backend'),
+                )
+    return _cache
+
+
+def reset_token_cache():
+    """Descartar la caché compartida (útil en pruebas o tras cambiar settings)."""
+    global _cache
+    with _cache_lock:
+        _cache = None
@@ -8,7 +8,15 @@ from inventory.views import (
     inventory_summary_api,
     AssignToBranchAPIView,
     CreateGeneralInventoryAPIView,
-    InventorySummaryAPIView
+    InventorySummaryAPIView,
+    StockMovementAPIView,
+    StockAsOfAPIView,
+    TransactionFeedAPIView,
+    TransactionTrendsAPIView,
+    InventoryImportAPIView,
+    InventoryExportAPIView,
+    ProductSearchAPIView,
+    ProductAutocompleteAPIView
 )
 
 urlpatterns = [
@@ -24,4 +32,12 @@ urlpatterns = [
     path('api/v1/inventory/assign/', AssignToBranchAPIView.as_view(), name='api-v1-assign'),
     path('api/v1/inventory/create/', CreateGeneralInventoryAPIView.as_view(), name='api-v1-create'),
     path('api/v1/inventory/summary/', InventorySummaryAPIView.as_view(), name='api-v1-summary'),
+    path('api/v1/inventory/movements/', StockMovementAPIView.as_view(), name='api-v1-movements'),
+    path('api/v1/inventory/stock-as-of/', StockAsOfAPIView.as_view(), name='api-v1-stock-as-of'),
+    path('api/v1/inventory/transactions/', TransactionFeedAPIView.as_view(), name='api-v1-transactions'),
+    path('api/v1/inventory/trends/', TransactionTrendsAPIView.as_view(), name='api-v1-trends'),
+    path('api/v1/inventory/import/', InventoryImportAPIView.as_view(), name='api-v1-import'),
+    path('api/v1/inventory/export/<str:dataset>/', InventoryExportAPIView.as_view(), name='api-v1-export'),
+    path('api/v1/products/search/', ProductSearchAPIView.as_view(), name='api-v1-product-search'),
+    path('api/v1/products/autocomplete/', ProductAutocompleteAPIView.as_view(), name='api-v1-product-autocomplete'),
 ]
\ No newline at end of file